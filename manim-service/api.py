@@ -1,26 +1,26 @@
 """
 Simple Flask API for generating Manim visualizations
 """
-from flask import Flask, request, jsonify, send_file, Response
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 import json
 import os
-import subprocess
-import uuid
-import shutil
 import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
-# Try to import TTS generator, but don't fail if it's not available
-try:
-    from tts_generator import generate_tts, combine_video_audio
-    TTS_AVAILABLE = True
-except ImportError as e:
-    print(f"[WARNING] TTS generator not available: {e}")
-    TTS_AVAILABLE = False
-    generate_tts = None
-    combine_video_audio = None
+from async_serving import serving_mode
+from code_validator import InvalidCodeError, validate_scene_code
+from jobs import (JOB_CONCURRENCY, PRIORITY_DRAFT, PRIORITY_FINAL, TERMINAL_EVENTS, JobScheduler, JobStore,
+                  QueueFullError)
+from live_stream import LIVE_DIR
+from media_lifecycle import MediaLifecycle, touch_access
+from metrics import PREFLIGHT_REJECTIONS, render_metrics
+from render_cache import RenderCache
+from render_pipeline import RenderPipeline, TTS_AVAILABLE, TTS_CACHE
+from render_pool import RenderPool
+from video_packaging import HLS_DIR, HLS_PLAYLIST
+from video_serving import send_hls_file, send_video
 
 # Load environment variables from parent directory's .env.local
 parent_env = Path(__file__).parent.parent / '.env.local'
@@ -37,6 +37,12 @@ venv_python = Path('./venv/bin/python')
 PYTHON_PATH = str(venv_python) if venv_python.exists() else sys.executable
 print(f"[STARTUP] Using Python: {PYTHON_PATH}")
 
+# Pre-warmed Manim workers (RENDER_POOL_SIZE, RENDER_WORKER_MAX_JOBS, RENDER_WORKER_MAX_RSS_MB)
+RENDER_POOL = RenderPool(PYTHON_PATH)
+RENDER_POOL.start()
+print(f"[STARTUP] Render pool size: {RENDER_POOL.size}")
+print(f"[STARTUP] Serving mode: {serving_mode()}")
+
 # Ensure LaTeX is in PATH
 latex_path = "/Library/TeX/texbin"
 if os.path.exists(latex_path) and latex_path not in os.environ.get('PATH', ''):
@@ -52,6 +58,22 @@ MEDIA_DIR.mkdir(exist_ok=True)
 TEMP_DIR = Path("./temp")
 TEMP_DIR.mkdir(exist_ok=True)
 
+# Content-addressed cache of finished videos (RENDER_CACHE_MAX_MB)
+RENDER_CACHE = RenderCache(MEDIA_DIR)
+
+RENDER_PIPELINE = RenderPipeline(RENDER_POOL, RENDER_CACHE, MEDIA_DIR, TEMP_DIR)
+
+# Renders run as jobs on a bounded scheduler (JOB_CONCURRENCY, JOB_QUEUE_SIZE)
+JOB_SCHEDULER = JobScheduler(
+    RENDER_PIPELINE.run,
+    JobStore(TEMP_DIR / "jobs"),
+    concurrency=JOB_CONCURRENCY or max(1, RENDER_POOL.size),
+)
+
+# Budgets and TTLs for published videos, Manim intermediates and scratch files
+MEDIA_LIFECYCLE = MediaLifecycle(MEDIA_DIR, TEMP_DIR, JOB_SCHEDULER.store.is_active)
+MEDIA_LIFECYCLE.start()
+
 print(f"[STARTUP] Flask app initialized")
 print(f"[STARTUP] Media directory: {MEDIA_DIR.absolute()}")
 print(f"[STARTUP] Temp directory: {TEMP_DIR.absolute()}")
@@ -61,7 +83,231 @@ print(f"[STARTUP] TTS available: {TTS_AVAILABLE}")
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({"status": "healthy", "service": "manim-visualizer"})
+    return jsonify({
+        "status": "healthy",
+        "service": "manim-visualizer",
+        "serving": serving_mode(),
+        "render_pool": RENDER_POOL.stats(),
+        "jobs": JOB_SCHEDULER.stats()
+    })
+
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters and sizes of the render and TTS caches"""
+    return jsonify({
+        "render": RENDER_CACHE.stats(),
+        "tts": TTS_CACHE.stats() if TTS_CACHE else None
+    })
+
+
+@app.route('/media/stats', methods=['GET'])
+def media_stats():
+    """Tier sizes, budgets and removals from the latest media lifecycle sweep"""
+    return jsonify(MEDIA_LIFECYCLE.stats())
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics, aggregated across all gunicorn workers"""
+    body, content_type = render_metrics()
+    return Response(body, mimetype=content_type)
+
+
+def job_params(data):
+    """
+    Render job kind and parameters from a request body
+
+    Raises:
+        ValueError: with the message to return to the client
+    """
+    kind = data.get('kind', 'dynamic' if 'code' in data else 'problem')
+    if kind == 'dynamic':
+        if not data.get('code'):
+            raise ValueError("No code provided")
+        return kind, {"code": data['code'], "narration": data.get('narration', ''),
+                      "preview": bool(data.get('preview')), "live": bool(data.get('live'))}
+    if kind == 'problem':
+        if not isinstance(data.get('problem_data'), dict):
+            raise ValueError("No problem_data provided")
+        return kind, {"problem_data": data['problem_data']}
+    raise ValueError(f"Unknown job kind: {kind}")
+
+
+def check_render(kind, params):
+    """
+    Cached result for a render, if there is one
+
+    Raises:
+        InvalidCodeError: for dynamic code that fails pre-flight validation
+    """
+    cached = RENDER_PIPELINE.lookup_cached(kind, params)
+    if cached:
+        return cached
+    if kind == 'dynamic':
+        # Reject broken or oversized code before it takes a render slot
+        report = validate_scene_code(params['code'])
+        if not report['ok']:
+            PREFLIGHT_REJECTIONS.inc()
+            raise InvalidCodeError(report)
+    return None
+
+
+def render_request(kind, params):
+    """(kind, params, phase, priority) to queue for a render"""
+    if params.get('preview'):
+        # Draft pass first, queued ahead of other jobs' final renders
+        return kind, params, 'draft', PRIORITY_DRAFT
+    return kind, params, None, PRIORITY_FINAL
+
+
+def coalesce_key(kind, params):
+    """Requests with the same key get the same video and the same events, so they can share a job"""
+    flags = [flag for flag in ('preview', 'live') if params.get(flag)]
+    return '-'.join([RENDER_PIPELINE.cache_key(kind, params), *flags])
+
+
+def submit_render(kind, params, waiting=False, pin=False):
+    """
+    Create a render job, completing it straight away on a cache hit and
+    joining an identical render already in flight in any API process
+
+    Args:
+        waiting: The client follows the job until it finishes (SSE or a
+                 blocking request), so it is registered as a waiter
+        pin: The client polls for the result later (POST /jobs), so the job
+             is never abandoned by streams that share it
+
+    Returns:
+        (job id, waiter marker or None), see JobScheduler.submit_coalesced
+    """
+    cached = check_render(kind, params)
+    if cached:
+        return JOB_SCHEDULER.create_finished(kind, params, 'complete', **cached).id, None
+    request = (coalesce_key(kind, params), *render_request(kind, params))
+    return JOB_SCHEDULER.submit_coalesced([request], track_waiter=waiting, pin=pin)[0]
+
+
+def queue_full_response(error):
+    response = jsonify({"error": "Render queue is full", "retry_after": error.retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+
+def invalid_code_response(error):
+    report = error.report
+    return jsonify({
+        "error": "Generated code failed validation",
+        "details": str(error),
+        "errors": report['errors'],
+        "warnings": report['warnings'],
+        "cost": report['cost']
+    }), 422
+
+
+def sse_events(job_id, start=0, with_ids=False, waiter=None):
+    """
+    Format a job's events as SSE, with keepalive comments while idle
+
+    With the waiter marker of the request that submitted or joined the job,
+    a client that goes away before the job finishes cancels it, unless
+    another client still waits for it or follows it. A disconnect is noticed
+    on the next write (a progress event or keepalive)
+    """
+    events = JOB_SCHEDULER.follow(job_id, start)
+    ended = False
+    try:
+        for item in events:
+            if item is None:
+                yield ": keepalive\n\n"
+                continue
+            index, event = item
+            if with_ids:
+                yield f"id: {index}\n"
+            yield f"data: {json.dumps(event)}\n\n"
+        ended = True
+    finally:
+        # Stop following before counting who else still does
+        events.close()
+        if waiter and not ended:
+            JOB_SCHEDULER.abandon(job_id, waiter)
+        elif waiter:
+            waiter.unlink(missing_ok=True)
+
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """
+    Queue a render job and return its id immediately
+
+    Request body:
+    {"kind": "dynamic", "code": "...", "narration": "...",   // AI-generated code
+     "preview": true}                                         // optional draft pass first
+    {"kind": "problem", "problem_data": {...}}                // same body as /generate
+    """
+    try:
+        try:
+            kind, params = job_params(request.json or {})
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        job_id, _ = submit_render(kind, params, pin=True)
+        return jsonify({
+            "job_id": job_id,
+            "status": JOB_SCHEDULER.get(job_id)['status'],
+            "status_url": f"/jobs/{job_id}",
+            "events_url": f"/jobs/{job_id}/events"
+        }), 202
+
+    except QueueFullError as e:
+        return queue_full_response(e)
+    except InvalidCodeError as e:
+        return invalid_code_response(e)
+    except Exception as e:
+        return jsonify({
+            "error": "Internal server error",
+            "details": str(e)
+        }), 500
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status of a render job"""
+    status = JOB_SCHEDULER.get(job_id)
+    if status is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(status)
+
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """
+    Cancel a queued or running render job
+
+    Kills its render, narration and ffmpeg processes and removes its scratch
+    files. Returns 200 once cancelled, or 202 while the API process owning
+    the job gets round to it
+    """
+    status = JOB_SCHEDULER.cancel(job_id)
+    if status is None:
+        return jsonify({"error": "Job not found"}), 404
+    if status['status'] == 'cancelling':
+        return jsonify(status), 202
+    if status['status'] != 'cancelled':
+        return jsonify({"error": f"Job already {status['status']}", **status}), 409
+    return jsonify(status)
+
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def get_job_events(job_id):
+    """Replay and follow a job's progress over SSE (resumes from Last-Event-ID)"""
+    if JOB_SCHEDULER.get(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    last_event_id = request.headers.get('Last-Event-ID')
+    start = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+    return Response(sse_events(job_id, start, with_ids=True), mimetype='text/event-stream')
 
 
 @app.route('/generate-dynamic', methods=['POST'])
@@ -69,169 +315,138 @@ def generate_dynamic_visualization():
     """
     Generate visualization using AI-generated Manim code with optional TTS
     Streams progress updates via SSE
+
+    With "preview": true, a low-resolution draft is rendered first and sent in
+    a "preview" event before the final video's "complete" event. With
+    "live": true, a "live" event announces an HLS playlist that grows as
+    each animation finishes rendering
     """
     try:
         data = request.json
         code = data.get('code')
         narration = data.get('narration', '')  # Optional TTS text
+        preview = bool(data.get('preview'))  # Optional draft pass
+        live = bool(data.get('live'))  # Optional live segment playlist
 
         if not code:
             return jsonify({"error": "No code provided"}), 400
 
-        # Generate unique ID
-        viz_id = str(uuid.uuid4())
-        output_file = f"scene_{viz_id}"
+        job_id, waiter = submit_render('dynamic', {"code": code, "narration": narration, "preview": preview,
+                                                   "live": live}, waiting=True)
+        # Closing the stream cancels the render, once no other client waits for it
+        return Response(sse_events(job_id, waiter=waiter), mimetype='text/event-stream')
 
-        # Write code to temporary file (in temp dir to avoid Flask auto-reload)
-        code_file = TEMP_DIR / f"{viz_id}.py"
-        with open(code_file, 'w') as f:
-            f.write(code)
+    except QueueFullError as e:
+        return queue_full_response(e)
+    except InvalidCodeError as e:
+        return invalid_code_response(e)
+    except Exception as e:
+        return jsonify({
+            "error": "Internal server error",
+            "details": str(e)
+        }), 500
 
-        def generate():
-            try:
-                # Get absolute paths
-                script_dir = os.path.dirname(os.path.abspath(__file__))
-                generator_script = os.path.join(script_dir, 'dynamic_scene_generator.py')
-
-                # Verify script exists
-                if not os.path.exists(generator_script):
-                    yield f"data: {json.dumps({'type': 'error', 'error': f'Script not found: {generator_script}'})}\n\n"
-                    return
-
-                # Execute the generated code
-                print(f"[DEBUG] Starting subprocess: {PYTHON_PATH} {generator_script}")
-                print(f"[DEBUG] Code file: {code_file}")
-                print(f"[DEBUG] Output file: {output_file}")
-
-                process = subprocess.Popen(
-                    [
-                        PYTHON_PATH,
-                        generator_script,
-                        str(code_file),
-                        output_file
-                    ],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    cwd=script_dir,
-                    bufsize=1,
-                    universal_newlines=True
-                )
-
-                print(f"[DEBUG] Subprocess started with PID: {process.pid}")
-
-                # Stream progress from stderr (where Manim writes progress)
-                # Manim output format: " 50%|#####     | 15/30 [00:02<00:02,  6.53it/s]"
-                while True:
-                    # Check if process is still running
-                    returncode = process.poll()
-                    if returncode is not None:
-                        print(f"[DEBUG] Process exited with code: {returncode}")
-                        break
-
-                    # Read line from stderr (non-blocking check)
-                    try:
-                        line = process.stderr.readline()
-                    except Exception as e:
-                        print(f"[DEBUG] Error reading from subprocess: {e}")
-                        break
-
-                    if line:
-                        # Parse progress
-                        if "%" in line:
-                            try:
-                                # Extract percentage
-                                parts = line.split("%")
-                                percentage = int(parts[0].strip().split()[-1])
-                                yield f"data: {json.dumps({'type': 'progress', 'message': f'Rendering: {percentage}%', 'step': 1, 'totalSteps': 2, 'percentage': percentage})}\n\n"
-                            except:
-                                pass
-                        elif "Error" in line or "Exception" in line:
-                             yield f"data: {json.dumps({'type': 'log', 'message': line.strip()})}\n\n"
-
-                # Get remaining output
-                stdout, stderr = process.communicate()
-
-                print(f"[DEBUG] Process completed with return code: {process.returncode}")
-                print(f"[DEBUG] STDOUT: {stdout[:500] if stdout else 'None'}")
-                print(f"[DEBUG] STDERR: {stderr[:500] if stderr else 'None'}")
-
-                if process.returncode != 0:
-                    # Exit code -9 means killed by OS (usually OOM)
-                    if process.returncode == -9:
-                        error_msg = "Rendering failed: Out of memory. Try a simpler problem or shorter explanation."
-                        print(f"[ERROR] OOM Kill detected (exit code -9)")
-                        yield f"data: {json.dumps({'type': 'error', 'error': error_msg, 'details': 'The visualization was too complex for available memory. Please try a simpler problem.'})}\n\n"
-                    else:
-                        error_msg = f"Subprocess failed with code {process.returncode}"
-                        details = stderr if stderr else stdout
-                        print(f"[ERROR] {error_msg}: {details}")
-                        yield f"data: {json.dumps({'type': 'error', 'error': error_msg, 'details': details})}\n\n"
-                    return
-
-                # Clean up code file
-                if code_file.exists():
-                    code_file.unlink()
-
-                # Find the generated video file
-                video_path = None
-                possible_paths = [
-                    MEDIA_DIR / "videos" / "480p24" / f"{output_file}.mp4",
-                    MEDIA_DIR / "videos" / "720p30" / f"{output_file}.mp4",
-                    MEDIA_DIR / "videos" / "1080p60" / f"{output_file}.mp4",
-                ]
-
-                for path in possible_paths:
-                    if path.exists():
-                        video_path = path
-                        break
-
-                if not video_path:
-                    media_contents = list(MEDIA_DIR.rglob("*.mp4"))
-                    yield f"data: {json.dumps({'type': 'error', 'error': 'Video file not found', 'found_files': [str(p) for p in media_contents[:5]]})}\n\n"
-                    return
-
-                # Generate TTS and combine with video if narration is provided
-                final_video_path = video_path
-                has_audio = False
-                
-                if narration:
-                    yield f"data: {json.dumps({'type': 'progress', 'message': 'Generating audio...', 'step': 2, 'totalSteps': 2})}\n\n"
-                    print(f"[API] Generating TTS for narration...")
-                    audio_path = MEDIA_DIR / f"{viz_id}_audio.wav"
-
-                    # Generate TTS
-                    if generate_tts(narration, audio_path):
-                        # Combine video with audio
-                        combined_path = MEDIA_DIR / f"{viz_id}_with_audio.mp4"
-                        if combine_video_audio(video_path, audio_path, combined_path):
-                            final_video_path = combined_path
-                            has_audio = True
-                            print(f"[API] Successfully added voice narration to video")
-                        else:
-                            print(f"[API] Failed to combine video and audio, using silent video")
-
-                        # Clean up temporary audio file
-                        if audio_path.exists():
-                            audio_path.unlink()
-                    else:
-                        print(f"[API] Failed to generate TTS, using silent video")
-
-                # Copy final video to public directory
-                public_file = MEDIA_DIR / f"{viz_id}.mp4"
-                shutil.copy(final_video_path, public_file)
-
-                # Clean up temporary combined video if it was created
-                if final_video_path != video_path and final_video_path.exists():
-                    final_video_path.unlink()
-
-                yield f"data: {json.dumps({'type': 'complete', 'success': True, 'video_id': viz_id, 'video_url': f'/video/{viz_id}', 'file_path': str(public_file), 'has_audio': has_audio})}\n\n"
-
-            except Exception as e:
-                yield f"data: {json.dumps({'type': 'error', 'error': 'Internal server error', 'details': str(e)})}\n\n"
-
-        return Response(generate(), mimetype='text/event-stream')
 
+def batch_events(job_ids, waiters):
+    """
+    Interleave the events of a batch's jobs as SSE, ending with a summary
+
+    Args:
+        waiters: The waiter marker of each queued or joined job, None for
+                 items finished up front
+    """
+    items = [{"item": index, "job_id": job_id} for index, job_id in enumerate(job_ids)]
+    events = JOB_SCHEDULER.follow_many(job_ids)
+    results = {}
+    ended = False
+    try:
+        yield f"data: {json.dumps({'type': 'batch', 'items': items})}\n\n"
+        for item in events:
+            if item is None:
+                yield ": keepalive\n\n"
+                continue
+            index, event = item
+            if event['type'] in TERMINAL_EVENTS:
+                results[index] = event
+            yield f"data: {json.dumps({**event, 'item': index, 'job_id': job_ids[index]})}\n\n"
+        ended = True
+    finally:
+        # Stop following before counting who else still does; a client that
+        # went away cancels the unfinished items nobody else waits for
+        events.close()
+        for job_id, waiter in zip(job_ids, waiters):
+            if waiter and not ended:
+                JOB_SCHEDULER.abandon(job_id, waiter)
+            elif waiter:
+                waiter.unlink(missing_ok=True)
+
+    summary = []
+    for index, job_id in enumerate(job_ids):
+        result = results.get(index, {"type": "error", "error": "Job was lost"})
+        entry = {"item": index, "job_id": job_id,
+                 "status": 'complete' if result['type'] == 'complete' else 'failed'}
+        if result['type'] == 'complete':
+            entry.update(video_id=result.get('video_id'), video_url=result.get('video_url'))
+        else:
+            entry['error'] = result.get('error')
+        summary.append(entry)
+    succeeded = sum(1 for entry in summary if entry['status'] == 'complete')
+    event = {"type": "batch_complete", "succeeded": succeeded, "failed": len(summary) - succeeded, "items": summary}
+    yield f"data: {json.dumps(event)}\n\n"
+
+
+@app.route('/generate-batch', methods=['POST'])
+def generate_batch():
+    """
+    Render several scenes in one request, in parallel on the render workers
+    Streams every item's events via SSE, tagged with the item's index
+
+    Request body:
+    {"items": [{"code": "...", "narration": "..."},    // dynamic scene
+               {"problem_data": {...}}]}               // problem scene
+
+    An item that is invalid or fails to render gets an "error" event and does
+    not affect the others; the final "batch_complete" event lists every item's
+    status and video id
+    """
+    try:
+        items = (request.json or {}).get('items')
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "No items provided"}), 400
+        if len(items) > JOB_SCHEDULER.max_queue:
+            return jsonify({"error": f"Batch has {len(items)} items; at most "
+                                     f"{JOB_SCHEDULER.max_queue} fit in the render queue"}), 400
+
+        jobs = [None] * len(items)
+        waiters = [None] * len(items)
+        pending = []
+        for index, item in enumerate(items):
+            kind = item.get('kind', 'unknown') if isinstance(item, dict) else 'unknown'
+            try:
+                kind, params = job_params(item if isinstance(item, dict) else {})
+                cached = check_render(kind, params)
+            except ValueError as e:
+                jobs[index] = JOB_SCHEDULER.create_finished(kind, {}, 'error', error=str(e)).id
+                continue
+            except InvalidCodeError as e:
+                jobs[index] = JOB_SCHEDULER.create_finished(kind, params, 'error', error="Generated code failed validation",
+                                                            details=str(e), errors=e.report['errors']).id
+                continue
+            if cached:
+                jobs[index] = JOB_SCHEDULER.create_finished(kind, params, 'complete', **cached).id
+            else:
+                pending.append((index, (coalesce_key(kind, params), *render_request(kind, params))))
+
+        # The renders are admitted together, so a batch never runs half-queued;
+        # items already being rendered for someone else join those jobs
+        submitted = JOB_SCHEDULER.submit_coalesced([render for _, render in pending])
+        for (index, _), (job_id, waiter) in zip(pending, submitted):
+            jobs[index], waiters[index] = job_id, waiter
+
+        return Response(batch_events(jobs, waiters), mimetype='text/event-stream')
+
+    except QueueFullError as e:
+        return queue_full_response(e)
     except Exception as e:
         return jsonify({
             "error": "Internal server error",
@@ -258,74 +473,21 @@ def generate_visualization():
     try:
         problem_data = request.json
 
-        # Generate unique ID for this visualization
-        viz_id = str(uuid.uuid4())
-        output_file = f"scene_{viz_id}"
-
-        # Add output file to problem data
-        problem_data['output_file'] = output_file
-
-        # Convert problem data to JSON string
-        problem_json = json.dumps(problem_data)
-
-        # Run manim scene generator
-        result = subprocess.run(
-            [
-                PYTHON_PATH,
-                'scene_generator.py',
-                problem_json
-            ],
-            capture_output=True,
-            text=True,
-            cwd=os.path.dirname(os.path.abspath(__file__))
-        )
-
-        if result.returncode != 0:
-            return jsonify({
-                "error": "Failed to generate visualization",
-                "details": result.stderr
-            }), 500
-
-        # Find the generated video file
-        video_path = MEDIA_DIR / "videos" / "1080p60" / f"{output_file}.mp4"
-
-        # Alternative paths manim might use
-        alt_paths = [
-            MEDIA_DIR / "videos" / "scene_generator" / "1080p60" / f"{output_file}.mp4",
-            MEDIA_DIR / "videos" / "scene_generator" / "720p30" / f"{output_file}.mp4",
-            MEDIA_DIR / "videos" / "720p30" / f"{output_file}.mp4",
-        ]
-
-        # Check all possible paths
-        found_path = None
-        if video_path.exists():
-            found_path = video_path
-        else:
-            for alt_path in alt_paths:
-                if alt_path.exists():
-                    found_path = alt_path
-                    break
-
-        if not found_path:
-            # List what was actually created
-            media_contents = list(MEDIA_DIR.rglob("*.mp4"))
-            return jsonify({
-                "error": "Video file not found",
-                "expected": str(video_path),
-                "found_files": [str(p) for p in media_contents]
-            }), 500
-
-        # Copy to public directory with consistent naming
-        public_file = MEDIA_DIR / f"{viz_id}.mp4"
-        shutil.copy(found_path, public_file)
-
-        return jsonify({
-            "success": True,
-            "video_id": viz_id,
-            "video_url": f"/video/{viz_id}",
-            "file_path": str(public_file)
-        })
-
+        # Waiting here keeps a shared job from being abandoned by its streaming clients
+        job_id, waiter = submit_render('problem', {"problem_data": problem_data}, waiting=True)
+        try:
+            result = JOB_SCHEDULER.wait(job_id) or {"type": "error", "error": "Job was lost"}
+        finally:
+            if waiter:
+                waiter.unlink(missing_ok=True)
+
+        response = {k: v for k, v in result.items() if k != 'type'}
+        if result['type'] != 'complete':
+            return jsonify(response), 500
+        return jsonify(response)
+
+    except QueueFullError as e:
+        return queue_full_response(e)
     except Exception as e:
         return jsonify({
             "error": "Internal server error",
@@ -335,14 +497,19 @@ def generate_visualization():
 
 @app.route('/video/<video_id>', methods=['GET'])
 def get_video(video_id):
-    """Serve a generated video file"""
+    """Serve a generated video file (supports Range and conditional requests)"""
     try:
         video_path = MEDIA_DIR / f"{video_id}.mp4"
 
         if not video_path.exists():
             return jsonify({"error": "Video not found"}), 404
 
-        return send_file(video_path, mimetype='video/mp4')
+        touch_access(video_path)
+        return send_video(video_path, video_id)
+
+    except FileNotFoundError:
+        # Removed by a lifecycle sweep since the check above
+        return jsonify({"error": "Video not found"}), 404
 
     except Exception as e:
         return jsonify({
@@ -351,15 +518,30 @@ def get_video(video_id):
         }), 500
 
 
+@app.route('/hls/<video_id>/<filename>', methods=['GET'])
+def get_hls_file(video_id, filename):
+    """Serve the HLS playlist and segments of a packaged video"""
+    if filename == HLS_PLAYLIST:
+        # The rendition lives as long as its MP4 (see media_lifecycle)
+        touch_access(MEDIA_DIR / f"{video_id}.mp4")
+    return send_hls_file(MEDIA_DIR / HLS_DIR / video_id, filename)
+
+
+@app.route('/live/<job_id>/<filename>', methods=['GET'])
+def get_live_file(job_id, filename):
+    """Serve the live playlist and segments of a render in progress"""
+    return send_hls_file(MEDIA_DIR / LIVE_DIR / job_id, filename, live=True)
+
+
 @app.route('/cleanup', methods=['POST'])
 def cleanup():
-    """Clean up old video files"""
+    """Run a media lifecycle sweep now instead of waiting for the next one"""
     try:
-        # Remove all .mp4 files in media directory
-        for video_file in MEDIA_DIR.glob("*.mp4"):
-            video_file.unlink()
+        stats = MEDIA_LIFECYCLE.sweep()
+        if stats is None:
+            return jsonify({"success": True, "message": "A sweep is already running"})
 
-        return jsonify({"success": True, "message": "Cleanup completed"})
+        return jsonify({"success": True, "message": "Cleanup completed", "stats": stats})
 
     except Exception as e:
         return jsonify({
@@ -0,0 +1,44 @@
+"""
+Cooperative serving with gunicorn's gevent worker
+Run `gunicorn --worker-class gevent --worker-connections 1000 ...` and the
+worker monkey-patches the standard library before importing api: every
+request, SSE stream, job thread and TTS call becomes a greenlet, and waiting
+on render worker pipes, ffmpeg, sockets, locks and sleeps yields to the
+others. An open /generate-dynamic stream then costs a greenlet instead of a
+thread, while render concurrency stays bounded by JOB_CONCURRENCY. The few
+calls that would block the whole process are made cooperative here
+"""
+import fcntl
+import sys
+import time
+
+# How often a greenlet retries a file lock held by another process
+LOCK_POLL_SECONDS = 0.01
+
+
+def is_cooperative() -> bool:
+    """Whether this process runs on gevent's monkey-patched standard library"""
+    monkey = sys.modules.get('gevent.monkey')
+    return bool(monkey and monkey.is_module_patched('socket'))
+
+
+def serving_mode() -> str:
+    return 'gevent' if is_cooperative() else 'threaded'
+
+
+def lock_exclusive(lock_file):
+    """
+    fcntl.flock(LOCK_EX) that lets other greenlets run while it waits
+
+    A blocking flock call would stall every stream in the process until
+    another process released the lock, so under gevent it is polled instead
+    """
+    if not is_cooperative():
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return
+    while True:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return
+        except BlockingIOError:
+            time.sleep(LOCK_POLL_SECONDS)
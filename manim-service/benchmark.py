@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of the render, narration and mux stages
+Runs every case of a checked-in corpus (benchmark_corpus/) in its own process
+and records per-stage wall time, peak RSS and output bytes as JSON, so two
+runs can be compared and regressions flagged. No API server, LLM or TTS
+service is needed: narration goes through a deterministic stand-in for gTTS
+
+Usage:
+    python benchmark.py                               # all suites, results in benchmark_results/
+    python benchmark.py --suites tts,mux --repeat 5
+    python benchmark.py --compare benchmark_results/baseline.json
+"""
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import types
+import wave
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+SERVICE_DIR = Path(__file__).resolve().parent
+CORPUS_DIR = SERVICE_DIR / 'benchmark_corpus'
+RESULTS_DIR = SERVICE_DIR / 'benchmark_results'
+
+SUITES = ('dynamic', 'problem', 'tts', 'mux')
+# Synthetic mux inputs: (video seconds, narration seconds)
+MUX_CASES = {
+    'narration_longer': (8, 12),
+    'video_longer': (12, 5),
+}
+# The stand-in narrator speaks at 150 words per minute
+STUB_WORDS_PER_SECOND = 2.5
+STUB_SAMPLE_RATE = 22050
+
+# Stages that prepare a case rather than exercise it; not counted in its wall time
+SETUP_STAGES = ('manim_import', 'setup')
+# Regressions smaller than these are noise, whatever the ratio
+MIN_WALL_DELTA_SECONDS = 0.05
+MIN_RSS_DELTA_MB = 10.0
+RESULT_PREFIX = '[BENCH] '
+
+
+def list_cases(suite: str) -> List[str]:
+    if suite == 'dynamic':
+        return sorted(path.stem for path in (CORPUS_DIR / 'scenes').glob('*.py'))
+    if suite == 'problem':
+        return sorted(json.loads((CORPUS_DIR / 'problems.json').read_text()))
+    if suite == 'tts':
+        return sorted(json.loads((CORPUS_DIR / 'narration.json').read_text()))
+    if suite == 'mux':
+        return sorted(MUX_CASES)
+    raise ValueError(f"Unknown suite: {suite}")
+
+
+# --- Cases (run inside the child process, cwd is a fresh temporary directory) ---
+
+def standin_speech(text: str) -> bytes:
+    """A 441 Hz tone as long as `text` takes to say, as WAV bytes (deterministic)"""
+    seconds = max(1.0, len(text.split()) / STUB_WORDS_PER_SECOND)
+    # 441 Hz is exactly 50 samples per period at 22050 Hz
+    period = b''.join(struct.pack('<h', int(8000 * math.sin(2 * math.pi * i / 50))) for i in range(50))
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(STUB_SAMPLE_RATE)
+        f.writeframes(period * int(seconds * STUB_SAMPLE_RATE / 50))
+    return buffer.getvalue()
+
+
+def install_stub_tts(latency: float):
+    """Replace gTTS with a stand-in that waits `latency` seconds and writes standin_speech()"""
+
+    class StubTTS:
+        def __init__(self, text: str, lang: str = 'en', slow: bool = False):
+            self.text = text
+
+        def save(self, path: str):
+            time.sleep(latency)
+            Path(path).write_bytes(standin_speech(self.text))
+
+    module = types.ModuleType('gtts')
+    module.gTTS = StubTTS
+    sys.modules['gtts'] = module
+    os.environ.pop('QWEN_API_KEY', None)
+
+
+def run_render_case(suite: str, name: str, timer) -> Path:
+    start = time.monotonic()
+    from manim import config, tempconfig
+    timer.add('manim_import', time.monotonic() - start)
+
+    video_dir = Path.cwd() / 'out'
+    with tempconfig({}):
+        config.video_dir = str(video_dir)
+        config.progress_bar = 'none'
+        if suite == 'dynamic':
+            from dynamic_scene_generator import execute_generated_code
+            code = (CORPUS_DIR / 'scenes' / f'{name}.py').read_text()
+            execute_generated_code(code, name, timer=timer)
+        else:
+            from scene_generator import generate_scene
+            config.media_dir = './media'
+            problem = json.loads((CORPUS_DIR / 'problems.json').read_text())[name]
+            generate_scene(problem, name, timer=timer)
+    return video_dir / f'{name}.mp4'
+
+
+def run_tts_case(name: str, timer, latency: float) -> Path:
+    with timer.stage('setup'):
+        install_stub_tts(latency)
+        from tts_generator import generate_tts
+        narration = json.loads((CORPUS_DIR / 'narration.json').read_text())[name]
+    output_path = Path.cwd() / 'narration.wav'
+    with timer.stage('tts'):
+        if not generate_tts(narration, output_path):
+            raise RuntimeError("generate_tts failed")
+    return output_path
+
+
+def run_mux_case(name: str, timer) -> Path:
+    with timer.stage('setup'):
+        from tts_generator import combine_video_audio
+        from video_packaging import ffmpeg_path
+        ffmpeg = ffmpeg_path()
+        if not ffmpeg:
+            raise RuntimeError("ffmpeg not available")
+        video_seconds, audio_seconds = MUX_CASES[name]
+        video_path, audio_path = Path.cwd() / 'video.mp4', Path.cwd() / 'audio.wav'
+        # Same shape as a dynamic render: 480p, 24 fps, moov atom last
+        subprocess.run([ffmpeg, '-loglevel', 'error', '-y', '-f', 'lavfi', '-i', 'testsrc=size=854x480:rate=24',
+                        '-t', str(video_seconds), '-c:v', 'libx264', '-pix_fmt', 'yuv420p', str(video_path)],
+                       check=True)
+        subprocess.run([ffmpeg, '-loglevel', 'error', '-y', '-f', 'lavfi',
+                        '-i', f'sine=frequency=440:duration={audio_seconds}', str(audio_path)], check=True)
+
+    output_path = Path.cwd() / 'combined.mp4'
+    with timer.stage('mux'):
+        if not combine_video_audio(video_path, audio_path, output_path, work_dir=Path.cwd() / 'work'):
+            raise RuntimeError("combine_video_audio failed")
+    return output_path
+
+
+def run_case(suite: str, name: str, tts_latency: float):
+    """Child process entry point: run one case and print its [BENCH] result line"""
+    from stage_timer import StageTimer
+
+    timer = StageTimer()
+    result = {"ok": False}
+    start = time.monotonic()
+    try:
+        if suite in ('dynamic', 'problem'):
+            output_path = run_render_case(suite, name, timer)
+        elif suite == 'tts':
+            output_path = run_tts_case(name, timer, tts_latency)
+        else:
+            output_path = run_mux_case(name, timer)
+        result.update(ok=True, output_bytes=output_path.stat().st_size)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    setup = sum(timer.stages.get(stage, 0.0) for stage in SETUP_STAGES)
+    result["wall_seconds"] = round(time.monotonic() - start - setup, 4)
+    result["stages"] = timer.as_dict()
+    print(RESULT_PREFIX + json.dumps(result), flush=True)
+
+
+# --- Driver ---
+
+def run_isolated(suite: str, name: str, tts_latency: float) -> dict:
+    """
+    Run one case in a child process with a fresh working directory and caches
+
+    Returns:
+        The child's result with "peak_rss_mb" (its high-water mark, including
+        the ffmpeg processes it waited for) and, on failure, the end of its output
+    """
+    with tempfile.TemporaryDirectory(prefix='bench-') as work_dir:
+        env = dict(os.environ, TTS_CACHE_DIR=str(Path(work_dir) / 'tts-cache'),
+                   PARTIAL_CACHE_DIR=str(Path(work_dir) / 'partial-cache'),
+                   TEX_CACHE_DIR=str(Path(work_dir) / 'tex-cache'))
+        proc = subprocess.Popen([sys.executable, str(Path(__file__).resolve()), '--run-case', suite, name,
+                                 '--tts-latency', str(tts_latency)],
+                                cwd=work_dir, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        output = proc.stdout.read()
+        proc.stdout.close()
+        # wait4 rather than Popen.wait: it also returns the child's resource usage
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+
+    result = {"ok": False, "error": f"exited with status {proc.returncode}"}
+    for line in output.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            result = json.loads(line[len(RESULT_PREFIX):])
+    result["peak_rss_mb"] = round(usage.ru_maxrss / 1024, 1)  # ru_maxrss is in KiB on Linux
+    if not result["ok"]:
+        result["output_tail"] = output.splitlines()[-20:]
+    return result
+
+
+def summarize(runs: List[dict]) -> dict:
+    """Median wall time and stage times, maximum RSS over repeated runs of one case"""
+    ok_runs = [run for run in runs if run["ok"]]
+    if not ok_runs:
+        return {**runs[-1], "runs": len(runs)}
+    stages = {}
+    for name in sorted({name for run in ok_runs for name in run["stages"]}):
+        stages[name] = round(statistics.median(run["stages"].get(name, 0.0) for run in ok_runs), 4)
+    summary = {
+        "ok": len(ok_runs) == len(runs),
+        "runs": len(runs),
+        "wall_seconds": round(statistics.median(run["wall_seconds"] for run in ok_runs), 4),
+        "stages": stages,
+        "peak_rss_mb": max(run["peak_rss_mb"] for run in runs),
+        "output_bytes": ok_runs[-1]["output_bytes"],
+    }
+    if not summary["ok"]:
+        summary["error"] = next(run["error"] for run in runs if not run["ok"])
+    return summary
+
+
+def environment() -> dict:
+    try:
+        from importlib.metadata import version
+        manim_version = version('manim')
+    except Exception:
+        manim_version = None
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SERVICE_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "manim_version": manim_version,
+    }
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.2) -> List[str]:
+    """
+    Flag cases that got slower or bigger than the baseline by more than `threshold` (a fraction)
+
+    Cases that only exist in one of the runs are ignored; a case that passed
+    in the baseline and fails now is always a regression
+    """
+    regressions = []
+    for key, case in current["cases"].items():
+        before = baseline.get("cases", {}).get(key)
+        if not before or not before["ok"]:
+            continue
+        if not case["ok"]:
+            regressions.append(f"{key}: failed ({case.get('error')})")
+            continue
+        for field, unit, min_delta in (("wall_seconds", "s", MIN_WALL_DELTA_SECONDS),
+                                       ("peak_rss_mb", " MB", MIN_RSS_DELTA_MB)):
+            old, new = before[field], case[field]
+            if new > old * (1 + threshold) and new - old > min_delta:
+                regressions.append(f"{key}: {field} {old:g}{unit} -> {new:g}{unit} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--suites', default=','.join(SUITES), help=f"comma-separated subset of {', '.join(SUITES)}")
+    parser.add_argument('--cases', default='', help="comma-separated case names to run (default: all)")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per case; medians are reported (default 3)")
+    parser.add_argument('--tts-latency', type=float, default=0.0,
+                        help="seconds the stand-in TTS provider waits per request (default 0)")
+    parser.add_argument('--output', type=Path, help="results file (default benchmark_results/<timestamp>.json)")
+    parser.add_argument('--compare', type=Path, help="baseline results file to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="fractional slowdown or RSS growth counted as a regression (default 0.2)")
+    parser.add_argument('--run-case', nargs=2, metavar=('SUITE', 'NAME'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_case:
+        run_case(*args.run_case, tts_latency=args.tts_latency)
+        return 0
+
+    suites = [suite.strip() for suite in args.suites.split(',') if suite.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+    only = {name.strip() for name in args.cases.split(',') if name.strip()}
+
+    results = {"environment": environment(), "repeat": args.repeat, "tts_latency": args.tts_latency, "cases": {}}
+    for suite in suites:
+        for name in list_cases(suite):
+            if only and name not in only:
+                continue
+            key = f"{suite}/{name}"
+            runs = [run_isolated(suite, name, args.tts_latency) for _ in range(max(1, args.repeat))]
+            case = results["cases"][key] = summarize(runs)
+            if case["ok"]:
+                stages = ', '.join(f"{stage} {seconds:.2f}s" for stage, seconds in case["stages"].items())
+                print(f"{key:40s} {case['wall_seconds']:8.2f}s {case['peak_rss_mb']:8.1f} MB "
+                      f"{case['output_bytes']:>10d} B  ({stages})")
+            else:
+                print(f"{key:40s} FAILED: {case.get('error')}")
+
+    output = args.output or RESULTS_DIR / f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        regressions = compare_results(json.loads(args.compare.read_text()), results, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
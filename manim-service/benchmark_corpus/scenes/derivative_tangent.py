@@ -0,0 +1,41 @@
+from manim import *
+import numpy as np
+
+
+class GeneratedScene(Scene):
+    def construct(self):
+        title = Text("The Derivative as a Slope", font_size=34).to_edge(UP)
+        self.play(Write(title))
+
+        axes = Axes(x_range=[-1, 4, 1], y_range=[-1, 9, 2], x_length=6, y_length=4.5,
+                    axis_config={"color": GRAY}).shift(LEFT * 2 + DOWN * 0.5)
+        curve = axes.plot(lambda x: x ** 2, x_range=[-1, 3], color=BLUE_E)
+        label = MathTex(r"f(x) = x^2", font_size=30, color=BLUE_E).next_to(axes, RIGHT).shift(UP * 1.5)
+        self.play(Create(axes), Create(curve), Write(label))
+        self.wait(1)
+
+        # A secant line that becomes the tangent at x = 1
+        h = ValueTracker(1.5)
+        x0 = 1
+
+        def secant():
+            x1 = x0 + h.get_value()
+            slope = (x1 ** 2 - x0 ** 2) / (x1 - x0)
+            line = axes.plot(lambda x: slope * (x - x0) + x0 ** 2, x_range=[-0.5, 3], color=YELLOW_D)
+            return line
+
+        secant_line = always_redraw(secant)
+        point = Dot(axes.c2p(x0, x0 ** 2), color=RED_D)
+        moving = always_redraw(lambda: Dot(axes.c2p(x0 + h.get_value(), (x0 + h.get_value()) ** 2), color=TEAL_C))
+        self.play(FadeIn(point), FadeIn(moving), Create(secant_line))
+        self.wait(1)
+
+        slope_text = MathTex(r"\frac{f(1 + h) - f(1)}{h} = 2 + h", font_size=30).next_to(label, DOWN, buff=0.6)
+        self.play(Write(slope_text))
+        self.play(h.animate.set_value(0.01), run_time=4, rate_func=smooth)
+        self.wait(1)
+
+        result = MathTex(r"f'(1) = 2", font_size=36, color=YELLOW_D).next_to(slope_text, DOWN, buff=0.6)
+        self.play(Write(result))
+        self.play(Circumscribe(result, color=YELLOW_D))
+        self.wait(3)
@@ -0,0 +1,45 @@
+from manim import *
+import numpy as np
+
+
+class GeneratedScene(Scene):
+    def construct(self):
+        title = Text("Solve: 2x - 3 < 5", font_size=36).to_edge(UP)
+        self.play(Write(title))
+
+        # Algebra steps
+        steps = [
+            r"2x - 3 < 5",
+            r"2x < 8",
+            r"x < 4",
+        ]
+        current = MathTex(steps[0], font_size=40).shift(UP * 1.5)
+        self.play(Write(current))
+        self.wait(2)
+        for step in steps[1:]:
+            following = MathTex(step, font_size=40).shift(UP * 1.5)
+            self.play(TransformMatchingTex(current, following))
+            current = following
+            self.wait(2)
+        self.play(current.animate.set_color(YELLOW_D))
+
+        # Number line
+        number_line = NumberLine(x_range=[-2, 8, 1], length=10, include_numbers=True, font_size=24)
+        number_line.shift(DOWN * 1)
+        self.play(Create(number_line))
+        self.wait(1)
+
+        # Open circle at 4 and the shaded ray to the left
+        open_circle = Circle(radius=0.12, color=RED_D).move_to(number_line.n2p(4))
+        ray = Line(number_line.n2p(4) + LEFT * 0.12, number_line.n2p(-2), color=RED_D, stroke_width=8)
+        arrow_tip = Arrow(number_line.n2p(-1.5), number_line.n2p(-2.2), color=RED_D, buff=0)
+        self.play(Create(open_circle))
+        self.play(Create(ray), FadeIn(arrow_tip))
+        self.wait(2)
+
+        # Test a point
+        test = Dot(number_line.n2p(0), color=TEAL_C)
+        check = MathTex(r"2(0) - 3 = -3 < 5 \checkmark", font_size=30, color=TEAL_C).next_to(number_line, DOWN, buff=0.8)
+        self.play(FadeIn(test, scale=2))
+        self.play(Write(check))
+        self.wait(3)
@@ -0,0 +1,51 @@
+from manim import *
+import numpy as np
+
+
+class GeneratedScene(Scene):
+    def construct(self):
+        title = Text("Graphing y = (x - 1)² - 2", font_size=32).to_edge(UP)
+        self.play(Write(title))
+
+        # Axes
+        axes = Axes(
+            x_range=[-3, 5, 1],
+            y_range=[-3, 7, 1],
+            x_length=7,
+            y_length=5,
+            axis_config={"color": GRAY, "include_numbers": True, "font_size": 20},
+        ).shift(DOWN * 0.4)
+        self.play(Create(axes))
+        self.wait(1)
+
+        # The parent parabola first
+        parent = axes.plot(lambda x: x ** 2, x_range=[-2.6, 2.6], color=BLUE_E)
+        parent_label = MathTex(r"y = x^2", font_size=28, color=BLUE_E).next_to(axes.c2p(2.4, 6), LEFT)
+        self.play(Create(parent), Write(parent_label))
+        self.wait(2)
+
+        # Shift right by 1 and down by 2
+        shifted = axes.plot(lambda x: (x - 1) ** 2 - 2, x_range=[-1.6, 3.6], color=TEAL_C)
+        shifted_label = MathTex(r"y = (x - 1)^2 - 2", font_size=28, color=TEAL_C).next_to(axes.c2p(3.5, 4), RIGHT)
+        self.play(ReplacementTransform(parent.copy(), shifted), Write(shifted_label))
+        self.wait(2)
+
+        # Vertex
+        vertex = Dot(axes.c2p(1, -2), color=YELLOW_D, radius=0.1)
+        vertex_label = MathTex(r"(1, -2)", font_size=28, color=YELLOW_D).next_to(vertex, DOWN)
+        self.play(FadeIn(vertex), Write(vertex_label))
+        self.play(Flash(vertex, color=YELLOW_D))
+        self.wait(2)
+
+        # Axis of symmetry
+        symmetry = DashedLine(axes.c2p(1, -3), axes.c2p(1, 7), color=RED_D)
+        self.play(Create(symmetry))
+        self.wait(1)
+
+        # Roots
+        for root in (1 - np.sqrt(2), 1 + np.sqrt(2)):
+            dot = Dot(axes.c2p(root, 0), color=PURPLE_D)
+            self.play(FadeIn(dot, scale=1.5), run_time=0.6)
+        roots = MathTex(r"x = 1 \pm \sqrt{2}", font_size=30, color=PURPLE_D).to_edge(DOWN)
+        self.play(Write(roots))
+        self.wait(3)
@@ -0,0 +1,51 @@
+from manim import *
+import numpy as np
+
+
+class GeneratedScene(Scene):
+    def construct(self):
+        title = Text("The Pythagorean Theorem", font_size=36).to_edge(UP)
+        self.play(Write(title))
+
+        # Right triangle with legs 3 and 4 (scaled to fit)
+        scale = 0.6
+        a, b = 3 * scale, 4 * scale
+        origin = np.array([-1.5, -1.5, 0])
+        triangle = Polygon(origin, origin + [b, 0, 0], origin + [0, a, 0], color=WHITE)
+        self.play(Create(triangle))
+        right_angle = Square(side_length=0.2, color=WHITE).move_to(origin + [0.1, 0.1, 0])
+        self.play(FadeIn(right_angle))
+        self.wait(1)
+
+        # Squares on each side
+        square_a = Square(side_length=a, color=BLUE_E, fill_opacity=0.5).next_to(triangle, LEFT, buff=0)
+        square_a.align_to(triangle, DOWN)
+        square_b = Square(side_length=b, color=RED_D, fill_opacity=0.5).next_to(triangle, DOWN, buff=0)
+        square_b.align_to(triangle, LEFT)
+        hypotenuse = Line(origin + [b, 0, 0], origin + [0, a, 0])
+        square_c = Square(side_length=5 * scale, color=YELLOW_D, fill_opacity=0.5)
+        square_c.rotate(hypotenuse.get_angle()).move_to(hypotenuse.get_center())
+        square_c.shift(np.array([np.sin(hypotenuse.get_angle()), -np.cos(hypotenuse.get_angle()), 0]) * -1.5)
+
+        self.play(DrawBorderThenFill(square_a))
+        label_a = MathTex(r"a^2 = 9", font_size=28).move_to(square_a)
+        self.play(Write(label_a))
+        self.wait(1)
+
+        self.play(DrawBorderThenFill(square_b))
+        label_b = MathTex(r"b^2 = 16", font_size=28).move_to(square_b)
+        self.play(Write(label_b))
+        self.wait(1)
+
+        self.play(DrawBorderThenFill(square_c))
+        label_c = MathTex(r"c^2 = 25", font_size=28).move_to(square_c)
+        self.play(Write(label_c))
+        self.wait(2)
+
+        # The identity
+        identity = MathTex(r"a^2 + b^2 = c^2", font_size=40, color=TEAL_C).to_corner(UR)
+        numbers = MathTex(r"9 + 16 = 25", font_size=36).next_to(identity, DOWN)
+        self.play(Write(identity))
+        self.play(TransformFromCopy(VGroup(label_a, label_b, label_c), numbers))
+        self.play(Indicate(identity))
+        self.wait(3)
@@ -0,0 +1,52 @@
+from manim import *
+import numpy as np
+
+
+class GeneratedScene(Scene):
+    def construct(self):
+        # Title
+        title = Text("Solving x² - 5x + 6 = 0", font_size=36).to_edge(UP)
+        self.play(Write(title))
+        self.wait(1)
+
+        # Step 1: identify coefficients
+        equation = MathTex(r"x^2 - 5x + 6 = 0", font_size=40)
+        self.play(Write(equation))
+        self.wait(2)
+
+        coefficients = MathTex(r"a = 1,\quad b = -5,\quad c = 6", font_size=32, color=TEAL_C)
+        coefficients.next_to(equation, DOWN, buff=0.6)
+        self.play(FadeIn(coefficients))
+        self.wait(2)
+
+        # Step 2: quadratic formula
+        formula = MathTex(r"x = \frac{-b \pm \sqrt{b^2 - 4ac}}{2a}", font_size=40, color=YELLOW_D)
+        self.play(FadeOut(coefficients), equation.animate.shift(UP * 1.5))
+        self.play(Write(formula))
+        self.wait(2)
+
+        # Step 3: substitute
+        substituted = MathTex(r"x = \frac{5 \pm \sqrt{25 - 24}}{2}", font_size=40)
+        self.play(ReplacementTransform(formula, substituted))
+        self.wait(2)
+
+        simplified = MathTex(r"x = \frac{5 \pm 1}{2}", font_size=40)
+        self.play(ReplacementTransform(substituted, simplified))
+        self.wait(2)
+
+        # Step 4: the two roots
+        roots = MathTex(r"x_1 = 3", r"\qquad", r"x_2 = 2", font_size=44)
+        roots[0].set_color(BLUE_E)
+        roots[2].set_color(RED_D)
+        roots.next_to(simplified, DOWN, buff=0.8)
+        self.play(Write(roots))
+        self.play(Indicate(roots[0]), Indicate(roots[2]))
+        self.wait(2)
+
+        # Step 5: check by factoring
+        factored = MathTex(r"(x - 2)(x - 3) = 0", font_size=40, color=PURPLE_D)
+        factored.to_edge(DOWN)
+        self.play(Write(factored))
+        box = SurroundingRectangle(factored, color=YELLOW_D)
+        self.play(Create(box))
+        self.wait(3)
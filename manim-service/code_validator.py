@@ -0,0 +1,257 @@
+"""
+Pre-flight checks for AI-generated scene code
+Parses the code in the API process, without Manim, and rejects anything that
+would fail or blow the render budget before a render worker is involved. The
+import filtering and builtin restrictions are the ones execute_generated_code
+applies when it runs the code
+"""
+import ast
+import os
+from typing import Optional
+
+from render_config import DYNAMIC_RENDER_CONFIG
+
+# Removed from the builtins available to generated code
+DANGEROUS_BUILTINS = ['eval', 'exec', 'compile', '__import__',
+                      'open', 'input', 'breakpoint', 'exit', 'quit',
+                      'help', 'copyright', 'credits', 'license']
+
+PREFLIGHT_MAX_ANIMATIONS = int(os.getenv('PREFLIGHT_MAX_ANIMATIONS', '300'))
+PREFLIGHT_MAX_VIDEO_SECONDS = float(os.getenv('PREFLIGHT_MAX_VIDEO_SECONDS', '300'))
+PREFLIGHT_MAX_LOOP_ITERATIONS = int(os.getenv('PREFLIGHT_MAX_LOOP_ITERATIONS', '1000'))
+
+# Assumed for loops whose bounds are only known at run time, in the cost
+# estimate only: budgets are enforced on what the known bounds guarantee
+UNKNOWN_LOOP_ITERATIONS = 10
+# Manim's default run_time for play() and duration for wait()
+DEFAULT_ANIMATION_SECONDS = 1.0
+
+
+class InvalidCodeError(Exception):
+    """Generated code failed pre-flight validation"""
+
+    def __init__(self, report: dict):
+        super().__init__(format_errors(report['errors']))
+        self.report = report
+
+
+def is_allowed_import(line: str) -> bool:
+    """Import lines dropped before execution, since their names are pre-populated"""
+    stripped = line.strip()
+    return (stripped.startswith('from manim import') or
+            stripped.startswith('import manim') or
+            stripped.startswith('import numpy as np') or
+            stripped == 'import numpy')
+
+
+def strip_allowed_imports(code: str) -> str:
+    """Blank out the allowed import lines, keeping line numbers intact"""
+    return '\n'.join('' if is_allowed_import(line) else line for line in code.split('\n'))
+
+
+def format_errors(errors: list) -> str:
+    return '\n'.join(f"line {error['line']}: {error['message']}" for error in errors)
+
+
+def _number(node: Optional[ast.AST]) -> Optional[float]:
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        return float(node.value)
+    return None
+
+
+def _loop_iterations(node: ast.AST) -> Optional[int]:
+    """Iterations of a for loop over range() with constant bounds or a literal, else None"""
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        return len(node.elts)
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return len(node.value)
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == 'range':
+        bounds = [arg.value for arg in node.args
+                  if isinstance(arg, ast.Constant) and type(arg.value) is int]
+        if len(bounds) == len(node.args) and 1 <= len(bounds) <= 3:
+            try:
+                return len(range(*bounds))
+            except ValueError:  # range() step of 0
+                return None
+    return None
+
+
+def _loop_breaks(loop: ast.AST) -> bool:
+    """Whether a loop body can leave the loop (break, return or raise outside nested loops)"""
+    def visit(nodes):
+        for node in nodes:
+            if isinstance(node, (ast.Break, ast.Return, ast.Raise)):
+                return True
+            if isinstance(node, (ast.For, ast.While, ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                continue
+            if visit(ast.iter_child_nodes(node)):
+                return True
+        return False
+    return visit(loop.body)
+
+
+class _CostEstimator:
+    """
+    Counts play()/wait() calls weighted by the iterations of enclosing loops
+
+    animations and seconds are the estimate, with UNKNOWN_LOOP_ITERATIONS for
+    loops of unknown bound; known_animations and known_seconds count those
+    loops once, so they only grow with bounds that are actually known
+    """
+
+    def __init__(self):
+        self.animations = 0
+        self.waits = 0
+        self.seconds = 0.0
+        self.known_animations = 0
+        self.known_seconds = 0.0
+        self.loops = []
+        self.errors = []
+
+    def visit(self, nodes, multiplier: int, known: int):
+        for node in nodes:
+            if isinstance(node, (ast.For, ast.AsyncFor)):
+                iterations = _loop_iterations(node.iter)
+                self.loops.append({"line": node.lineno, "iterations": iterations})
+                if iterations is not None and iterations > PREFLIGHT_MAX_LOOP_ITERATIONS:
+                    self.errors.append({"line": node.lineno, "message":
+                                        f"Loop runs {iterations} times, more than the "
+                                        f"{PREFLIGHT_MAX_LOOP_ITERATIONS} allowed"})
+                if iterations is None:
+                    self.visit(node.body, multiplier * UNKNOWN_LOOP_ITERATIONS, known)
+                else:
+                    self.visit(node.body, multiplier * iterations, known * iterations)
+                self.visit(node.orelse, multiplier, known)
+            elif isinstance(node, ast.While):
+                constant_test = isinstance(node.test, ast.Constant) and node.test.value
+                if constant_test and not _loop_breaks(node):
+                    self.errors.append({"line": node.lineno, "message": "Infinite loop: 'while' never exits"})
+                self.loops.append({"line": node.lineno, "iterations": None})
+                self.visit(node.body, multiplier * UNKNOWN_LOOP_ITERATIONS, known)
+                self.visit(node.orelse, multiplier, known)
+            else:
+                if isinstance(node, ast.Call):
+                    self._count_call(node, multiplier, known)
+                self.visit(ast.iter_child_nodes(node), multiplier, known)
+
+    def _count_call(self, node: ast.Call, multiplier: int, known: int):
+        func = node.func
+        if not (isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) and func.value.id == 'self'):
+            return
+        keywords = {keyword.arg: keyword.value for keyword in node.keywords}
+        if func.attr == 'play':
+            seconds = _number(keywords.get('run_time'))
+            self.animations += multiplier
+            self.known_animations += known
+        elif func.attr == 'wait':
+            seconds = _number(node.args[0] if node.args else keywords.get('duration'))
+            self.waits += multiplier
+        else:
+            return
+        seconds = DEFAULT_ANIMATION_SECONDS if seconds is None else max(seconds, 0.0)
+        self.seconds += multiplier * seconds
+        self.known_seconds += known * seconds
+
+
+def _bound_names(tree: ast.AST) -> set:
+    """Names the code defines itself, which may shadow builtins"""
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            names.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+    return names
+
+
+def _has_construct(class_node: ast.ClassDef, classes: dict) -> bool:
+    for item in class_node.body:
+        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name == 'construct':
+            return True
+    # Inherited from another class in the same code
+    return any(isinstance(base, ast.Name) and base.id in classes and base.id != class_node.name
+               and _has_construct(classes.pop(base.id), classes)
+               for base in class_node.bases)
+
+
+def validate_scene_code(code: str, render_config: Optional[dict] = None) -> dict:
+    """
+    Check generated scene code without running it
+
+    Args:
+        code: Python code that should define a GeneratedScene class
+        render_config: Settings the code will render with (frame rate for the estimate)
+
+    Returns:
+        {"ok", "errors": [{"line", "message"}], "warnings": [...],
+         "cost": {"animations", "waits", "video_seconds", "frames", "loops"}}
+    """
+    render_config = render_config or DYNAMIC_RENDER_CONFIG
+    errors, warnings = [], []
+    cost = {"animations": 0, "waits": 0, "video_seconds": 0.0, "frames": 0, "loops": []}
+
+    def report():
+        return {"ok": not errors, "errors": errors, "warnings": warnings, "cost": cost}
+
+    try:
+        tree = ast.parse(strip_allowed_imports(code))
+    except SyntaxError as e:
+        errors.append({"line": e.lineno or 0, "message": f"SyntaxError: {e.msg}"})
+        return report()
+
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            errors.append({"line": node.lineno, "message":
+                           "Imports are not allowed; Manim and numpy (as np) are already available"})
+
+    bound = _bound_names(tree)
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load)
+                and node.id in DANGEROUS_BUILTINS and node.id not in bound):
+            errors.append({"line": node.lineno, "message": f"'{node.id}' is not available in generated scenes"})
+
+    classes = {node.name: node for node in tree.body if isinstance(node, ast.ClassDef)}
+    scene = classes.get('GeneratedScene')
+    if scene is None:
+        errors.append({"line": 1, "message": "Generated code must define a 'GeneratedScene' class"})
+    elif not _has_construct(scene, dict(classes)):
+        errors.append({"line": scene.lineno, "message": "GeneratedScene has no construct() method"})
+
+    estimator = _CostEstimator()
+    estimator.visit(tree.body, 1, 1)
+    errors.extend(estimator.errors)
+    cost.update(
+        animations=estimator.animations,
+        waits=estimator.waits,
+        video_seconds=round(estimator.seconds, 2),
+        frames=int(estimator.seconds * render_config['frame_rate']),
+        loops=estimator.loops,
+    )
+    for loop in estimator.loops:
+        if loop['iterations'] is None:
+            warnings.append({"line": loop['line'], "message":
+                             f"Loop bound unknown before rendering; assumed {UNKNOWN_LOOP_ITERATIONS} iterations"})
+
+    # Only what the known loop bounds guarantee can reject a scene; an
+    # estimate that rests on a guessed bound is a warning
+    line = scene.lineno if scene is not None else 1
+    if estimator.known_animations > PREFLIGHT_MAX_ANIMATIONS:
+        errors.append({"line": line, "message": f"Scene plays about {estimator.known_animations} animations, "
+                                                f"more than the {PREFLIGHT_MAX_ANIMATIONS} allowed"})
+    elif estimator.animations > PREFLIGHT_MAX_ANIMATIONS:
+        warnings.append({"line": line, "message": f"Scene may play about {estimator.animations} animations "
+                                                  f"(more than the {PREFLIGHT_MAX_ANIMATIONS} allowed) "
+                                                  f"if its unknown loops run {UNKNOWN_LOOP_ITERATIONS} times"})
+    if estimator.known_seconds > PREFLIGHT_MAX_VIDEO_SECONDS:
+        errors.append({"line": line, "message": f"Scene runs about {estimator.known_seconds:.0f}s, "
+                                                f"longer than the {PREFLIGHT_MAX_VIDEO_SECONDS:.0f}s allowed"})
+    elif estimator.seconds > PREFLIGHT_MAX_VIDEO_SECONDS:
+        warnings.append({"line": line, "message": f"Scene may run about {estimator.seconds:.0f}s "
+                                                  f"(longer than the {PREFLIGHT_MAX_VIDEO_SECONDS:.0f}s allowed) "
+                                                  f"if its unknown loops run {UNKNOWN_LOOP_ITERATIONS} times"})
+
+    errors.sort(key=lambda error: error['line'])
+    warnings.sort(key=lambda warning: warning['line'])
+    return report()
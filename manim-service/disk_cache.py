@@ -0,0 +1,165 @@
+"""
+Disk-backed LRU cache shared by all API worker processes
+Entries are files named after their key; recency is tracked through the mtime
+of a small marker file per entry (never the entry itself, which may be a hard
+link of a published video), and eviction runs under an exclusive file lock so
+gunicorn workers can share a cache. Hits and misses are Prometheus counters,
+so every worker reports the totals of all of them
+"""
+import fcntl
+import json
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+from async_serving import lock_exclusive
+from metrics import CACHE_LOOKUPS, counter_total
+
+
+class DiskLRUCache:
+    """Size-bounded cache of files with an optional JSON metadata sidecar"""
+
+    def __init__(self, root: Path, max_bytes: int, suffix: str, name: Optional[str] = None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        # Label of the cache's lookup counters
+        self.name = name or self.root.name
+        # This process's lookups, reported when prometheus_client is missing
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}{self.suffix}"
+
+    def _meta_path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def _used_path(self, key: str) -> Path:
+        return self.root / f"{key}.used"
+
+    def _mark_used(self, key: str):
+        self._used_path(key).touch()
+
+    @contextmanager
+    def _lock(self):
+        with open(self.root / '.lock', 'w') as lock_file:
+            lock_exclusive(lock_file)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def __contains__(self, key: str) -> bool:
+        """Whether key is cached, without counting a lookup or touching recency"""
+        return self._path(key).exists()
+
+    def get(self, key: str) -> Optional[Path]:
+        """
+        Look up an entry and mark it as recently used
+
+        Returns:
+            Path to the cached file, or None on a miss
+        """
+        path = self._path(key)
+        if not path.exists():
+            self.misses += 1
+            CACHE_LOOKUPS.labels(self.name, 'miss').inc()
+            return None
+        self._mark_used(key)
+        self.hits += 1
+        CACHE_LOOKUPS.labels(self.name, 'hit').inc()
+        return path
+
+    def get_meta(self, key: str) -> dict:
+        try:
+            with open(self._meta_path(key), 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def put(self, key: str, source: Path, meta: Optional[dict] = None) -> Path:
+        """
+        Store a file under key, hard-linking when possible to avoid a copy
+
+        Args:
+            key: Cache key (hex digest)
+            source: File to store; it is left in place
+            meta: Optional JSON-serializable metadata stored alongside
+
+        Returns:
+            Path to the cached file
+        """
+        path = self._path(key)
+        tmp = self.root / f".{key}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.link(source, tmp)
+        except OSError:
+            shutil.copy2(source, tmp)
+
+        if meta is not None:
+            meta_tmp = self.root / f".{key}.{uuid.uuid4().hex}.json.tmp"
+            with open(meta_tmp, 'w') as f:
+                json.dump(meta, f)
+            os.replace(meta_tmp, self._meta_path(key))
+        # Publish the data file last so readers never see it without metadata
+        self._mark_used(key)
+        os.replace(tmp, path)
+
+        self.evict()
+        return path
+
+    def _entries(self):
+        entries = []
+        for path in self.root.glob(f"*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            try:
+                used = self._used_path(path.name[:-len(self.suffix)]).stat().st_mtime
+            except FileNotFoundError:
+                # Stored before recency had marker files
+                used = stat.st_mtime
+            entries.append((used, stat.st_size, path))
+        return entries
+
+    def evict(self) -> int:
+        """Remove least recently used entries until the cache fits its budget"""
+        removed = 0
+        with self._lock():
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                key = path.name[:-len(self.suffix)]
+                path.unlink(missing_ok=True)
+                self._meta_path(key).unlink(missing_ok=True)
+                self._used_path(key).unlink(missing_ok=True)
+                total -= size
+                removed += 1
+        if removed:
+            print(f"[CACHE] Evicted {removed} entries from {self.root}")
+        return removed
+
+    def stats(self) -> dict:
+        """Sizes, and lookups made by all worker processes since the metrics were reset"""
+        entries = self._entries()
+        hits = counter_total(CACHE_LOOKUPS, cache=self.name, result='hit')
+        misses = counter_total(CACHE_LOOKUPS, cache=self.name, result='miss')
+        if hits is None:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": int(hits),
+            "misses": int(misses),
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
@@ -7,22 +7,36 @@ import json
 import sys
 import os
 import traceback
+from contextlib import nullcontext
 
+from code_validator import DANGEROUS_BUILTINS, strip_allowed_imports
+from live_stream import watch_segments
+from partial_cache import SharedPartialCache
+from render_config import DYNAMIC_RENDER_CONFIG
+from stage_timer import StageTimer, render_scene_timed
 
-def execute_generated_code(code: str, output_file: str):
+
+def execute_generated_code(code: str, output_file: str, timer: StageTimer = None,
+                           render_config: dict = None, partial_cache: SharedPartialCache = None,
+                           on_segment=None):
     """
     Safely execute AI-generated Manim code
 
     Args:
         code: Python code containing a GeneratedScene class
         output_file: Output filename for the rendered video
+        timer: Optional StageTimer receiving scene_define/construct/render_frames/concat times
+        render_config: Resolution/fps override (defaults to DYNAMIC_RENDER_CONFIG)
+        partial_cache: Optional cache of animation segments shared across jobs
+        on_segment: Optional callback receiving each finished partial movie file's path
     """
     try:
         # Set up Manim configuration (optimized for low memory environments)
         # Using 480p @ 24fps to reduce memory consumption in Railway
-        config.pixel_height = 480
-        config.pixel_width = 854
-        config.frame_rate = 24
+        render_config = render_config or DYNAMIC_RENDER_CONFIG
+        config.pixel_height = render_config['pixel_height']
+        config.pixel_width = render_config['pixel_width']
+        config.frame_rate = render_config['frame_rate']
         config.output_file = output_file
         config.media_dir = "./media"
 
@@ -41,10 +55,7 @@ def execute_generated_code(code: str, output_file: str):
         }
 
         # Remove dangerous built-in functions
-        dangerous_builtins = ['eval', 'exec', 'compile', '__import__',
-                              'open', 'input', 'breakpoint', 'exit', 'quit',
-                              'help', 'copyright', 'credits', 'license']
-        for name in dangerous_builtins:
+        for name in DANGEROUS_BUILTINS:
             safe_builtins.pop(name, None)
 
         # Create safe namespace with Manim objects pre-populated
@@ -59,32 +70,27 @@ def execute_generated_code(code: str, output_file: str):
         }
 
         # Remove import statements from code since objects are already available
-        # This prevents __import__ errors
-        code_lines = code.split('\n')
-        filtered_lines = []
-        for line in code_lines:
-            # Skip import lines
-            if line.strip().startswith('from manim import') or \
-               line.strip().startswith('import manim') or \
-               line.strip().startswith('import numpy as np') or \
-               line.strip() == 'import numpy':
-                continue
-            filtered_lines.append(line)
-
-        cleaned_code = '\n'.join(filtered_lines)
-
-        # Execute the cleaned code in the safe namespace
-        exec(cleaned_code, safe_globals)
-
-        # Get the GeneratedScene class
-        if 'GeneratedScene' not in safe_globals:
-            raise ValueError("Generated code must define a 'GeneratedScene' class")
-
-        GeneratedScene = safe_globals['GeneratedScene']
-
-        # Create and render the scene
-        scene = GeneratedScene()
-        scene.render()
+        # This prevents __import__ errors (blank lines keep traceback line numbers)
+        cleaned_code = strip_allowed_imports(code)
+
+        # Execute the cleaned code in the safe namespace and create the scene;
+        # timed apart from construct(), which render_scene_timed measures
+        with timer.stage('scene_define') if timer else nullcontext():
+            exec(cleaned_code, safe_globals)
+
+            # Get the GeneratedScene class
+            if 'GeneratedScene' not in safe_globals:
+                raise ValueError("Generated code must define a 'GeneratedScene' class")
+
+            GeneratedScene = safe_globals['GeneratedScene']
+            scene = GeneratedScene()
+
+        # Render the scene
+        if partial_cache:
+            partial_cache.attach(scene, render_config)
+        if on_segment:
+            watch_segments(scene, on_segment)
+        render_scene_timed(scene, timer)
 
         print(f"✅ Successfully rendered scene to {output_file}")
         return True
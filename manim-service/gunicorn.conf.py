@@ -0,0 +1,26 @@
+"""
+gunicorn hooks for the Manim service (settings still come from the command line)
+Sets up prometheus_client's multiprocess mode so /metrics aggregates every worker
+"""
+import os
+import shutil
+import tempfile
+
+# Must be set before any worker imports prometheus_client
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'qed-metrics'))
+
+
+def on_starting(server):
+    # Samples left over from a previous run would be added to this one
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # Drop the dead worker's gauges; its counters and histograms are kept
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
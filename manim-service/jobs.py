@@ -0,0 +1,792 @@
+"""
+Asynchronous render jobs
+Jobs run on a bounded scheduler inside the API process. Their status and events
+are persisted under temp/jobs so any gunicorn worker can report on a job and
+replay or follow its event stream, and join an identical job that is already
+in flight instead of rendering it again
+"""
+import fcntl
+import json
+import math
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from async_serving import lock_exclusive
+from metrics import JOBS_CANCELLED, JOBS_COALESCED, JOBS_QUEUED, JOBS_RUNNING
+from stage_timer import StageTimer, log_timings
+
+JOB_CONCURRENCY = int(os.getenv('JOB_CONCURRENCY', '0'))  # 0 = one per render pool worker
+JOB_QUEUE_SIZE = int(os.getenv('JOB_QUEUE_SIZE', '8'))
+JOB_RETENTION_SECONDS = float(os.getenv('JOB_RETENTION_SECONDS', '3600'))
+
+# Event types that end a job's event stream
+TERMINAL_EVENTS = ('complete', 'error')
+
+# Queue priorities: lower runs first, so quick draft renders overtake final renders
+PRIORITY_DRAFT = 0
+PRIORITY_FINAL = 1
+
+# How often idle followers emit a keepalive, and poll jobs owned by other processes
+KEEPALIVE_SECONDS = 15.0
+POLL_SECONDS = 0.25
+# How long a follower keeps reading a finished job's log for its terminal event
+SETTLE_SECONDS = 1.0
+
+# Files named after a coalescing key, holding the id of the job rendering it
+INFLIGHT_SUFFIX = '.inflight'
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler to stop work on a job that has been cancelled"""
+
+
+class QueueFullError(Exception):
+    """Raised when the scheduler cannot accept another job"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Render queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobStore:
+    """
+    On-disk job status (<id>.json) and event log (<id>.events, JSON lines),
+    the clients waiting for each job (<id>.<pid>.<n>.waiter) and the job in
+    flight for each render key (<key>.inflight)
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def status_path(self, job_id: str) -> Path:
+        return self.root / f"{job_id}.json"
+
+    def events_path(self, job_id: str) -> Path:
+        return self.root / f"{job_id}.events"
+
+    def write_status(self, status: dict):
+        path = self.status_path(status['job_id'])
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp, 'w') as f:
+            json.dump(status, f)
+        os.replace(tmp, path)
+
+    def read_status(self, job_id: str) -> Optional[dict]:
+        try:
+            with open(self.status_path(job_id), 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def append_event(self, job_id: str, event: dict):
+        with open(self.events_path(job_id), 'a') as f:
+            f.write(json.dumps(event) + "\n")
+
+    def read_events(self, job_id: str, offset: int) -> Tuple[list, int]:
+        """Read complete event lines after byte offset, returning (events, new_offset)"""
+        try:
+            with open(self.events_path(job_id), 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return [], offset
+
+        # Leave a partially written last line for the next read
+        complete = data[:data.rfind(b"\n") + 1]
+        events = [json.loads(line) for line in complete.splitlines() if line.strip()]
+        return events, offset + len(complete)
+
+    def is_active(self, job_id: str) -> bool:
+        """Whether a job is queued or running in a live API process"""
+        status = self.read_status(job_id)
+        return bool(status) and not status.get('finished') and _pid_alive(status.get('owner_pid'))
+
+    def cancel_path(self, job_id: str) -> Path:
+        return self.root / f"{job_id}.cancel"
+
+    def request_cancel(self, job_id: str, reason: str = 'request'):
+        """Ask the process owning a job to cancel it (see JobScheduler._watch_cancellations)"""
+        self.cancel_path(job_id).write_text(reason)
+
+    def cancel_requested(self, job_id: str) -> Optional[str]:
+        """The reason another process asked to cancel a job, if it did"""
+        try:
+            return self.cancel_path(job_id).read_text() or 'request'
+        except FileNotFoundError:
+            return None
+
+    @contextmanager
+    def inflight_lock(self):
+        """Serialize looking up and claiming in-flight jobs across API processes"""
+        with open(self.root / '.inflight.lock', 'w') as lock_file:
+            lock_exclusive(lock_file)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def inflight_path(self, key: str) -> Path:
+        return self.root / f"{key}{INFLIGHT_SUFFIX}"
+
+    def find_inflight(self, key: str) -> Optional[str]:
+        """The queued or running job rendering key, if any (call under inflight_lock)"""
+        try:
+            job_id = self.inflight_path(key).read_text()
+        except FileNotFoundError:
+            return None
+        return job_id if job_id and self.is_active(job_id) else None
+
+    def set_inflight(self, key: str, job_id: str):
+        self.inflight_path(key).write_text(job_id)
+
+    def clear_inflight(self, key: str, job_id: str):
+        """
+        Forget the in-flight job for key, unless another job has claimed it
+        since (call under inflight_lock)
+        """
+        path = self.inflight_path(key)
+        try:
+            if path.read_text() == job_id:
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def add_waiter(self, job_id: str) -> Path:
+        """Record a client waiting for a job; the job is only abandoned once none are left"""
+        path = self.root / f"{job_id}.{os.getpid()}.{uuid.uuid4().hex[:8]}.waiter"
+        path.touch()
+        return path
+
+    def waiters(self, job_id: str) -> int:
+        """Clients still waiting for a job, in API processes that are alive"""
+        count = 0
+        for path in self.root.glob(f"{job_id}.*.waiter"):
+            pid = path.name[len(job_id) + 1:].split('.')[0]
+            if pid.isdigit() and _pid_alive(int(pid)):
+                count += 1
+        return count
+
+    def pin_path(self, job_id: str) -> Path:
+        return self.root / f"{job_id}.pinned"
+
+    def pin(self, job_id: str):
+        """Keep a job from ever being abandoned: a client polls for its result (POST /jobs)"""
+        self.pin_path(job_id).touch()
+
+    def pinned(self, job_id: str) -> bool:
+        return self.pin_path(job_id).exists()
+
+    def remove_waiters(self, job_id: str):
+        """Drop the waiter and pin markers of a finished job, which nobody can abandon any more"""
+        for path in self.root.glob(f"{job_id}.*.waiter"):
+            path.unlink(missing_ok=True)
+        self.pin_path(job_id).unlink(missing_ok=True)
+
+
+class Job:
+    """A render job and its ordered event log"""
+
+    def __init__(self, store: JobStore, kind: str, params: dict,
+                 phase: Optional[str] = None, priority: int = PRIORITY_FINAL):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.params = params
+        self.status = 'queued'
+        # Multi-pass jobs (e.g. draft then final) run one phase per queue slot
+        self.phase = phase
+        self.priority = priority
+        # State the handler carries from one phase to the next
+        self.context = {}
+        self._next_phase = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.events = []
+        self.cancelled = False
+        # Identical requests join this job while it is in flight (see JobScheduler.submit_coalesced)
+        self.key = None
+        # Streams currently following this job's events in this process
+        self.followers = 0
+        self._cancel_callbacks = []
+        # Stages timed while the job runs; reported with the "complete" event
+        self.timer = StageTimer()
+        self._started_monotonic = None
+        self._store = store
+        self._cond = threading.Condition()
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "phase": self.phase,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "result": self.result,
+            "events": len(self.events),
+            "owner_pid": os.getpid(),
+            "key": self.key,
+        }
+
+    def save(self):
+        self._store.write_status(self.to_dict())
+
+    def emit(self, event_type: str, **data):
+        """Record an event and wake everyone following this job"""
+        event = {"type": event_type, **data}
+        with self._cond:
+            if self.events and self.events[-1]['type'] in TERMINAL_EVENTS:
+                # A cancelled job's handler may still be winding down
+                return
+            self.events.append(event)
+            self._store.append_event(self.id, event)
+            self._cond.notify_all()
+
+    def start(self):
+        self.status = 'running'
+        if self.started is None:
+            self.started = time.time()
+            self._started_monotonic = time.monotonic()
+        self.save()
+
+    def defer(self, phase: str, priority: int = PRIORITY_FINAL):
+        """Called by a handler to queue the job's next phase instead of finishing it"""
+        self._next_phase = (phase, priority)
+
+    def finish(self, event_type: str, **data) -> bool:
+        """
+        Finish the job with its terminal event
+
+        Args:
+            event_type: "complete" or "error"
+            **data: Event payload, also kept as the job's result
+
+        Returns:
+            False if the job had already finished (e.g. it was cancelled)
+        """
+        with self._cond:
+            if self.finished is not None:
+                return False
+            self.finished = time.time()
+        if data.get('cancelled'):
+            self.status = 'cancelled'
+            self.cancelled = True
+        else:
+            self.status = 'complete' if event_type == 'complete' else 'failed'
+        if self._started_monotonic is not None:
+            self.timer.stages['total'] = time.monotonic() - self._started_monotonic
+            timings = self.timer.as_dict()
+            log_timings(self.id, self.kind, 'cancelled' if self.cancelled else event_type, timings)
+            if event_type == 'complete':
+                data = {**data, "timings": timings}
+        self.result = {"type": event_type, **data}
+        if self.key:
+            # Requests from now on start a job of their own (or hit the render cache).
+            # Done before saving: followers in other processes stop shortly after
+            # they see the finished status, so the terminal event must follow it
+            with self._store.inflight_lock():
+                self._store.clear_inflight(self.key, self.id)
+            self._store.remove_waiters(self.id)
+        self.save()
+        self.emit(event_type, **data)
+        return True
+
+    def cancel(self, reason: str) -> bool:
+        """
+        Finish a queued or running job as cancelled and stop its work
+
+        Callbacks registered with on_cancel (killing the render, narration
+        and ffmpeg processes) run right away; the handler notices at its
+        next raise_if_cancelled() and cleans up its scratch files
+
+        Args:
+            reason: "disconnect" or "request", for metrics
+
+        Returns:
+            False if the job had already finished
+        """
+        stage = self.status
+        if not self.finish('error', error='Job was cancelled', cancelled=True):
+            return False
+        JOBS_CANCELLED.labels(reason, stage).inc()
+        print(f"[JOBS] Job {self.id} cancelled ({reason}) while {stage}")
+        with self._cond:
+            callbacks, self._cancel_callbacks = self._cancel_callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"[JOBS] Cancelling part of job {self.id} failed: {e}")
+        return True
+
+    def on_cancel(self, callback: Callable[[], None]):
+        """Call callback when the job is cancelled (straight away if it already is)"""
+        with self._cond:
+            if not self.cancelled:
+                self._cancel_callbacks.append(callback)
+                return
+        callback()
+
+    def raise_if_cancelled(self):
+        """
+        Raises:
+            JobCancelled: if the job has been cancelled
+        """
+        if self.cancelled:
+            raise JobCancelled(self.id)
+
+    def wait_for(self, future: Future):
+        """
+        future.result(), giving up as soon as the job is cancelled
+
+        Raises:
+            JobCancelled: if the job is cancelled first
+        """
+        while True:
+            try:
+                return future.result(timeout=POLL_SECONDS)
+            except FutureTimeoutError:
+                self.raise_if_cancelled()
+
+    @property
+    def done(self) -> bool:
+        return self.finished is not None
+
+    def follow(self, start: int = 0,
+               stop: Optional[threading.Event] = None) -> Iterator[Optional[Tuple[int, dict]]]:
+        """
+        Yield (index, event) from start onwards, or None as a keepalive
+
+        Args:
+            stop: Ends the stream early once set (see wake_followers)
+        """
+        index = start
+        with self._cond:
+            self.followers += 1
+        try:
+            while not (stop and stop.is_set()):
+                with self._cond:
+                    if index >= len(self.events):
+                        self._cond.wait(timeout=KEEPALIVE_SECONDS)
+                    pending = self.events[index:]
+                if stop and stop.is_set():
+                    return
+                if not pending:
+                    yield None
+                    continue
+                for event in pending:
+                    yield index, event
+                    index += 1
+                    if event['type'] in TERMINAL_EVENTS:
+                        return
+        finally:
+            with self._cond:
+                self.followers -= 1
+
+    def wake_followers(self):
+        """Have waiting followers check their stop event now"""
+        with self._cond:
+            self._cond.notify_all()
+
+
+class JobScheduler:
+    """Runs jobs on a fixed number of threads behind a bounded queue"""
+
+    def __init__(self, handler: Callable[[Job], None], store: JobStore,
+                 concurrency: int, max_queue: int = JOB_QUEUE_SIZE):
+        self.handler = handler
+        self.store = store
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max_queue
+        # (priority, sequence, job); admission is bounded by max_queue in submit()
+        self._queue = queue.PriorityQueue()
+        # Ids of the queued jobs that are still live: jobs cancelled while queued
+        # stay in self._queue until a runner pops them, but take no slot
+        self._queued = set()
+        self._sequence = 0
+        self._jobs = {}
+        self._lock = threading.RLock()
+        self._running = 0
+        self._avg_duration = 30.0
+
+        for i in range(self.concurrency):
+            threading.Thread(target=self._run, name=f"job-runner-{i}", daemon=True).start()
+        threading.Thread(target=self._watch_cancellations, name="job-cancel-watcher", daemon=True).start()
+
+    def _remember(self, job: Job):
+        with self._lock:
+            # Forget finished jobs past retention; their files stay readable
+            cutoff = time.time() - JOB_RETENTION_SECONDS
+            for job_id in [j.id for j in self._jobs.values() if j.done and j.finished < cutoff]:
+                del self._jobs[job_id]
+            self._jobs[job.id] = job
+
+    def retry_after(self) -> int:
+        """Rough seconds until a queue slot frees up (one running job finishing)"""
+        return max(1, math.ceil(self._avg_duration / self.concurrency))
+
+    def _enqueue(self, job: Job):
+        """Queue a job behind everything of higher or equal priority (call with self._lock held)"""
+        self._sequence += 1
+        self._queued.add(job.id)
+        job.on_cancel(lambda: self._dequeue(job))
+        self._queue.put((job.priority, self._sequence, job))
+        JOBS_QUEUED.set(len(self._queued))
+
+    def _dequeue(self, job: Job):
+        """A job left the queue: picked up by a runner, or cancelled while waiting"""
+        with self._lock:
+            self._queued.discard(job.id)
+            JOBS_QUEUED.set(len(self._queued))
+
+    def submit(self, kind: str, params: dict, phase: Optional[str] = None,
+               priority: int = PRIORITY_FINAL) -> Job:
+        """
+        Queue a job for rendering
+
+        Args:
+            phase: First phase of a multi-pass job (see Job.defer)
+            priority: PRIORITY_DRAFT jobs run ahead of PRIORITY_FINAL ones
+
+        Raises:
+            QueueFullError: when the queue is at capacity
+        """
+        return self.submit_many([(kind, params, phase, priority)])[0]
+
+    def submit_many(self, requests: List[Tuple[str, dict, Optional[str], int]],
+                    keys: Optional[List[Optional[str]]] = None) -> List[Job]:
+        """
+        Queue several jobs at once, all or none of them
+
+        Args:
+            requests: (kind, params, phase, priority) per job, as for submit()
+            keys: Render key per job, under which it is registered as in flight
+                  (call with store.inflight_lock held, see submit_coalesced)
+
+        Raises:
+            QueueFullError: when the queue cannot take all of them
+        """
+        with self._lock:
+            if len(self._queued) + len(requests) > self.max_queue:
+                raise QueueFullError(self.retry_after())
+            jobs = []
+            for (kind, params, phase, priority), key in zip(requests, keys or [None] * len(requests)):
+                job = Job(self.store, kind, params, phase=phase, priority=priority)
+                job.key = key
+                job.save()
+                if key:
+                    self.store.set_inflight(key, job.id)
+                self._remember(job)
+                job.emit('queued', job_id=job.id, position=len(self._queued) + 1)
+                self._enqueue(job)
+                jobs.append(job)
+        return jobs
+
+    def submit_coalesced(self, requests: List[Tuple[str, str, dict, Optional[str], int]],
+                         track_waiter: bool = True, pin: bool = False) -> List[Tuple[str, Optional[Path]]]:
+        """
+        Queue jobs like submit_many, except that a request whose key matches a
+        job queued or running in any API process joins that job: it follows
+        the same events (replayed from the start) and gets the same video
+
+        Args:
+            requests: (key, kind, params, phase, priority) per job; the key
+                      covers everything that affects the video and the events
+            track_waiter: Register the client as waiting for the jobs, for
+                          clients that abandon them when they go away (streams)
+            pin: Never abandon the jobs, for clients that come back for the
+                 result later (POST /jobs); they can still be cancelled
+
+        Returns:
+            (job id, waiter) per request, waiter being the marker that keeps
+            the job from being abandoned (see abandon), or None untracked
+
+        Raises:
+            QueueFullError: when the queue cannot take all of the new jobs
+        """
+        with self.store.inflight_lock():
+            job_ids = [self.store.find_inflight(key) for key, *_ in requests]
+            new = {}
+            for (key, *request), job_id in zip(requests, job_ids):
+                if job_id is None:
+                    # The same render twice in one batch is queued once
+                    new.setdefault(key, tuple(request))
+            created = {job.key: job.id for job in self.submit_many(list(new.values()), keys=list(new))}
+
+            first = set()
+            for index, (key, kind, *_) in enumerate(requests):
+                if job_ids[index] is None and key not in first:
+                    first.add(key)
+                    job_ids[index] = created[key]
+                    continue
+                job_ids[index] = job_ids[index] or created[key]
+                JOBS_COALESCED.labels(kind).inc()
+                print(f"[JOBS] Joined in-flight job {job_ids[index]} ({kind})")
+            if pin:
+                for job_id in set(job_ids):
+                    self.store.pin(job_id)
+            if not track_waiter:
+                return [(job_id, None) for job_id in job_ids]
+            # Registered under the lock, so the job can't be abandoned before its new waiter follows it
+            return [(job_id, self.store.add_waiter(job_id)) for job_id in job_ids]
+
+    def create_finished(self, kind: str, params: dict, event_type: str, **data) -> Job:
+        """Record a job that is already done (e.g. served from cache) without queueing it"""
+        job = Job(self.store, kind, params)
+        self._remember(job)
+        job.finish(event_type, **data)
+        return job
+
+    def _run(self):
+        while True:
+            _, _, job = self._queue.get()
+            self._dequeue(job)
+            if job.done:
+                # Cancelled while it was queued
+                continue
+            with self._lock:
+                self._running += 1
+                JOBS_RUNNING.set(self._running)
+            started = time.time()
+            job.start()
+            try:
+                self.handler(job)
+                if not job.done and job._next_phase:
+                    # Run the next phase once a slot frees up; it was already admitted
+                    job.phase, job.priority = job._next_phase
+                    job._next_phase = None
+                    job.status = 'queued'
+                    job.save()
+                    with self._lock:
+                        self._enqueue(job)
+                elif not job.done:
+                    job.finish('error', error='Job ended without a result')
+            except JobCancelled:
+                pass
+            except Exception as e:
+                print(f"[JOBS] Job {job.id} crashed: {e}")
+                if not job.done:
+                    job.finish('error', error='Internal server error', details=str(e))
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    JOBS_RUNNING.set(self._running)
+                    self._avg_duration = 0.8 * self._avg_duration + 0.2 * (time.time() - started)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Status of a job owned by any API process"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job:
+            return job.to_dict()
+        return self.store.read_status(job_id)
+
+    def cancel(self, job_id: str, reason: str = 'request') -> Optional[dict]:
+        """
+        Cancel a job owned by any API process
+
+        Jobs of other processes are cancelled by their owner within
+        POLL_SECONDS; their status reads "cancelling" until then
+
+        Returns:
+            The job's status afterwards, or None for an unknown job
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job:
+            job.cancel(reason)
+            return job.to_dict()
+        status = self.store.read_status(job_id)
+        if status is None or status.get('finished'):
+            return status
+        with self.store.inflight_lock():
+            self._request_cancel(status, reason)
+        return {**status, "status": 'cancelling'}
+
+    def _request_cancel(self, status: dict, reason: str):
+        """
+        Ask another process to cancel its job, which nobody may join from now
+        on (call under store.inflight_lock)
+        """
+        if status.get('key'):
+            self.store.clear_inflight(status['key'], status['job_id'])
+        self.store.request_cancel(status['job_id'], reason)
+
+    def abandon(self, job_id: str, waiter: Optional[Path] = None):
+        """
+        Cancel a job whose client went away, unless another client in any
+        API process still waits for it or polls for it (a pinned job), or
+        another stream in this process still follows it (so the departing
+        client stops following first)
+
+        Args:
+            waiter: The departing client's marker from submit_coalesced
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        with self.store.inflight_lock():
+            if waiter:
+                waiter.unlink(missing_ok=True)
+            if self.store.waiters(job_id) or self.store.pinned(job_id):
+                return
+            if not job:
+                if self.store.is_active(job_id):
+                    self._request_cancel(self.store.read_status(job_id), 'disconnect')
+                return
+            if job.done or job.followers:
+                return
+            if job.key:
+                # Nobody can join the job between here and its cancellation
+                self.store.clear_inflight(job.key, job.id)
+        job.cancel('disconnect')
+
+    def _watch_cancellations(self):
+        """Cancel this process's jobs when another process asked for it (JobStore.request_cancel)"""
+        while True:
+            time.sleep(POLL_SECONDS)
+            with self._lock:
+                active = [job for job in self._jobs.values() if not job.done]
+            for job in active:
+                reason = self.store.cancel_requested(job.id)
+                if reason:
+                    job.cancel(reason)
+                    self.store.cancel_path(job.id).unlink(missing_ok=True)
+
+    def follow(self, job_id: str, start: int = 0,
+               stop: Optional[threading.Event] = None) -> Iterator[Optional[Tuple[int, dict]]]:
+        """
+        Replay and follow a job's events
+
+        Args:
+            stop: Ends the stream early once set
+
+        Yields:
+            (index, event) tuples, or None when nothing happened for a while
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job:
+            yield from job.follow(start, stop)
+        else:
+            yield from self._follow_file(job_id, start, stop)
+
+    def _follow_file(self, job_id: str, start: int, stop: Optional[threading.Event] = None):
+        """Follow a job owned by another process by tailing its event log"""
+        offset = 0
+        index = 0
+        idle_since = time.monotonic()
+        settle_deadline = None
+        while not (stop and stop.is_set()):
+            events, offset = self.store.read_events(job_id, offset)
+            for event in events:
+                if index >= start:
+                    yield index, event
+                index += 1
+                if event['type'] in TERMINAL_EVENTS:
+                    return
+            if events:
+                idle_since = time.monotonic()
+                continue
+            status = self.store.read_status(job_id)
+            if status is None or status.get('finished'):
+                # Unknown job, or finished: the terminal event is appended just
+                # after the status is saved, so keep reading for a moment
+                if settle_deadline is None:
+                    settle_deadline = time.monotonic() + SETTLE_SECONDS
+                elif time.monotonic() >= settle_deadline:
+                    return
+                time.sleep(POLL_SECONDS / 5)
+                continue
+            if not _pid_alive(status.get('owner_pid')):
+                yield index, {"type": "error", "error": "Job was interrupted"}
+                return
+
+            if time.monotonic() - idle_since >= KEEPALIVE_SECONDS:
+                idle_since = time.monotonic()
+                yield None
+            time.sleep(POLL_SECONDS)
+
+    def wait(self, job_id: str) -> Optional[dict]:
+        """Block until the job finishes and return its terminal event"""
+        for item in self.follow(job_id):
+            if item and item[1]['type'] in TERMINAL_EVENTS:
+                return item[1]
+        return None
+
+    def follow_many(self, job_ids: List[str]) -> Iterator[Optional[Tuple[int, dict]]]:
+        """
+        Follow several jobs at once, interleaving their events as they happen
+
+        Yields:
+            (position in job_ids, event) tuples, or None when nothing happened
+            for a while; ends once every job's event stream has ended.
+            Closing the generator stops following the jobs before it returns
+        """
+        merged = queue.Queue()
+        stop = threading.Event()
+
+        def pump(position: int, job_id: str):
+            try:
+                for item in self.follow(job_id, stop=stop):
+                    if item:
+                        merged.put((position, item[1]))
+            finally:
+                merged.put((position, None))
+
+        pumps = [threading.Thread(target=pump, args=(position, job_id), name=f"follow-{job_id[:8]}",
+                                  daemon=True)
+                 for position, job_id in enumerate(job_ids)]
+        for thread in pumps:
+            thread.start()
+
+        try:
+            remaining = len(job_ids)
+            while remaining:
+                try:
+                    position, event = merged.get(timeout=KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield None
+                    continue
+                if event is None:
+                    remaining -= 1
+                    continue
+                yield position, event
+        finally:
+            stop.set()
+            with self._lock:
+                jobs = [self._jobs.get(job_id) for job_id in job_ids]
+            for job in jobs:
+                if job:
+                    job.wake_followers()
+            for thread in pumps:
+                thread.join(timeout=POLL_SECONDS * 4)
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._queued),
+            "running": self._running,
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+        }
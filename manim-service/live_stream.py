@@ -0,0 +1,96 @@
+"""
+Live HLS playlists of renders in progress
+Manim closes one partial movie file per animation; each is remuxed into an
+MPEG-TS segment and appended to an EVENT playlist, so a client can start
+watching after the first animation instead of the last. Segments are silent:
+narration is only muxed into the final video
+"""
+import math
+import os
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from video_packaging import probe_media, run_ffmpeg
+
+# Under the media directory: media/live/<job_id>/index.m3u8
+LIVE_DIR = 'live'
+LIVE_PLAYLIST = 'index.m3u8'
+
+
+def watch_segments(scene, on_segment: Callable[[str], None]):
+    """Call on_segment(path) with each partial movie file as soon as Manim has closed it"""
+    file_writer = scene.renderer.file_writer
+    end_animation = file_writer.end_animation
+
+    def end_animation_and_announce(*args, **kwargs):
+        end_animation(*args, **kwargs)
+        # Written just now, or reused from Manim's (or the shared partial) cache
+        path = file_writer.partial_movie_files[-1] if file_writer.partial_movie_files else None
+        if path and os.path.exists(path):
+            on_segment(str(path))
+
+    file_writer.end_animation = end_animation_and_announce
+
+
+class LivePlaylist:
+    """An HLS EVENT playlist in output_dir that grows one segment per finished animation"""
+
+    def __init__(self, output_dir: Path, ffmpeg: str):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.ffmpeg = ffmpeg
+        self.segments: List[Tuple[str, float]] = []
+        self.offset = 0.0
+        self.cancelled = False
+        # One thread keeps segments in order without holding up the render relay
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='live')
+        self._write()
+
+    def add(self, partial_movie_file: str):
+        """Queue a finished partial movie file to become the next segment"""
+        if self.cancelled:
+            return
+        self._executor.submit(self._add, Path(partial_movie_file))
+
+    def _add(self, source: Path):
+        name = f"segment_{len(self.segments):03d}.ts"
+        try:
+            duration = probe_media(self.ffmpeg, source)['duration']
+            # Each partial file starts at t=0; shift it to follow the previous segment
+            run_ffmpeg(self.ffmpeg, '-i', str(source), '-map', '0:v:0', '-c', 'copy',
+                       '-output_ts_offset', f'{self.offset:.3f}', '-f', 'mpegts',
+                       str(self.output_dir / name))
+        except (subprocess.CalledProcessError, ValueError, OSError) as e:
+            print(f"[LIVE] Skipping segment from {source.name}: {getattr(e, 'stderr', '') or e}")
+            return
+        self.segments.append((name, duration))
+        self.offset += duration
+        self._write()
+
+    def finish(self):
+        """Wait for queued segments and mark the playlist complete"""
+        self._executor.shutdown(wait=True)
+        if not self.cancelled:
+            self._write(ended=True)
+
+    def cancel(self):
+        """Drop queued segments and remove the playlist of a cancelled render"""
+        self.cancelled = True
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    def _write(self, ended: bool = False):
+        target = max((math.ceil(duration) for _, duration in self.segments), default=1)
+        lines = ['#EXTM3U', '#EXT-X-VERSION:3', f'#EXT-X-TARGETDURATION:{target}',
+                 '#EXT-X-MEDIA-SEQUENCE:0', '#EXT-X-PLAYLIST-TYPE:EVENT']
+        for name, duration in self.segments:
+            lines += [f'#EXTINF:{duration:.3f},', name]
+        if ended:
+            lines.append('#EXT-X-ENDLIST')
+        # Players polling the playlist never see it half written
+        tmp = self.output_dir / f".{LIVE_PLAYLIST}.tmp"
+        tmp.write_text('\n'.join(lines) + '\n')
+        os.replace(tmp, self.output_dir / LIVE_PLAYLIST)
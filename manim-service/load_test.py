@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Concurrent load test of the HTTP endpoints
+Opens many simultaneous /generate-dynamic SSE streams and downloads each
+finished video from /video/<id>, against the real Flask app with Manim and
+the TTS providers replaced by deterministic stand-ins of fixed latency.
+Reports throughput, p50/p95/p99 time to first progress event and to
+completion, and error rates, for sizing gunicorn workers and queue limits
+
+Usage:
+    python load_test.py --clients 16 --requests 64                 # app in this process (werkzeug, threaded)
+    python load_test.py --gunicorn "--workers 2 --threads 8"      # app under gunicorn
+    python load_test.py --url http://localhost:5001               # a server started with load_test:standin_app()
+
+The server side's JOB_CONCURRENCY, JOB_QUEUE_SIZE, RENDER_POOL_SIZE, ...
+are read from the environment as usual
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Iterator, List, Optional
+from urllib.parse import urlsplit
+
+from benchmark import CORPUS_DIR, install_stub_tts, list_cases, standin_speech
+
+SERVICE_DIR = Path(__file__).resolve().parent
+STANDIN_WORKER = SERVICE_DIR / 'load_test_worker.py'
+
+# Stand-in latencies, read by standin_app() and the stand-in render worker
+RENDER_SECONDS_ENV = 'LOAD_TEST_RENDER_SECONDS'
+TTS_SECONDS_ENV = 'LOAD_TEST_TTS_SECONDS'
+CLIP_ENV = 'LOAD_TEST_CLIP'
+STARTUP_SECONDS_ENV = 'LOAD_TEST_STARTUP_SECONDS'
+
+SERVER_START_TIMEOUT = 60.0
+READ_CHUNK = 65536
+
+
+# --- Server side ---
+
+def install_standins():
+    """
+    Swap Manim and the TTS providers for stand-ins, before api is imported
+
+    Renders run on load_test_worker.py processes; DashScope and gTTS return
+    a tone as long as the narration after LOAD_TEST_TTS_SECONDS. Everything
+    else (queueing, SSE, mux, packaging, publishing) is the real thing
+    """
+    import render_pool
+    import tts_generator
+
+    tts_seconds = float(os.getenv(TTS_SECONDS_ENV, '1'))
+
+    class StandinSynthesizer:
+        def __init__(self, model: str, voice: str):
+            pass
+
+        def call(self, text: str) -> bytes:
+            time.sleep(tts_seconds)
+            return standin_speech(text)
+
+    render_pool.WORKER_SCRIPT = STANDIN_WORKER
+    install_stub_tts(tts_seconds)
+    os.environ['QWEN_API_KEY'] = 'load-test'
+    tts_generator.SpeechSynthesizer = StandinSynthesizer
+
+
+def standin_app():
+    """WSGI app with stand-ins installed (gunicorn 'load_test:standin_app()')"""
+    install_standins()
+    import api
+    return api.app
+
+
+def make_clip(path: Path, seconds: float):
+    """The video every stand-in render produces: 480p at 24 fps, like a dynamic render"""
+    from video_packaging import ffmpeg_path
+    ffmpeg = ffmpeg_path()
+    if not ffmpeg:
+        raise RuntimeError("ffmpeg is required for the stand-in renders")
+    subprocess.run([ffmpeg, '-loglevel', 'error', '-y', '-f', 'lavfi', '-i', 'testsrc=size=854x480:rate=24',
+                    '-t', f'{seconds:g}', '-c:v', 'libx264', '-pix_fmt', 'yuv420p', str(path)], check=True)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_healthy(base_url: str, timeout: float = SERVER_START_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            status, _ = request(base_url, 'GET', '/health')
+            if status == 200:
+                return
+        except OSError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Server at {base_url} did not become healthy within {timeout:.0f}s")
+        time.sleep(0.2)
+
+
+class InProcessServer:
+    """The app in this process on werkzeug's threaded server, one thread per connection"""
+
+    def __init__(self, work_dir: Path):
+        import logging
+        from werkzeug.serving import make_server
+        # One access log line per request would drown the report
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        # api keeps media/ and temp/ relative to the working directory
+        os.chdir(work_dir)
+        sys.path.insert(0, str(SERVICE_DIR))
+        app = standin_app()
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+
+
+class GunicornServer:
+    """gunicorn serving standin_app() with the service's hooks and the given options"""
+
+    def __init__(self, work_dir: Path, options: str):
+        port = free_port()
+        self.url = f"http://127.0.0.1:{port}"
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', str(SERVICE_DIR / 'gunicorn.conf.py'),
+             '--chdir', str(work_dir), '--pythonpath', str(SERVICE_DIR),
+             '--bind', f'127.0.0.1:{port}', *options.split(), 'load_test:standin_app()'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+        try:
+            wait_until_healthy(self.url)
+        except RuntimeError:
+            self.stop()
+            raise
+
+    def stop(self):
+        try:
+            os.killpg(self.process.pid, signal.SIGTERM)
+            self.process.wait(timeout=30)
+        except ProcessLookupError:
+            pass
+        except subprocess.TimeoutExpired:
+            os.killpg(self.process.pid, signal.SIGKILL)
+            self.process.wait()
+
+
+# --- Client side ---
+
+def request(base_url: str, method: str, path: str, body: Optional[dict] = None, timeout: float = 30.0):
+    """One request on a fresh connection, returning (status, body bytes)"""
+    connection = connect(base_url, timeout)
+    try:
+        connection.request(method, path, body=json.dumps(body) if body is not None else None,
+                           headers={'Content-Type': 'application/json'} if body is not None else {})
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+
+def connect(base_url: str, timeout: float) -> http.client.HTTPConnection:
+    url = urlsplit(base_url)
+    connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+    return connection_class(url.hostname, url.port, timeout=timeout)
+
+
+def read_sse(response) -> Iterator[dict]:
+    """Yield the JSON payload of each `data:` line of an SSE response"""
+    while True:
+        line = response.readline()
+        if not line:
+            return
+        line = line.decode('utf-8').rstrip('\r\n')
+        if line.startswith('data:'):
+            yield json.loads(line[len('data:'):].strip())
+
+
+def percentiles(values: List[float]) -> dict:
+    """p50/p95/p99 (nearest rank), mean and max of values, None if there are none"""
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def rank(p):
+        return ordered[max(0, min(len(ordered) - 1, -(-len(ordered) * p // 100) - 1))]
+
+    return {"p50": round(rank(50), 4), "p95": round(rank(95), 4), "p99": round(rank(99), 4),
+            "mean": round(sum(ordered) / len(ordered), 4), "max": round(ordered[-1], 4), "count": len(ordered)}
+
+
+class LoadTest:
+    """Client threads that each run generate → stream → download until the requests are used up"""
+
+    def __init__(self, base_url: str, clients: int, requests: int, downloads: int = 1,
+                 narration: bool = True, unique: bool = True, timeout: float = 600.0):
+        self.base_url = base_url
+        self.clients = clients
+        self.downloads = downloads
+        self.narration = narration
+        self.unique = unique
+        self.timeout = timeout
+        scenes = list_cases('dynamic')
+        narrations = json.loads((CORPUS_DIR / 'narration.json').read_text())
+        self.scenes = [((CORPUS_DIR / 'scenes' / f'{name}.py').read_text(), narrations[name]) for name in scenes]
+
+        self._lock = threading.Lock()
+        self._next = 0
+        self.requests = requests
+        self.first_progress: List[float] = []
+        self.complete: List[float] = []
+        self.download_seconds: List[float] = []
+        self.download_bytes = 0
+        self.outcomes = Counter()
+        self.download_outcomes = Counter()
+        self.errors = Counter()
+
+    def _take(self) -> Optional[int]:
+        with self._lock:
+            if self._next >= self.requests:
+                return None
+            self._next += 1
+            return self._next - 1
+
+    def _body(self, index: int) -> dict:
+        code, narration = self.scenes[index % len(self.scenes)]
+        if self.unique:
+            # A different comment is a different render cache key (and TTS cache key)
+            code = f"# load test request {index}\n{code}"
+            narration = f"{narration} Request {index}."
+        return {"code": code, "narration": narration if self.narration else ''}
+
+    def _record(self, outcome: str, error: Optional[str] = None, **samples):
+        with self._lock:
+            self.outcomes[outcome] += 1
+            if error:
+                self.errors[error[:120]] += 1
+            for name, value in samples.items():
+                if value is not None:
+                    getattr(self, name).append(value)
+
+    def generate(self, index: int) -> Optional[str]:
+        """Run one /generate-dynamic stream, returning the video id if it completed"""
+        started = time.monotonic()
+        first_progress = None
+        connection = connect(self.base_url, self.timeout)
+        try:
+            connection.request('POST', '/generate-dynamic', body=json.dumps(self._body(index)),
+                               headers={'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            if response.status != 200:
+                details = response.read()[:200].decode('utf-8', 'replace')
+                outcome = 'rejected' if response.status == 429 else 'http_error'
+                self._record(outcome, f"HTTP {response.status}: {details}")
+                return None
+            for event in read_sse(response):
+                if event['type'] == 'progress' and first_progress is None:
+                    first_progress = time.monotonic() - started
+                elif event['type'] == 'complete':
+                    self._record('complete', first_progress=first_progress, complete=time.monotonic() - started)
+                    return event['video_id']
+                elif event['type'] == 'error':
+                    self._record('job_error', event.get('error') or 'error event')
+                    return None
+            self._record('disconnected', 'stream ended without a terminal event')
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            self._record('connection_error', f"{type(e).__name__}: {e}")
+        finally:
+            connection.close()
+        return None
+
+    def download(self, video_id: str):
+        started = time.monotonic()
+        connection = connect(self.base_url, self.timeout)
+        try:
+            connection.request('GET', f'/video/{video_id}')
+            response = connection.getresponse()
+            size = 0
+            while True:
+                chunk = response.read(READ_CHUNK)
+                if not chunk:
+                    break
+                size += len(chunk)
+            with self._lock:
+                if response.status == 200:
+                    self.download_outcomes['ok'] += 1
+                    self.download_seconds.append(time.monotonic() - started)
+                    self.download_bytes += size
+                else:
+                    self.download_outcomes[f'http_{response.status}'] += 1
+        except (OSError, http.client.HTTPException) as e:
+            with self._lock:
+                self.download_outcomes['connection_error'] += 1
+                self.errors[f"download {type(e).__name__}: {e}"[:120]] += 1
+        finally:
+            connection.close()
+
+    def _client(self):
+        while True:
+            index = self._take()
+            if index is None:
+                return
+            video_id = self.generate(index)
+            if video_id:
+                for _ in range(self.downloads):
+                    self.download(video_id)
+
+    def run(self) -> dict:
+        started = time.monotonic()
+        threads = [threading.Thread(target=self._client, name=f'client-{n}', daemon=True)
+                   for n in range(self.clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.report(time.monotonic() - started)
+
+    def report(self, elapsed: float) -> dict:
+        attempted = sum(self.outcomes.values())
+        downloads = sum(self.download_outcomes.values())
+        return {
+            "clients": self.clients,
+            "requests": attempted,
+            "elapsed_seconds": round(elapsed, 3),
+            "throughput": {
+                "jobs_per_second": round(self.outcomes['complete'] / elapsed, 4),
+                "downloads_per_second": round(self.download_outcomes['ok'] / elapsed, 4),
+                "download_mb_per_second": round(self.download_bytes / elapsed / (1024 * 1024), 4),
+            },
+            "time_to_first_progress": percentiles(self.first_progress),
+            "time_to_complete": percentiles(self.complete),
+            "download_seconds": percentiles(self.download_seconds),
+            "outcomes": dict(self.outcomes),
+            "download_outcomes": dict(self.download_outcomes),
+            "error_rate": round(1 - self.outcomes['complete'] / attempted, 4) if attempted else 0.0,
+            "download_error_rate": round(1 - self.download_outcomes['ok'] / downloads, 4) if downloads else 0.0,
+            "errors": dict(self.errors.most_common(10)),
+        }
+
+
+def print_report(report: dict):
+    print(f"\n{report['requests']} requests from {report['clients']} clients in {report['elapsed_seconds']:.1f}s")
+    throughput = report['throughput']
+    print(f"  throughput              {throughput['jobs_per_second']:.3f} jobs/s, "
+          f"{throughput['downloads_per_second']:.3f} downloads/s ({throughput['download_mb_per_second']:.2f} MB/s)")
+    for name in ('time_to_first_progress', 'time_to_complete', 'download_seconds'):
+        stats = report[name]
+        if stats:
+            print(f"  {name:24s}p50 {stats['p50']:.3f}s  p95 {stats['p95']:.3f}s  p99 {stats['p99']:.3f}s  "
+                  f"max {stats['max']:.3f}s")
+    print(f"  outcomes                {report['outcomes']}  (error rate {report['error_rate']:.1%})")
+    print(f"  downloads               {report['download_outcomes']}  (error rate {report['download_error_rate']:.1%})")
+    for error, count in report['errors'].items():
+        print(f"  {count:5d} × {error}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--clients', type=int, default=8, help="simultaneous clients (default 8)")
+    parser.add_argument('--requests', type=int, help="total /generate-dynamic requests (default 4 per client)")
+    parser.add_argument('--downloads', type=int, default=1, help="downloads of each finished video (default 1)")
+    parser.add_argument('--render-seconds', type=float, default=2.0, help="stand-in render time per job (default 2)")
+    parser.add_argument('--tts-seconds', type=float, default=1.0, help="stand-in TTS latency (default 1)")
+    parser.add_argument('--startup-seconds', type=float, default=0.0,
+                        help="stand-in render worker start-up time, in place of importing Manim (default 0)")
+    parser.add_argument('--video-seconds', type=float, default=30.0,
+                        help="length of the stand-in video; about as long as the corpus narrations (default 30)")
+    parser.add_argument('--no-narration', action='store_true', help="send requests without narration")
+    parser.add_argument('--repeat-scenes', action='store_true',
+                        help="send the corpus scenes unchanged, so repeats share renders or hit the render cache")
+    parser.add_argument('--gunicorn', metavar='OPTIONS', help='serve with gunicorn, e.g. "--workers 2 --threads 8"')
+    parser.add_argument('--url', help="load an already running server instead (start it with load_test:standin_app())")
+    parser.add_argument('--timeout', type=float, default=600.0, help="per-request socket timeout (default 600)")
+    parser.add_argument('--output', type=Path, help="also write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    work_dir = Path(tempfile.mkdtemp(prefix='load-test-'))
+    server = None
+    try:
+        if args.url:
+            base_url = args.url.rstrip('/')
+        else:
+            clip = work_dir / 'standin.mp4'
+            make_clip(clip, args.video_seconds)
+            os.environ.update({CLIP_ENV: str(clip), RENDER_SECONDS_ENV: str(args.render_seconds),
+                               TTS_SECONDS_ENV: str(args.tts_seconds),
+                               STARTUP_SECONDS_ENV: str(args.startup_seconds)})
+            if args.gunicorn is not None:
+                server = GunicornServer(work_dir, args.gunicorn)
+            else:
+                server = InProcessServer(work_dir)
+            base_url = server.url
+            wait_until_healthy(base_url)
+
+        test = LoadTest(base_url, args.clients, args.requests or args.clients * 4, downloads=args.downloads,
+                        narration=not args.no_narration, unique=not args.repeat_scenes, timeout=args.timeout)
+        report = test.run()
+        report["server"] = {"url": args.url, "gunicorn": args.gunicorn,
+                            "render_seconds": args.render_seconds, "tts_seconds": args.tts_seconds}
+        print_report(report)
+        if args.output:
+            args.output.parent.mkdir(parents=True, exist_ok=True)
+            args.output.write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+            print(f"Report saved to {args.output}")
+    finally:
+        if server:
+            server.stop()
+        os.chdir(SERVICE_DIR)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Stand-in render worker for load tests (see load_test.py)
+Speaks render_worker.py's protocol without importing Manim: each job prints
+Manim-style progress bars for a fixed time and publishes a pre-rendered clip
+
+Environment:
+    LOAD_TEST_CLIP              video copied to the job's output path
+    LOAD_TEST_RENDER_SECONDS    render time per job, spread over its animations (default 2)
+    LOAD_TEST_STARTUP_SECONDS   time to become ready, standing in for importing Manim (default 0)
+"""
+import json
+import os
+import resource
+import shutil
+import sys
+import time
+from pathlib import Path
+
+from render_pool import JOB_END_MARKER
+from render_progress import count_animations
+
+CLIP = os.getenv('LOAD_TEST_CLIP', '')
+RENDER_SECONDS = float(os.getenv('LOAD_TEST_RENDER_SECONDS', '2'))
+STARTUP_SECONDS = float(os.getenv('LOAD_TEST_STARTUP_SECONDS', '0'))
+
+# Frames per animation in the progress bars
+FRAMES = 24
+PROGRESS_STEPS = 4
+# MathProblemScene plays about this many animations
+PROBLEM_ANIMATIONS = 4
+
+
+def render(job: dict, on_segment=None):
+    if job['kind'] == 'dynamic':
+        with open(job['code_file'], 'r') as f:
+            animations = count_animations(f.read()) or 1
+    elif job['kind'] == 'problem':
+        animations = PROBLEM_ANIMATIONS
+    else:
+        raise ValueError(f"Unknown job kind: {job['kind']}")
+
+    video_dir = Path(job['video_dir'])
+    partial_dir = video_dir / 'partial_movie_files'
+    partial_dir.mkdir(parents=True, exist_ok=True)
+    step_seconds = RENDER_SECONDS / animations / PROGRESS_STEPS
+    for animation in range(animations):
+        for step in range(1, PROGRESS_STEPS + 1):
+            time.sleep(step_seconds)
+            frame = FRAMES * step // PROGRESS_STEPS
+            print(f"Animation {animation}: Write(Text): {100 * step // PROGRESS_STEPS:3d}%|#####| "
+                  f"{frame}/{FRAMES} [00:00<00:00, 60.0frames/s]", end='\r', file=sys.stderr, flush=True)
+        if on_segment:
+            partial = partial_dir / f"{animation:05d}.mp4"
+            shutil.copy(CLIP, partial)
+            on_segment(str(partial))
+    print(file=sys.stderr)
+    shutil.copy(CLIP, video_dir / f"{job['output_file']}.mp4")
+
+
+def main():
+    results = os.fdopen(int(sys.argv[1]), 'w', buffering=1)
+
+    def send(message: dict):
+        results.write(json.dumps(message) + "\n")
+
+    time.sleep(STARTUP_SECONDS)
+    send({"type": "ready", "pid": os.getpid(), "manim_import": STARTUP_SECONDS})
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        start = time.monotonic()
+        on_segment = None
+        if job.get('live'):
+            def on_segment(path, job_id=job['id']):
+                send({"type": "segment", "id": job_id, "path": path})
+        try:
+            render(job, on_segment)
+            message = {"type": "result", "id": job['id'], "ok": True}
+        except Exception as e:
+            message = {"type": "result", "id": job['id'], "ok": False, "error": str(e)}
+        duration = time.monotonic() - start
+        message.update(duration=duration, rss_mb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                       timings={"render_frames": round(duration, 4)}, partial_cache=None, tex_cache=None)
+
+        print(f"\n{JOB_END_MARKER} {job['id']}", file=sys.stdout, flush=True)
+        print(f"\n{JOB_END_MARKER} {job['id']}", file=sys.stderr, flush=True)
+        send(message)
+
+
+if __name__ == "__main__":
+    main()
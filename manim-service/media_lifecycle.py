@@ -0,0 +1,278 @@
+"""
+Background lifecycle management of media and scratch files
+Files are grouped into tiers, each with a byte budget and a time-to-live:
+
+    public        published videos (media/<id>.mp4); HLS renditions (media/hls/<id>/)
+                  are removed with their MP4. A video hardlinked from the render
+                  cache is left to the cache's budget: removing the public name
+                  frees nothing, and a cache hit links it again
+    intermediate  per-job render scratch (media/work), live playlists (media/live)
+                  and Manim's own output (media/videos, media/Tex, media/texts, media/images)
+    scratch       job code and event logs (temp/)
+
+A sweep removes expired files, then the least recently accessed ones until each
+tier fits its budget, and removes artifacts of jobs that are no longer running.
+Sweeps run on a daemon thread in small batches, and only one process sweeps at
+a time; the caches under media/ manage their own size and are left alone, as
+are lock files and the files of queued or running jobs
+"""
+import fcntl
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from jobs import INFLIGHT_SUFFIX
+from live_stream import LIVE_DIR
+from metrics import MEDIA_REMOVED_BYTES
+from video_packaging import HLS_DIR
+
+LIFECYCLE_INTERVAL_SECONDS = float(os.getenv('LIFECYCLE_INTERVAL_SECONDS', '300'))
+LIFECYCLE_ORPHAN_GRACE_SECONDS = float(os.getenv('LIFECYCLE_ORPHAN_GRACE_SECONDS', '120'))
+# Files examined between pauses, so a sweep never holds the GIL for long
+LIFECYCLE_BATCH = 200
+
+TIER_DEFAULTS = {
+    # tier: (max MB, TTL hours)
+    'public': (4096, 168),
+    'intermediate': (1024, 1),
+    'scratch': (512, 24),
+}
+
+# Under the media directory: one directory per job for its render, narration and
+# mux output, published to media/<id>.mp4 with a rename (see render_pipeline)
+WORK_DIR = 'work'
+INTERMEDIATE_DIRS = (WORK_DIR, LIVE_DIR, 'videos', 'Tex', 'texts', 'images')
+# Under the temp directory: job status and event logs (see jobs.JobStore)
+JOB_LOG_DIR = 'jobs'
+
+_JOB_ID = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
+
+def touch_access(path: Path):
+    """Record a read of path (atime), which sweeps use for recency even on noatime mounts"""
+    try:
+        os.utime(path, (time.time(), os.stat(path).st_mtime))
+    except OSError:
+        pass
+
+
+def _tier_limits(tier: str):
+    max_mb, ttl_hours = TIER_DEFAULTS[tier]
+    max_mb = float(os.getenv(f'LIFECYCLE_{tier.upper()}_MAX_MB', max_mb))
+    ttl_hours = float(os.getenv(f'LIFECYCLE_{tier.upper()}_TTL_HOURS', ttl_hours))
+    return int(max_mb * 1024 * 1024), ttl_hours * 3600
+
+
+def _walk_files(root: Path) -> Iterator[Path]:
+    for directory, _, files in os.walk(root):
+        for name in files:
+            yield Path(directory) / name
+
+
+class MediaLifecycle:
+    """Sweeps the media and temp directories against per-tier budgets"""
+
+    def __init__(self, media_dir: Path, temp_dir: Path, is_job_active: Callable[[str], bool],
+                 interval: float = LIFECYCLE_INTERVAL_SECONDS, limits: Optional[dict] = None,
+                 orphan_grace: float = LIFECYCLE_ORPHAN_GRACE_SECONDS):
+        self.media_dir = Path(media_dir)
+        self.temp_dir = Path(temp_dir)
+        self.is_job_active = is_job_active
+        self.interval = interval
+        self.orphan_grace = orphan_grace
+        # tier: (max_bytes, ttl_seconds)
+        self.limits = limits or {tier: _tier_limits(tier) for tier in TIER_DEFAULTS}
+        self.stats_path = self.media_dir / '.lifecycle.json'
+        self._thread = None
+
+    def _tier_files(self, tier: str) -> Iterator[Path]:
+        if tier == 'public':
+            yield from (path for path in self.media_dir.glob('*.mp4') if path.is_file())
+        elif tier == 'intermediate':
+            for name in INTERMEDIATE_DIRS:
+                yield from _walk_files(self.media_dir / name)
+        else:
+            yield from _walk_files(self.temp_dir)
+
+    def start(self):
+        """Sweep every interval on a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="media-lifecycle", daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"[LIFECYCLE] Sweep failed: {e}")
+
+    def sweep(self) -> Optional[dict]:
+        """
+        Run one sweep unless another process is already sweeping
+
+        Returns:
+            The sweep's stats (see stats()), or None if it was skipped
+        """
+        self.media_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.media_dir / '.lifecycle.lock', 'w') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+            try:
+                started = time.monotonic()
+                stats = {"tiers": {tier: self._sweep_tier(tier) for tier in self.limits}}
+                stats.update(finished=time.time(), duration=round(time.monotonic() - started, 3))
+                self._write_stats(stats)
+                return stats
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _sweep_tier(self, tier: str) -> dict:
+        max_bytes, ttl = self.limits[tier]
+        now = time.time()
+        removed = {"expired": 0, "orphaned": 0, "over_budget": 0}
+        removed_bytes = 0
+        kept = []
+
+        def remove(path, size, reason):
+            nonlocal removed_bytes
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                return
+            except OSError as e:
+                print(f"[LIFECYCLE] Failed to remove {path}: {e}")
+                return
+            removed[reason] += 1
+            removed_bytes += size
+            MEDIA_REMOVED_BYTES.labels(tier, reason).inc(size)
+
+        active = {}
+        for count, path in enumerate(self._tier_files(tier), 1):
+            if count % LIFECYCLE_BATCH == 0:
+                time.sleep(0.01)
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if tier == 'public' and stat.st_nlink > 1:
+                # Shares its bytes with a render cache entry (see render_cache)
+                continue
+            recency = max(stat.st_atime, stat.st_mtime)
+            age = now - stat.st_mtime
+
+            if path.suffix == '.lock':
+                # Held with flock by live processes; a new file would not exclude them
+                continue
+            relative = path.relative_to(self.temp_dir if tier == 'scratch' else self.media_dir)
+            match = _JOB_ID.search(str(relative))
+            if not match and path.suffix == INFLIGHT_SUFFIX:
+                # Names the job rendering a coalesced request
+                try:
+                    match = _JOB_ID.fullmatch(path.read_text())
+                except FileNotFoundError:
+                    continue
+            if match:
+                job_id = match.group(0)
+                if job_id not in active:
+                    active[job_id] = self.is_job_active(job_id)
+                if active[job_id]:
+                    continue
+                # Job status and event logs stay readable until they expire
+                is_log = relative.parts[0] == JOB_LOG_DIR
+                if tier != 'public' and not is_log and age > self.orphan_grace:
+                    # What a finished or failed job left behind
+                    remove(path, stat.st_size, 'orphaned')
+                    continue
+            elif path.name.startswith('.') and path.name.endswith('.tmp'):
+                # Atomic writes that never completed
+                if age > self.orphan_grace:
+                    remove(path, stat.st_size, 'orphaned')
+                continue
+
+            if now - recency > ttl:
+                remove(path, stat.st_size, 'expired')
+            else:
+                kept.append((recency, stat.st_size, path))
+
+        kept.sort()
+        total = sum(size for _, size, _ in kept)
+        for _, size, path in kept:
+            if total <= max_bytes:
+                break
+            remove(path, size, 'over_budget')
+            total -= size
+
+        if tier == 'public':
+            for size in self._remove_orphaned_renditions(now):
+                removed['orphaned'] += 1
+                removed_bytes += size
+                MEDIA_REMOVED_BYTES.labels(tier, 'orphaned').inc(size)
+        else:
+            self._prune_empty_dirs(self.temp_dir if tier == 'scratch' else self.media_dir, tier)
+        return {
+            "bytes": total,
+            "files": len(kept) - removed['over_budget'],
+            "max_bytes": max_bytes,
+            "ttl_seconds": ttl,
+            "removed": removed,
+            "removed_bytes": removed_bytes,
+        }
+
+    def _remove_orphaned_renditions(self, now: float) -> Iterator[int]:
+        """Remove HLS renditions whose MP4 is gone, yielding the bytes each one used"""
+        hls_root = self.media_dir / HLS_DIR
+        if not hls_root.is_dir():
+            return
+        for rendition in hls_root.iterdir():
+            try:
+                if (self.media_dir / f"{rendition.name}.mp4").exists() or \
+                        now - rendition.stat().st_mtime < self.orphan_grace:
+                    continue
+                size = sum(path.stat().st_size for path in _walk_files(rendition))
+            except FileNotFoundError:
+                continue
+            shutil.rmtree(rendition, ignore_errors=True)
+            yield size
+
+    def _prune_empty_dirs(self, root: Path, tier: str):
+        roots = [root] if tier == 'scratch' else [root / name for name in INTERMEDIATE_DIRS]
+        keep = {root / JOB_LOG_DIR}
+        now = time.time()
+        for top in roots:
+            # Deepest first, so directories emptied here are removed too
+            for directory, _, _ in sorted(os.walk(top), key=lambda entry: -len(entry[0])):
+                directory = Path(directory)
+                if directory == top or directory in keep:
+                    continue
+                try:
+                    # A job may have just created it and not written into it yet
+                    if now - directory.stat().st_mtime > self.orphan_grace:
+                        directory.rmdir()
+                except OSError:
+                    pass  # not empty, or already gone
+
+    def _write_stats(self, stats: dict):
+        tmp = self.stats_path.with_name(f".lifecycle.{uuid.uuid4().hex}.tmp")
+        with open(tmp, 'w') as f:
+            json.dump(stats, f)
+        os.replace(tmp, self.stats_path)
+
+    def stats(self) -> dict:
+        """Result of the most recent sweep by any process"""
+        try:
+            with open(self.stats_path, 'r') as f:
+                stats = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            stats = {"tiers": {}, "finished": None}
+        stats['interval_seconds'] = self.interval
+        return stats
@@ -0,0 +1,128 @@
+"""
+Prometheus metrics for the render service
+With several gunicorn workers, prometheus_client runs in multiprocess mode:
+gunicorn.conf.py points PROMETHEUS_MULTIPROC_DIR at a shared directory, every
+worker records its samples there and /metrics aggregates them
+"""
+import os
+
+# prometheus_client is optional; without it every metric is a no-op
+try:
+    from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge,
+                                   Histogram, generate_latest, multiprocess)
+    METRICS_AVAILABLE = True
+except ImportError as e:
+    print(f"[WARNING] prometheus_client not available, metrics disabled: {e}")
+    METRICS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = 'text/plain; version=0.0.4; charset=utf-8'
+
+MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+
+RENDER_BUCKETS = (1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+FAST_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class _NoopMetric:
+    """Stands in for a metric when prometheus_client is missing"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def observe(self, value):
+        pass
+
+
+def _histogram(name, documentation, labelnames=(), buckets=FAST_BUCKETS):
+    if not METRICS_AVAILABLE:
+        return _NoopMetric()
+    return Histogram(name, documentation, labelnames, buckets=buckets)
+
+
+def _counter(name, documentation, labelnames=()):
+    if not METRICS_AVAILABLE:
+        return _NoopMetric()
+    return Counter(name, documentation, labelnames)
+
+
+def _gauge(name, documentation, labelnames=()):
+    if not METRICS_AVAILABLE:
+        return _NoopMetric()
+    # Sum the values of the live worker processes; dead ones are dropped by
+    # the child_exit hook in gunicorn.conf.py
+    return Gauge(name, documentation, labelnames, multiprocess_mode='livesum')
+
+
+RENDER_SECONDS = _histogram('qed_render_seconds', 'Wall time of Manim renders',
+                            ['kind', 'outcome'], buckets=RENDER_BUCKETS)
+TTS_SECONDS = _histogram('qed_tts_seconds', 'Narration synthesis latency',
+                         ['provider', 'outcome'])
+MUX_SECONDS = _histogram('qed_mux_seconds', 'Time to combine video and narration',
+                         ['method', 'outcome'])
+VIDEO_BYTES = _counter('qed_video_bytes_written', 'Bytes of published video', ['kind'])
+OOM_KILLS = _counter('qed_render_oom_kills', 'Renders killed by the OS (exit code -9)', ['kind'])
+FALLBACKS = _counter('qed_fallbacks', 'Times a degraded path was used',
+                     ['fallback'])  # gtts, moviepy, silent_video
+CACHE_LOOKUPS = _counter('qed_cache_lookups', 'Shared disk cache lookups',
+                         ['cache', 'result'])  # cache: render, tts, partial, tex; result: hit, miss
+PARTIAL_CACHE_LOOKUPS = _counter('qed_partial_cache_lookups', 'Shared partial movie cache lookups',
+                                 ['result'])  # hit, miss
+TEX_CACHE_LOOKUPS = _counter('qed_tex_cache_lookups', 'Shared TeX cache lookups', ['result'])  # hit, miss
+TEX_COMPILE_SECONDS = _counter('qed_tex_compile_seconds', 'Seconds spent compiling TeX on cache misses')
+TEX_SECONDS_SAVED = _counter('qed_tex_seconds_saved', 'Compile seconds avoided by TeX cache hits')
+PREFLIGHT_REJECTIONS = _counter('qed_preflight_rejections', 'Generated code rejected before rendering')
+MEDIA_REMOVED_BYTES = _counter('qed_media_removed_bytes', 'Bytes removed by media lifecycle sweeps',
+                                ['tier', 'reason'])  # reason: expired, orphaned, over_budget
+JOBS_CANCELLED = _counter('qed_jobs_cancelled', 'Jobs cancelled before finishing',
+                          ['reason', 'stage'])  # reason: disconnect, request; stage: queued, running
+JOBS_COALESCED = _counter('qed_jobs_coalesced', 'Render requests that joined an identical in-flight job', ['kind'])
+JOBS_QUEUED = _gauge('qed_jobs_queued', 'Jobs waiting for a render slot')
+JOBS_RUNNING = _gauge('qed_jobs_running', 'Jobs currently rendering')
+RENDER_WORKERS = _gauge('qed_render_workers', 'Live render worker subprocesses', ['state'])
+
+
+def _registry():
+    """The metrics of every worker process in multiprocess mode, else of this one"""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def counter_total(counter, **labels):
+    """
+    A counter's value summed over all worker processes and over the labels not given
+
+    Returns:
+        The total, or None if prometheus_client is not installed
+    """
+    if not METRICS_AVAILABLE:
+        return None
+    total = 0.0
+    for metric in _registry().collect():
+        for sample in metric.samples:
+            if sample.name == f"{counter._name}_total" and \
+                    all(sample.labels.get(name) == value for name, value in labels.items()):
+                total += sample.value
+    return total
+
+
+def render_metrics():
+    """
+    Current metrics in the Prometheus text format
+
+    Returns:
+        (body, content_type)
+    """
+    if not METRICS_AVAILABLE:
+        return b"# prometheus_client is not installed\n", CONTENT_TYPE_LATEST
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
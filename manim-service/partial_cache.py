@@ -0,0 +1,125 @@
+"""
+Shared cache of Manim partial movie files
+Manim hashes every play()/wait() call and skips rendering when a partial movie
+with that hash already exists, but only within one output's own
+partial_movie_files directory. This cache shares those segments across jobs and
+render workers, so identical title cards, axes and intros are rendered once
+"""
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+from disk_cache import DiskLRUCache
+from render_config import manim_version
+
+PARTIAL_CACHE_DIR = Path(os.getenv('PARTIAL_CACHE_DIR', './media/partial-cache'))
+PARTIAL_CACHE_MAX_MB = int(os.getenv('PARTIAL_CACHE_MAX_MB', '1024'))
+
+# Manim names segments it cannot hash "uncached_00001"; those are never shared
+UNCACHED_PREFIX = 'uncached_'
+
+
+class SharedPartialCache:
+    """Size-bounded LRU store of partial movie files, keyed by Manim's animation hash"""
+
+    def __init__(self, root: Path = PARTIAL_CACHE_DIR, max_bytes: int = PARTIAL_CACHE_MAX_MB * 1024 * 1024):
+        self.store = DiskLRUCache(root, max_bytes, '.mp4', name='partial')
+        self.reset_job_stats()
+
+    def reset_job_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def job_stats(self) -> dict:
+        """Lookups made since the last reset_job_stats()"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def key(self, animation_hash: str, render_config: dict, extension: str) -> str:
+        payload = {
+            "animation": animation_hash,
+            "config": render_config,
+            "extension": extension,
+            "manim": manim_version(),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _fetch(self, key: str, destination: Path) -> bool:
+        """Link a cached segment into place, returning False on a miss"""
+        cached = self.store.get(key)
+        if cached is None:
+            return False
+        tmp = destination.with_name(f".{destination.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            os.link(cached, tmp)
+        except FileNotFoundError:
+            # Evicted by another worker between lookup and link
+            return False
+        except OSError:
+            try:
+                shutil.copyfile(cached, tmp)
+            except FileNotFoundError:
+                tmp.unlink(missing_ok=True)
+                return False
+        os.replace(tmp, destination)
+        return True
+
+    def attach(self, scene, render_config: dict):
+        """
+        Make a scene's file writer consult and feed the shared cache
+
+        Lookups happen when Manim checks whether a play() call is already
+        cached; newly rendered segments are published just before the partial
+        movies are combined into the final video
+        """
+        file_writer = scene.renderer.file_writer
+        original_is_cached = file_writer.is_already_cached
+        original_combine = file_writer.combine_to_movie
+
+        def is_already_cached(animation_hash: str) -> bool:
+            partial_dir = getattr(file_writer, 'partial_movie_directory', None)
+            if partial_dir is None or animation_hash.startswith(UNCACHED_PREFIX):
+                return original_is_cached(animation_hash)
+            if original_is_cached(animation_hash):
+                # Repeated within this scene; Manim reuses its own copy
+                self.hits += 1
+                return True
+            extension = Path(file_writer.movie_file_path).suffix
+            destination = Path(partial_dir) / f"{animation_hash}{extension}"
+            if self._fetch(self.key(animation_hash, render_config, extension), destination):
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+        def combine_to_movie(*args, **kwargs):
+            self.publish(file_writer.partial_movie_files, render_config)
+            return original_combine(*args, **kwargs)
+
+        file_writer.is_already_cached = is_already_cached
+        file_writer.combine_to_movie = combine_to_movie
+
+    def publish(self, partial_movie_files, render_config: dict):
+        """Store segments rendered by this job that the cache does not have yet"""
+        for path in partial_movie_files:
+            if path is None:
+                continue
+            path = Path(path)
+            if path.stem.startswith(UNCACHED_PREFIX) or not path.exists():
+                continue
+            key = self.key(path.stem, render_config, path.suffix)
+            if key in self.store:
+                continue
+            try:
+                self.store.put(key, path)
+            except OSError as e:
+                # Sharing is an optimization; the render itself succeeded
+                print(f"[CACHE] Failed to share partial movie {path.name}: {e}")
+
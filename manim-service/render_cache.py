@@ -0,0 +1,90 @@
+"""
+Content-addressed cache of rendered videos
+Keys are hashes of the normalized scene code (or problem JSON), the render
+config and the Manim version, so identical requests reuse the published video
+"""
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from disk_cache import DiskLRUCache
+from render_config import manim_version
+
+RENDER_CACHE_MAX_MB = int(os.getenv('RENDER_CACHE_MAX_MB', '2048'))
+
+
+def normalize_code(code: str) -> str:
+    """Normalize line endings and trailing whitespace so cosmetic diffs still hit"""
+    lines = code.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    return '\n'.join(line.rstrip() for line in lines).strip()
+
+
+def render_cache_key(kind: str, source, render_config: dict, **extra) -> str:
+    """
+    Hash everything that affects the rendered video
+
+    Args:
+        kind: "dynamic" (generated code) or "problem" (problem_data)
+        source: Normalized code string or problem data dict
+        render_config: Resolution/fps settings used for the render
+        **extra: Anything else baked into the output (e.g. narration)
+    """
+    payload = {
+        "kind": kind,
+        "source": source,
+        "config": render_config,
+        "manim": manim_version(),
+        "extra": extra,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class RenderCache:
+    """Maps cache keys to published videos in the media directory"""
+
+    def __init__(self, media_dir: Path, max_bytes: int = RENDER_CACHE_MAX_MB * 1024 * 1024):
+        self.media_dir = Path(media_dir)
+        self.store = DiskLRUCache(self.media_dir / 'render-cache', max_bytes, '.mp4', name='render')
+
+    def lookup(self, key: str) -> Optional[dict]:
+        """
+        Find a cached render and make sure its public video exists
+
+        Returns:
+            Metadata with at least "video_id", or None on a miss
+        """
+        path = self.store.get(key)
+        if path is None:
+            return None
+
+        meta = self.store.get_meta(key)
+        video_id = meta.get('video_id')
+        if not video_id:
+            return None
+
+        # The public copy may have been removed by /cleanup; restore it from the cache
+        public_file = self.media_dir / f"{video_id}.mp4"
+        if not public_file.exists():
+            tmp = self.media_dir / f".{video_id}.{uuid.uuid4().hex}.tmp"
+            try:
+                os.link(path, tmp)
+            except OSError:
+                shutil.copy2(path, tmp)
+            os.replace(tmp, public_file)
+
+        return meta
+
+    def store_video(self, key: str, video_id: str, public_file: Path, **meta):
+        """Remember a freshly published video under key"""
+        try:
+            self.store.put(key, public_file, {"video_id": video_id, **meta})
+        except OSError as e:
+            # Caching is best effort; the render itself already succeeded
+            print(f"[CACHE] Failed to cache video {video_id}: {e}")
+
+    def stats(self) -> dict:
+        return self.store.stats()
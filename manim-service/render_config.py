@@ -0,0 +1,34 @@
+"""
+Render settings shared by the scene generators and the API
+Kept free of Manim imports so the API process can use them cheaply
+"""
+from importlib import metadata
+
+# Used by execute_generated_code (optimized for low memory environments)
+DYNAMIC_RENDER_CONFIG = {
+    "pixel_height": 480,
+    "pixel_width": 854,
+    "frame_rate": 24,
+}
+
+# Quick first pass for progressive (preview) rendering
+DRAFT_RENDER_CONFIG = {
+    "pixel_height": 240,
+    "pixel_width": 426,
+    "frame_rate": 15,
+}
+
+# Used by generate_scene
+PROBLEM_RENDER_CONFIG = {
+    "pixel_height": 720,
+    "pixel_width": 1280,
+    "frame_rate": 30,
+}
+
+
+def manim_version() -> str:
+    """Installed Manim version, or 'unknown' when Manim is not importable here"""
+    try:
+        return metadata.version('manim')
+    except metadata.PackageNotFoundError:
+        return 'unknown'
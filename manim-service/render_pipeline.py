@@ -0,0 +1,553 @@
+"""
+Render pipeline executed by the job scheduler
+Renders a scene on the worker pool, adds narration and publishes the video,
+reporting progress as job events
+"""
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Tuple
+
+from jobs import PRIORITY_FINAL, Job, JobCancelled
+from live_stream import LIVE_DIR, LIVE_PLAYLIST, LivePlaylist
+from media_lifecycle import WORK_DIR
+from metrics import (FALLBACKS, OOM_KILLS, PARTIAL_CACHE_LOOKUPS, RENDER_SECONDS, TEX_CACHE_LOOKUPS,
+                     TEX_COMPILE_SECONDS, TEX_SECONDS_SAVED, VIDEO_BYTES)
+from render_cache import RenderCache, normalize_code, render_cache_key
+from render_config import DRAFT_RENDER_CONFIG, DYNAMIC_RENDER_CONFIG, PROBLEM_RENDER_CONFIG
+from render_pool import RenderHandle, RenderPool
+from render_progress import RenderProgress, count_animations, parse_tqdm
+from stage_timer import StageTimer
+from video_packaging import (HLS_DIR, HLS_ENABLED, HLS_MIN_SECONDS, HLS_PLAYLIST, FfmpegProcesses, ffmpeg_path,
+                             make_fast_start, package_hls, probe_media, track_ffmpeg)
+
+# Try to import TTS generator, but don't fail if it's not available
+try:
+    from tts_generator import generate_tts, combine_video_audio, TTS_CACHE
+    TTS_AVAILABLE = True
+except ImportError as e:
+    print(f"[WARNING] TTS generator not available: {e}")
+    TTS_AVAILABLE = False
+    generate_tts = None
+    combine_video_audio = None
+    TTS_CACHE = None
+
+TTS_MAX_CONCURRENCY = int(os.getenv('TTS_MAX_CONCURRENCY', '4'))
+
+
+def publish_video(source: Path, public_file: Path) -> int:
+    """
+    Move a finished video into the public directory with a single rename,
+    so /video/<id> sees either no file or the complete one
+
+    Returns:
+        The video's size in bytes
+    """
+    size = source.stat().st_size
+    os.replace(source, public_file)
+    return size
+
+
+class RenderPipeline:
+    """Turns "dynamic" (generated code) and "problem" (problem_data) jobs into videos"""
+
+    def __init__(self, pool: RenderPool, cache: RenderCache, media_dir: Path, temp_dir: Path):
+        self.pool = pool
+        self.cache = cache
+        self.media_dir = Path(media_dir)
+        self.temp_dir = Path(temp_dir)
+        # Renders, narration and muxes write here, on the same filesystem as the public videos
+        self.work_dir = self.media_dir / WORK_DIR
+        self.hls_dir = self.media_dir / HLS_DIR
+        # Narration is synthesized on these threads while the scene renders
+        self.tts_executor = ThreadPoolExecutor(max_workers=TTS_MAX_CONCURRENCY, thread_name_prefix='tts')
+
+    def cache_key(self, kind: str, params: dict) -> str:
+        if kind == 'dynamic':
+            # Identical code + narration renders to an identical video
+            return render_cache_key('dynamic', normalize_code(params['code']), DYNAMIC_RENDER_CONFIG,
+                                    narration=params.get('narration', ''))
+        problem_source = {k: v for k, v in params['problem_data'].items() if k != 'output_file'}
+        return render_cache_key('problem', problem_source, PROBLEM_RENDER_CONFIG)
+
+    def lookup_cached(self, kind: str, params: dict) -> Optional[dict]:
+        """
+        Check the render cache for a job's video
+
+        Returns:
+            The "complete" event payload on a hit, otherwise None
+        """
+        cached = self.cache.lookup(self.cache_key(kind, params))
+        if not cached:
+            return None
+        video_id = cached['video_id']
+        print(f"[CACHE] Render cache hit for video {video_id}")
+        payload = {
+            "success": True,
+            "video_id": video_id,
+            "video_url": f"/video/{video_id}",
+            "file_path": str(self.media_dir / f"{video_id}.mp4"),
+            "cached": True,
+        }
+        if kind == 'dynamic':
+            payload['has_audio'] = cached.get('has_audio', False)
+        payload['hls_url'] = self._hls_url(video_id)
+        return payload
+
+    def _hls_url(self, video_id: str) -> Optional[str]:
+        if (self.hls_dir / video_id / HLS_PLAYLIST).exists():
+            return f"/hls/{video_id}/{HLS_PLAYLIST}"
+        return None
+
+    def run(self, job: Job):
+        """Job scheduler handler"""
+        # Cancelling the job kills whatever ffmpeg process is packaging or muxing its video
+        with track_ffmpeg(FfmpegProcesses()) as processes:
+            job.on_cancel(processes.kill)
+            if job.kind == 'dynamic':
+                self._run_dynamic(job)
+            elif job.kind == 'problem':
+                self._run_problem(job)
+            else:
+                job.finish('error', error=f"Unknown job kind: {job.kind}")
+
+    def _relay_render(self, job: Job, handle: RenderHandle, step: int, total_steps: int,
+                      total_animations: Optional[int] = None, on_line=None, on_segment=None,
+                      label: str = 'Rendering', timer: Optional[StageTimer] = None):
+        """Turn a render's output into coalesced progress events and error logs"""
+        progress = RenderProgress(total_animations)
+        started = time.monotonic()
+
+        def emit(update):
+            if update['animation'] is not None:
+                message = (f"{label} animation {update['animation'] + 1}/{update['total_animations']}: "
+                           f"{update['percentage']}%")
+            else:
+                message = f"{label}: {update['percentage']}%"
+            job.emit('progress', message=message, step=step, totalSteps=total_steps, **update)
+
+        # Manim writes progress bars to stderr, e.g.
+        # "Animation 0: Create(Square):  50%|#####     | 15/30 [00:00<00:00, 60.1frames/s]"
+        for stream, line in handle.lines():
+            if on_line:
+                on_line()
+            if stream == 'segment':
+                if on_segment:
+                    on_segment(line)
+                continue
+            if stream != 'stderr':
+                continue
+            bar = parse_tqdm(line)
+            if bar:
+                update = progress.update(bar)
+                if update:
+                    emit(update)
+            elif "Error" in line or "Exception" in line:
+                job.emit('log', message=line.strip())
+
+        update = progress.flush()
+        if update and handle.result['ok']:
+            emit(update)
+
+        (timer or job.timer).update(handle.timings)
+        kind = f"{job.kind}_draft" if job.phase == 'draft' else job.kind
+        if handle.result.get('cancelled'):
+            outcome = 'cancelled'
+        else:
+            outcome = 'ok' if handle.result['ok'] else 'error'
+        RENDER_SECONDS.labels(kind, outcome).observe(time.monotonic() - started)
+        # A cancelled render was killed with SIGKILL too, but not by the OOM killer
+        if handle.result.get('returncode') == -9 and not handle.result.get('cancelled'):
+            OOM_KILLS.labels(job.kind).inc()
+        partial_cache = handle.result.get('partial_cache')
+        if partial_cache:
+            PARTIAL_CACHE_LOOKUPS.labels('hit').inc(partial_cache['hits'])
+            PARTIAL_CACHE_LOOKUPS.labels('miss').inc(partial_cache['misses'])
+        tex_cache = handle.result.get('tex_cache')
+        if tex_cache:
+            TEX_CACHE_LOOKUPS.labels('hit').inc(tex_cache['hits'])
+            TEX_CACHE_LOOKUPS.labels('miss').inc(tex_cache['misses'])
+            TEX_COMPILE_SECONDS.inc(tex_cache['compile_seconds'])
+            TEX_SECONDS_SAVED.inc(tex_cache['seconds_saved'])
+
+    @staticmethod
+    def _timed_tts(job: Job, narration: str, audio_path: Path) -> bool:
+        with job.timer.stage('tts'):
+            return generate_tts(narration, audio_path)
+
+    def _report_tts(self, job: Job, tts_future):
+        """Emit the event describing a finished narration synthesis"""
+        try:
+            if tts_future.result():
+                job.emit('tts', status='complete', message='Narration audio ready')
+            else:
+                job.emit('tts', status='failed', error='TTS generation failed')
+        except Exception as e:
+            job.emit('tts', status='failed', error=str(e))
+
+    def _start_tts(self, job: Job, narration: str, job_dir: Path):
+        """Start synthesizing the narration; it runs while the scene renders"""
+        job_dir.mkdir(parents=True, exist_ok=True)
+        tts_future = self.tts_executor.submit(self._timed_tts, job, narration, job_dir / "narration.wav")
+        # A synthesis that has not started yet is dropped; one in flight finishes unheard
+        job.on_cancel(tts_future.cancel)
+        job.emit('tts', status='started', message='Generating audio...')
+        return tts_future
+
+    @staticmethod
+    def _remove_job_dir(job_dir: Path, tts_future=None):
+        """
+        Delete a job's scratch directory, once a narration synthesis that
+        could not be cancelled has finished writing into it
+        """
+        if tts_future:
+            tts_future.add_done_callback(lambda _: shutil.rmtree(job_dir, ignore_errors=True))
+        else:
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+    def _write_code(self, job: Job) -> Path:
+        # Write code to temporary file (in temp dir to avoid Flask auto-reload)
+        code_file = self.temp_dir / f"{job.id}.py"
+        with job.timer.stage('code_write'):
+            with open(code_file, 'w') as f:
+                f.write(job.params['code'])
+        return code_file
+
+    def _fail_render(self, job: Job, handle: RenderHandle):
+        """Finish the job with the error for a failed render"""
+        result = handle.result
+        stdout, stderr = handle.stdout, handle.stderr
+        # Exit code -9 means killed by OS (usually OOM)
+        if result.get('returncode') == -9:
+            error_msg = "Rendering failed: Out of memory. Try a simpler problem or shorter explanation."
+            print(f"[ERROR] OOM Kill detected (exit code -9)")
+            job.finish('error', error=error_msg,
+                       details='The visualization was too complex for available memory. Please try a simpler problem.')
+        else:
+            error_msg = f"Render failed: {result.get('error')}"
+            details = stderr if stderr else stdout
+            print(f"[ERROR] {error_msg}: {details}")
+            job.finish('error', error=error_msg, details=details)
+
+    def _package(self, job: Job, video_path: Path, video_id: str, job_dir: Path, hls: bool = True) -> Optional[str]:
+        """
+        Make a finished video fast-start and, if enabled and long enough, package
+        it as HLS into the public directory (both without re-encoding)
+
+        Returns:
+            The HLS playlist URL, or None
+        """
+        with job.timer.stage('package'):
+            ffmpeg = ffmpeg_path()
+            if not ffmpeg:
+                print(f"[API] ffmpeg not found, publishing {video_id} as written")
+                return None
+            try:
+                if make_fast_start(video_path, ffmpeg):
+                    print(f"[API] Moved the moov atom of {video_id} to the front")
+            except (subprocess.CalledProcessError, OSError) as e:
+                print(f"[API] Fast-start remux of {video_id} failed: {getattr(e, 'stderr', '') or e}")
+
+            if not (hls and HLS_ENABLED):
+                return None
+            try:
+                if probe_media(ffmpeg, video_path)['duration'] < HLS_MIN_SECONDS:
+                    return None
+                staging = job_dir / HLS_DIR
+                package_hls(video_path, staging, ffmpeg=ffmpeg)
+                self.hls_dir.mkdir(exist_ok=True)
+                # The playlist appears together with all of its segments
+                os.replace(staging, self.hls_dir / video_id)
+            except (subprocess.CalledProcessError, ValueError, OSError) as e:
+                print(f"[API] HLS packaging of {video_id} failed: {getattr(e, 'stderr', '') or e}")
+                return None
+        return self._hls_url(video_id)
+
+    def _start_live(self, job: Job) -> Optional[LivePlaylist]:
+        """Start the job's live playlist and announce it to the client"""
+        ffmpeg = ffmpeg_path()
+        if not ffmpeg:
+            print(f"[API] ffmpeg not found, job {job.id} renders without a live stream")
+            return None
+        live = LivePlaylist(self.media_dir / LIVE_DIR / job.id, ffmpeg)
+        job.emit('live', playlist_url=f"/live/{job.id}/{LIVE_PLAYLIST}",
+                 message='Playback can start after the first animation')
+        return live
+
+    def _render(self, job: Job, render_id: str, video_dir: Path, output_file: str,
+                **options) -> Tuple[RenderHandle, Path]:
+        """
+        Start a render whose movie Manim writes to video_dir; cancelling the
+        job kills the render
+
+        Returns:
+            The render handle and the path the finished movie will have
+        """
+        job.raise_if_cancelled()
+        video_dir.mkdir(parents=True, exist_ok=True)
+        handle = self.pool.render({
+            "id": render_id,
+            "output_file": output_file,
+            "video_dir": str(video_dir.absolute()),
+            **options,
+        })
+        job.on_cancel(handle.cancel)
+        return handle, video_dir / f"{output_file}.mp4"
+
+    def _run_draft(self, job: Job):
+        """
+        First pass of a preview job: a quick low-resolution render published
+        in a "preview" event, after which the job is queued for its final render
+        """
+        narration = job.params.get('narration', '')
+        draft_id = f"{job.id}-draft"
+        job_dir = self.work_dir / job.id
+        code_file = self._write_code(job)
+
+        def clean_up():
+            tts_future = job.context.pop('tts_future', None)
+            if tts_future:
+                tts_future.cancel()
+            self._remove_job_dir(job_dir, tts_future)
+            code_file.unlink(missing_ok=True)
+
+        deferred = False
+        started = time.monotonic()
+        try:
+            # Narration keeps synthesizing until the final pass picks it up
+            if narration and TTS_AVAILABLE:
+                job.context['tts_future'] = self._start_tts(job, narration, job_dir)
+
+            handle, video_path = self._render(job, draft_id, job_dir / "draft", f"scene_{draft_id}", kind="dynamic",
+                                              code_file=str(code_file.absolute()),
+                                              render_config=DRAFT_RENDER_CONFIG)
+            draft_timer = StageTimer()
+            self._relay_render(job, handle, step=1, total_steps=3,
+                               total_animations=count_animations(job.params['code']),
+                               label='Rendering preview', timer=draft_timer)
+            job.raise_if_cancelled()
+            if not handle.result['ok']:
+                # The final render would fail the same way
+                self._fail_render(job, handle)
+                return
+
+            if video_path.exists():
+                public_file = self.media_dir / f"{draft_id}.mp4"
+                self._package(job, video_path, draft_id, job_dir, hls=False)
+                job.raise_if_cancelled()
+                publish_video(video_path, public_file)
+                job.emit('preview', success=True, video_id=draft_id, video_url=f'/video/{draft_id}',
+                         file_path=str(public_file), timings=draft_timer.as_dict(),
+                         partial_cache=handle.result.get('partial_cache'),
+                         tex_cache=handle.result.get('tex_cache'))
+            else:
+                print(f"[API] Draft video for job {job.id} not found, skipping preview")
+            # The narration may still be writing to job_dir
+            shutil.rmtree(job_dir / "draft", ignore_errors=True)
+
+            job.timer.add('draft', time.monotonic() - started)
+            job.defer('final', PRIORITY_FINAL)
+            # Cancelled while the final pass waits in the queue, the job never runs again
+            job.context['draft_cleanup'] = clean_up
+            job.on_cancel(lambda: self._clean_up_draft(job))
+            deferred = True
+        finally:
+            if not deferred:
+                clean_up()
+
+    @staticmethod
+    def _clean_up_draft(job: Job):
+        """Remove a preview job's scratch files, unless its final pass has taken them over"""
+        clean_up = job.context.pop('draft_cleanup', None)
+        if clean_up:
+            clean_up()
+
+    def _run_dynamic(self, job: Job):
+        if job.phase == 'draft':
+            self._run_draft(job)
+            return
+
+        code = job.params['code']
+        narration = job.params.get('narration', '')
+        # Preview jobs have already shown a draft: draft, final render, narration
+        total_steps = 3 if job.params.get('preview') else 2
+
+        viz_id = job.id
+        output_file = f"scene_{viz_id}"
+
+        # Per-job scratch directory for the render, audio and mux intermediates
+        job_dir = self.work_dir / viz_id
+        audio_path = job_dir / "narration.wav"
+
+        # The final pass cleans up after the draft from here on
+        job.context.pop('draft_cleanup', None)
+        code_file = self._write_code(job)
+
+        # A draft pass may already have started the narration
+        tts_future = job.context.pop('tts_future', None)
+        live = None
+        try:
+            if job.params.get('live'):
+                live = self._start_live(job)
+
+            # The narration is known up front, so synthesize it while the scene renders
+            if narration and TTS_AVAILABLE and not tts_future:
+                tts_future = self._start_tts(job, narration, job_dir)
+            tts_reported = False
+
+            # Render on a pre-warmed worker from the pool
+            print(f"[DEBUG] Code file: {code_file}")
+            print(f"[DEBUG] Output file: {output_file}")
+
+            handle, video_path = self._render(job, viz_id, job_dir, output_file, kind="dynamic",
+                                              code_file=str(code_file.absolute()), live=live is not None)
+
+            print(f"[DEBUG] Render started on worker PID: {handle.worker.pid}")
+
+            def check_tts():
+                nonlocal tts_reported
+                if tts_future and not tts_reported and tts_future.done():
+                    tts_reported = True
+                    self._report_tts(job, tts_future)
+
+            self._relay_render(job, handle, step=total_steps - 1, total_steps=total_steps,
+                               total_animations=count_animations(code), on_line=check_tts,
+                               on_segment=live.add if live else None)
+            job.raise_if_cancelled()
+            if live:
+                # Every animation has been rendered: close the playlist before "complete"
+                live.finish()
+
+            result = handle.result
+            stdout, stderr = handle.stdout, handle.stderr
+
+            print(f"[DEBUG] Render completed: {result}")
+            print(f"[DEBUG] STDOUT: {stdout[:500] if stdout else 'None'}")
+            print(f"[DEBUG] STDERR: {stderr[:500] if stderr else 'None'}")
+
+            if not result['ok']:
+                self._fail_render(job, handle)
+                return
+
+            # Clean up code file
+            if code_file.exists():
+                code_file.unlink()
+
+            if not video_path.exists():
+                job.finish('error', error='Video file not found', expected=str(video_path))
+                return
+
+            # Generate TTS and combine with video if narration is provided
+            final_video_path = video_path
+            has_audio = False
+
+            if tts_future:
+                job.emit('progress', message='Adding narration...', step=total_steps, totalSteps=total_steps)
+                # Only now do we wait for the narration started alongside the render
+                tts_ok = False
+                try:
+                    with job.timer.stage('tts_wait'):
+                        tts_ok = job.wait_for(tts_future)
+                except JobCancelled:
+                    raise
+                except Exception as e:
+                    print(f"[API] TTS raised: {e}")
+                if not tts_reported:
+                    tts_reported = True
+                    self._report_tts(job, tts_future)
+
+                if tts_ok:
+                    job.raise_if_cancelled()
+                    # Combine video with audio
+                    combined_path = job_dir / "with_audio.mp4"
+                    with job.timer.stage('mux'):
+                        combined = combine_video_audio(video_path, audio_path, combined_path, work_dir=job_dir)
+                    if combined:
+                        final_video_path = combined_path
+                        has_audio = True
+                        print(f"[API] Successfully added voice narration to video")
+                    else:
+                        print(f"[API] Failed to combine video and audio, using silent video")
+
+                    # Clean up temporary audio file
+                    if audio_path.exists():
+                        audio_path.unlink()
+                else:
+                    print(f"[API] Failed to generate TTS, using silent video")
+
+            job.raise_if_cancelled()
+            hls_url = self._package(job, final_video_path, viz_id, job_dir)
+            job.raise_if_cancelled()
+
+            # Move final video to public directory
+            public_file = self.media_dir / f"{viz_id}.mp4"
+            with job.timer.stage('publish'):
+                VIDEO_BYTES.labels(job.kind).inc(publish_video(final_video_path, public_file))
+            if narration and not has_audio:
+                FALLBACKS.labels('silent_video').inc()
+
+            # Don't cache a silent fallback for a narrated request
+            if has_audio or not narration:
+                self.cache.store_video(self.cache_key(job.kind, job.params), viz_id, public_file, has_audio=has_audio)
+
+            job.finish('complete', success=True, video_id=viz_id, video_url=f'/video/{viz_id}',
+                       file_path=str(public_file), has_audio=has_audio, hls_url=hls_url,
+                       partial_cache=handle.result.get('partial_cache'),
+                       tex_cache=handle.result.get('tex_cache'))
+        finally:
+            if tts_future:
+                # Don't synthesize narration for a render that never finished
+                tts_future.cancel()
+            if live and job.cancelled:
+                # Nobody is watching: drop the segments written so far
+                live.cancel()
+            elif live:
+                # Segments are read from partial movie files in job_dir (no-op if already closed)
+                live.finish()
+            self._remove_job_dir(job_dir, tts_future)
+            code_file.unlink(missing_ok=True)
+
+    def _run_problem(self, job: Job):
+        problem_data = dict(job.params['problem_data'])
+
+        viz_id = job.id
+        output_file = f"scene_{viz_id}"
+        job_dir = self.work_dir / viz_id
+
+        # Add output file to problem data
+        problem_data['output_file'] = output_file
+
+        try:
+            # Render on a pre-warmed worker from the pool
+            handle, video_path = self._render(job, viz_id, job_dir, output_file, kind="problem",
+                                              problem_data=problem_data)
+            self._relay_render(job, handle, step=1, total_steps=1)
+            job.raise_if_cancelled()
+            result = handle.result
+
+            if not result['ok']:
+                job.finish('error', error="Failed to generate visualization",
+                           details=handle.stderr or result.get('error'))
+                return
+
+            if not video_path.exists():
+                job.finish('error', error="Video file not found", expected=str(video_path))
+                return
+
+            hls_url = self._package(job, video_path, viz_id, job_dir)
+            job.raise_if_cancelled()
+
+            # Move to public directory with consistent naming
+            public_file = self.media_dir / f"{viz_id}.mp4"
+            with job.timer.stage('publish'):
+                VIDEO_BYTES.labels(job.kind).inc(publish_video(video_path, public_file))
+            self.cache.store_video(self.cache_key(job.kind, job.params), viz_id, public_file)
+
+            job.finish('complete', success=True, video_id=viz_id, video_url=f"/video/{viz_id}",
+                       file_path=str(public_file), hls_url=hls_url, partial_cache=handle.result.get('partial_cache'),
+                       tex_cache=handle.result.get('tex_cache'))
+        finally:
+            shutil.rmtree(job_dir, ignore_errors=True)
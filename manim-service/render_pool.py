@@ -0,0 +1,400 @@
+"""
+Pool of pre-warmed Manim render workers
+Each worker is a long-lived render_worker.py process that has already imported
+Manim, so jobs skip interpreter startup, `from manim import *` and font discovery
+"""
+import atexit
+import json
+import os
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from metrics import RENDER_WORKERS
+from render_progress import PipeMultiplexer
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+WORKER_SCRIPT = SCRIPT_DIR / 'render_worker.py'
+
+# Pool configuration (per API process)
+POOL_SIZE = int(os.getenv('RENDER_POOL_SIZE', '1'))  # 0 = one cold process per job
+WORKER_MAX_JOBS = int(os.getenv('RENDER_WORKER_MAX_JOBS', '25'))
+WORKER_MAX_RSS_MB = float(os.getenv('RENDER_WORKER_MAX_RSS_MB', '1024'))
+JOB_TIMEOUT = float(os.getenv('RENDER_JOB_TIMEOUT', '600'))
+
+# Written by the worker to stdout and stderr after every job
+JOB_END_MARKER = "__QED_JOB_END__"
+
+
+class RenderWorker:
+    """A single render_worker.py process and the selector draining its pipes"""
+
+    def __init__(self, python_path: str, warm_up: bool = True):
+        self.started = time.monotonic()
+        read_fd, write_fd = os.pipe()
+        args = [python_path, str(WORKER_SCRIPT), str(write_fd)]
+        if not warm_up:
+            args.append('--no-warmup')
+
+        self.process = subprocess.Popen(
+            args,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=SCRIPT_DIR,
+            env=self._worker_env(),
+            pass_fds=(write_fd,),
+            start_new_session=True,
+        )
+        os.close(write_fd)
+
+        # stdout, stderr and the result channel are drained together by a
+        # selector whenever someone is waiting on the worker
+        self.output = PipeMultiplexer()
+        self.output.register(self.process.stdout, 'stdout')
+        self.output.register(self.process.stderr, 'stderr')
+        self.output.register(os.fdopen(read_fd, 'rb', buffering=0), 'results', split_cr=False)
+        self.ready = False
+        self.jobs_done = 0
+        self.rss_mb = 0.0
+
+        print(f"[POOL] Started render worker PID {self.pid} (warm_up={warm_up})")
+
+    @staticmethod
+    def _worker_env() -> dict:
+        env = dict(os.environ)
+        # Log lines should reach us as they are written, not when a buffer fills
+        env['PYTHONUNBUFFERED'] = '1'
+        # Metrics are recorded by the API process; workers must not leave
+        # samples of their own in the shared multiprocess directory
+        env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+        return env
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+
+    def read_events(self, timeout: Optional[float]) -> List[Tuple[str, object]]:
+        """
+        Wait up to timeout seconds for worker output
+
+        Returns:
+            ('stdout' | 'stderr', line), ('ready' | 'result' | 'segment', message) and,
+            once every pipe has closed, ('exit', returncode)
+        """
+        events = []
+        for name, line in self.output.read(timeout):
+            if name != 'results':
+                events.append((name, line))
+                continue
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            events.append((message.get('type', 'result'), message))
+
+        if not self.output.open:
+            # All pipes closed: the worker has exited (or was killed)
+            try:
+                returncode = self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.kill()
+                returncode = self.process.returncode
+            events.append(('exit', returncode))
+        return events
+
+    def submit(self, job: dict, timeout: float) -> 'RenderHandle':
+        # Drop output left over from warm-up or a previous job
+        backlog = []
+        while not backlog:
+            events = self.read_events(0)
+            if not events:
+                break
+            for kind, payload in events:
+                if kind == 'ready':
+                    self.ready = True
+                elif kind == 'exit':
+                    backlog.append((kind, payload))
+
+        self.process.stdin.write((json.dumps(job) + "\n").encode())
+        self.process.stdin.flush()
+        return RenderHandle(self, job['id'], timeout, backlog)
+
+    def retire(self, grace: float = 10.0):
+        """Ask the worker to exit after its current job, killing it if it lingers"""
+        def _shutdown():
+            try:
+                self.process.stdin.close()
+            except (OSError, ValueError):
+                pass
+            try:
+                self.process.wait(timeout=grace)
+            except subprocess.TimeoutExpired:
+                self.kill()
+
+        threading.Thread(target=_shutdown, daemon=True).start()
+
+    def kill(self):
+        """Kill the worker and any children it spawned (latex, ffmpeg, ...)"""
+        try:
+            os.killpg(self.process.pid, 9)
+        except (ProcessLookupError, PermissionError):
+            pass
+        self.process.wait()
+
+
+class RenderHandle:
+    """A job running on a worker; iterate lines() to follow its output"""
+
+    def __init__(self, worker: RenderWorker, job_id: str, timeout: float, backlog: Optional[list] = None):
+        self.worker = worker
+        self.job_id = job_id
+        self.timeout = timeout
+        self.result: Optional[dict] = None
+        self.on_finish = None
+        self.cancelled = False
+        # Worker-side stages from the result, plus how long this job waited
+        # for its worker process to start (0 on a warm worker)
+        self.timings = {}
+        self.submitted = time.monotonic()
+        self._awaiting_ready = not worker.ready
+        self._backlog = backlog or []
+        self._stdout = []
+        self._stderr = []
+
+    @property
+    def stdout(self) -> str:
+        return ''.join(self._stdout)
+
+    @property
+    def stderr(self) -> str:
+        return ''.join(self._stderr)
+
+    def lines(self) -> Iterator[Tuple[str, str]]:
+        """
+        Yield (stream, line) pairs until the job has finished, plus
+        ('segment', path) for each finished partial movie file of a live render
+
+        Both pipes are read as data arrives, and tqdm's carriage-return
+        redraws come through as separate lines
+        """
+        deadline = time.monotonic() + self.timeout
+        pending_markers = {'stdout', 'stderr'}
+        events = self._backlog
+        result = None
+        try:
+            while result is None or pending_markers:
+                if not events:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        print(f"[POOL] Job {self.job_id} timed out after {self.timeout:.0f}s, killing worker {self.worker.pid}")
+                        self.worker.kill()
+                        result = {"ok": False, "returncode": None, "error": f"Render timed out after {self.timeout:.0f}s"}
+                        break
+                    events = self.worker.read_events(remaining)
+                    continue
+                kind, payload = events.pop(0)
+
+                if kind == 'ready':
+                    self.worker.ready = True
+                    if self._awaiting_ready:
+                        manim_import = payload.get('manim_import', 0.0)
+                        self.timings['spawn'] = max(0.0, time.monotonic() - self.submitted - manim_import)
+                        self.timings['manim_import'] = manim_import
+                elif kind in ('stdout', 'stderr'):
+                    if payload.startswith(JOB_END_MARKER):
+                        pending_markers.discard(kind)
+                        continue
+                    if not self.worker.ready or not payload.strip():
+                        # Warm-up output, or the blank line preceding a marker
+                        continue
+                    (self._stdout if kind == 'stdout' else self._stderr).append(payload)
+                    yield kind, payload
+                elif kind == 'segment' and payload.get('id') == self.job_id:
+                    # A finished partial movie file of a live render
+                    yield kind, payload['path']
+                elif kind == 'result' and payload.get('id') == self.job_id:
+                    result = payload
+                    self.timings.update(payload.get('timings') or {})
+                elif kind == 'exit':
+                    if self.cancelled:
+                        result = {"ok": False, "returncode": payload, "error": "Render cancelled", "cancelled": True}
+                    else:
+                        result = {"ok": False, "returncode": payload,
+                                  "error": f"Render worker exited with code {payload}"}
+                    break
+        finally:
+            if result is None:
+                # Consumer went away mid-render: nobody will read this output
+                self.worker.kill()
+                result = {"ok": False, "returncode": None, "error": "Render abandoned"}
+            self.result = result
+            if self.on_finish:
+                self.on_finish(self)
+
+    def cancel(self):
+        """
+        Stop the render by killing its worker's process group; lines() then
+        ends with a cancelled result and the pool replaces the worker
+        """
+        self.cancelled = True
+        if self.result is None:
+            print(f"[POOL] Job {self.job_id} cancelled, killing worker {self.worker.pid}")
+            self.worker.kill()
+
+    def wait(self) -> dict:
+        """Block until the job has finished and return its result"""
+        for _ in self.lines():
+            pass
+        return self.result
+
+
+class RenderPool:
+    """Hands out warm workers and recycles them after N jobs, an RSS threshold or a failed job"""
+
+    def __init__(self, python_path: str, size: int = POOL_SIZE, max_jobs: int = WORKER_MAX_JOBS,
+                 max_rss_mb: float = WORKER_MAX_RSS_MB, job_timeout: float = JOB_TIMEOUT):
+        self.python_path = python_path
+        self.size = size
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.job_timeout = job_timeout
+        self._workers = set()
+        self._idle = []
+        self._cold = 0
+        self._cond = threading.Condition()
+        atexit.register(self.shutdown)
+
+    def start(self):
+        """Spawn workers up to the pool size so they warm up in the background"""
+        with self._cond:
+            while len(self._workers) < self.size:
+                self._spawn()
+            self._update_gauges()
+
+    def _spawn(self) -> RenderWorker:
+        worker = RenderWorker(self.python_path)
+        self._workers.add(worker)
+        self._idle.append(worker)
+        return worker
+
+    def _update_gauges(self):
+        """Publish worker counts (call with self._cond held)"""
+        idle = len(self._idle)
+        RENDER_WORKERS.labels('idle').set(idle)
+        RENDER_WORKERS.labels('busy').set(len(self._workers) - idle + self._cold)
+
+    def _acquire(self) -> RenderWorker:
+        with self._cond:
+            while True:
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.is_alive():
+                        self._update_gauges()
+                        return worker
+                    print(f"[POOL] Worker {worker.pid} died while idle, replacing it")
+                    self._workers.discard(worker)
+                if len(self._workers) < self.size:
+                    self._spawn()
+                    continue
+                self._cond.wait()
+
+    def _release(self, handle: RenderHandle):
+        worker = handle.worker
+        worker.jobs_done += 1
+        worker.rss_mb = handle.result.get('rss_mb', worker.rss_mb)
+
+        recycle_reason = None
+        if not worker.is_alive() or 'rss_mb' not in handle.result:
+            recycle_reason = "worker exited"
+        elif not handle.result.get('ok'):
+            # Generated code runs in a fresh namespace, but a failed job may leave
+            # Manim's module-level state (config, patched classes) half changed
+            recycle_reason = "job failed"
+        elif worker.jobs_done >= self.max_jobs:
+            recycle_reason = f"reached {self.max_jobs} jobs"
+        elif worker.rss_mb > self.max_rss_mb:
+            recycle_reason = f"RSS {worker.rss_mb:.0f}MB above {self.max_rss_mb:.0f}MB"
+
+        with self._cond:
+            if recycle_reason:
+                print(f"[POOL] Recycling worker {worker.pid}: {recycle_reason}")
+                self._workers.discard(worker)
+                worker.retire()
+                if len(self._workers) < self.size:
+                    self._spawn()
+            else:
+                self._idle.append(worker)
+            self._update_gauges()
+            self._cond.notify()
+
+    def render(self, job: dict) -> RenderHandle:
+        """
+        Start a render job on a warm worker
+
+        Args:
+            job: {"id", "kind": "dynamic"|"problem", "output_file",
+                  "code_file" (dynamic) or "problem_data" (problem)}
+
+        Returns:
+            RenderHandle: iterate handle.lines() or call handle.wait()
+        """
+        if self.size <= 0:
+            # Pool disabled: one cold process per job, as before
+            worker = RenderWorker(self.python_path, warm_up=False)
+            with self._cond:
+                self._cold += 1
+                self._update_gauges()
+
+            def _finish_cold(_handle):
+                worker.retire()
+                with self._cond:
+                    self._cold -= 1
+                    self._update_gauges()
+
+            try:
+                handle = worker.submit(job, self.job_timeout)
+            except OSError:
+                _finish_cold(None)
+                raise
+            # The job waited for this process from the moment it was launched
+            handle.submitted = worker.started
+            handle.on_finish = _finish_cold
+            return handle
+
+        worker = self._acquire()
+        try:
+            handle = worker.submit(job, self.job_timeout)
+        except (BrokenPipeError, OSError):
+            # Worker died between acquire and submit; let it be replaced
+            handle = RenderHandle(worker, job['id'], self.job_timeout)
+            handle.result = {"ok": False, "returncode": worker.process.poll(), "error": "Render worker unavailable"}
+            self._release(handle)
+            raise
+        handle.on_finish = self._release
+        return handle
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "busy": len(self._workers) - len(self._idle),
+                "workers": [
+                    {"pid": w.pid, "jobs_done": w.jobs_done, "rss_mb": round(w.rss_mb, 1)}
+                    for w in self._workers
+                ],
+            }
+
+    def shutdown(self):
+        with self._cond:
+            for worker in self._workers:
+                worker.retire(grace=2.0)
+            self._workers.clear()
+            self._idle.clear()
+            self._update_gauges()
@@ -0,0 +1,188 @@
+"""
+Render output multiplexing and progress parsing
+Drains a render worker's pipes with a selector so no pipe can fill up and stall
+the render, splits tqdm's carriage-return updates into lines, and turns Manim's
+progress bars into coalesced progress events
+"""
+import codecs
+import os
+import re
+import selectors
+import time
+from typing import List, Optional, Tuple
+
+PROGRESS_MAX_HZ = float(os.getenv('RENDER_PROGRESS_MAX_HZ', '4'))
+
+# Manim's progress bar, e.g.
+#   "Animation 3: Create(Square):  50%|#####     | 15/30 [00:00<00:00, 60.1frames/s]"
+TQDM_PATTERN = re.compile(
+    r"(?:Animation\s+(?P<animation>\d+)\s*:.*?)?(?P<percentage>\d+)%\|[^|]*\|\s*(?P<frame>\d+)/(?P<frames>\d+)"
+)
+
+# Calls that Manim counts as one animation each (self.wait() is a play too)
+ANIMATION_CALL_PATTERN = re.compile(r"\bself\.(?:play|wait)\s*\(")
+
+READ_SIZE = 65536
+
+
+class _LineBuffer:
+    """Incrementally decodes one pipe and splits it into lines"""
+
+    def __init__(self, name: str, stream, split_cr: bool):
+        self.name = name
+        self.stream = stream
+        self.separators = re.compile(r"[^\r\n]*(?:\r\n|\r|\n)" if split_cr else r"[^\n]*\n")
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._partial = ''
+
+    def feed(self, data: bytes) -> List[str]:
+        text = self._partial + self._decoder.decode(data, final=not data)
+        lines = self.separators.findall(text)
+        self._partial = text[sum(len(line) for line in lines):]
+        if not data and self._partial:
+            # EOF: whatever is left is the last line
+            lines.append(self._partial)
+            self._partial = ''
+        return lines
+
+
+class PipeMultiplexer:
+    """Reads several pipes at once, returning complete lines as they arrive"""
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+
+    def register(self, stream, name: str, split_cr: bool = True):
+        """
+        Watch a pipe
+
+        Args:
+            stream: Binary file object of the read end
+            name: Label returned with every line read from it
+            split_cr: Treat a bare carriage return as a line break (tqdm redraws)
+        """
+        os.set_blocking(stream.fileno(), False)
+        self._selector.register(stream, selectors.EVENT_READ, _LineBuffer(name, stream, split_cr))
+
+    @property
+    def open(self) -> bool:
+        """True while at least one pipe has not reached EOF"""
+        return bool(self._selector.get_map())
+
+    def read(self, timeout: Optional[float]) -> List[Tuple[str, str]]:
+        """
+        Wait up to timeout seconds for output
+
+        Returns:
+            (name, line) pairs in arrival order; empty on timeout
+        """
+        if not self.open:
+            return []
+        lines = []
+        for key, _ in self._selector.select(timeout):
+            buffer = key.data
+            try:
+                data = os.read(key.fd, READ_SIZE)
+            except BlockingIOError:
+                continue
+            except OSError:
+                data = b''
+            lines.extend((buffer.name, line) for line in buffer.feed(data))
+            if not data:
+                self._selector.unregister(buffer.stream)
+                buffer.stream.close()
+        return lines
+
+    def close(self):
+        for key in list(self._selector.get_map().values()):
+            self._selector.unregister(key.fileobj)
+            key.fileobj.close()
+        self._selector.close()
+
+
+def parse_tqdm(line: str) -> Optional[dict]:
+    """
+    Parse a Manim progress bar line
+
+    Returns:
+        {"animation": index or None, "percentage", "frame", "frames"}, or None
+        when the line is not a progress bar
+    """
+    match = TQDM_PATTERN.search(line)
+    if not match:
+        return None
+    animation = match.group('animation')
+    return {
+        "animation": int(animation) if animation is not None else None,
+        "percentage": int(match.group('percentage')),
+        "frame": int(match.group('frame')),
+        "frames": int(match.group('frames')),
+    }
+
+
+def count_animations(code: str) -> Optional[int]:
+    """Estimate how many animations generated scene code plays (loops make it a lower bound)"""
+    count = len(ANIMATION_CALL_PATTERN.findall(code))
+    return count or None
+
+
+class RenderProgress:
+    """
+    Tracks render progress across animations
+
+    Args:
+        total_animations: Expected number of animations, if known. Raised as
+            more animations show up than were expected
+        max_hz: Maximum number of progress updates per second
+    """
+
+    def __init__(self, total_animations: Optional[int] = None, max_hz: float = PROGRESS_MAX_HZ,
+                 clock=time.monotonic):
+        self.total_animations = total_animations
+        self.interval = 1.0 / max_hz if max_hz > 0 else 0.0
+        self._clock = clock
+        self._last_emit = None
+        self._last_sent = None
+        self._pending = None
+
+    def update(self, bar: dict) -> Optional[dict]:
+        """
+        Feed one parsed progress bar (see parse_tqdm)
+
+        Returns:
+            A progress update if one is due, otherwise None (the latest
+            update is held back until the interval has passed)
+        """
+        animation = bar['animation']
+        if animation is not None and (self.total_animations or 0) <= animation:
+            self.total_animations = animation + 1
+
+        if animation is not None and self.total_animations:
+            overall = (animation + bar['frame'] / max(1, bar['frames'])) / self.total_animations
+            percentage = min(100, int(overall * 100))
+        else:
+            percentage = bar['percentage']
+
+        self._pending = {
+            "percentage": percentage,
+            "animation": animation,
+            "total_animations": self.total_animations,
+            "animation_percentage": bar['percentage'],
+        }
+        return self._take(force=False)
+
+    def flush(self) -> Optional[dict]:
+        """Return the held-back update, if any"""
+        return self._take(force=True)
+
+    def _take(self, force: bool) -> Optional[dict]:
+        if self._pending is None or self._pending == self._last_sent:
+            self._pending = None
+            return None
+        now = self._clock()
+        if not force and self._last_emit is not None and now - self._last_emit < self.interval:
+            return None
+        update, self._pending = self._pending, None
+        self._last_emit = now
+        self._last_sent = update
+        return update
@@ -0,0 +1,153 @@
+"""
+Long-lived Manim render worker
+Imports Manim once, renders a warm-up scene, then executes render jobs sent by
+the API process (see render_pool.py)
+
+Protocol:
+    stdin       one JSON job per line
+    result fd   one JSON message per line ("ready" once, then one "result" per job)
+    stdout/err  regular Manim output (progress bars, logs, tracebacks)
+"""
+import json
+import os
+import resource
+import sys
+import time
+import traceback
+
+IMPORT_STARTED = time.monotonic()
+from manim import *
+MANIM_IMPORT_SECONDS = time.monotonic() - IMPORT_STARTED
+
+from dynamic_scene_generator import execute_generated_code
+from partial_cache import SharedPartialCache
+from render_pool import JOB_END_MARKER
+from scene_generator import generate_scene
+from stage_timer import StageTimer
+from tex_cache import SharedTexCache, load_prewarm_expressions
+
+
+class WarmupScene(Scene):
+    """Tiny scene that exercises Cairo, Pango and font discovery"""
+
+    def construct(self):
+        square = Square(color=BLUE)
+        label = Text("QED", font_size=36)
+        self.play(Create(square), Write(label), run_time=0.1)
+
+
+def warm_up():
+    """Render the warm-up scene without writing any files"""
+    start = time.monotonic()
+    try:
+        with tempconfig({"dry_run": True, "progress_bar": "none", "media_dir": "./media"}):
+            WarmupScene().render()
+        print(f"[WORKER] Warm-up finished in {time.monotonic() - start:.2f}s", file=sys.stderr)
+    except Exception as e:
+        # A failed warm-up only costs us the speedup, never the worker
+        print(f"[WORKER] Warm-up failed: {e}", file=sys.stderr)
+
+
+def prewarm_tex():
+    """Compile the common expressions that are not in the shared TeX cache yet"""
+    start = time.monotonic()
+    for expression in load_prewarm_expressions():
+        try:
+            MathTex(expression)
+        except Exception as e:
+            print(f"[WORKER] TeX prewarm failed for {expression!r}: {e}", file=sys.stderr)
+    stats = TEX_CACHE.job_stats()
+    TEX_CACHE.reset_job_stats()
+    print(f"[WORKER] TeX prewarm compiled {stats['misses']} expressions "
+          f"({stats['hits']} already cached) in {time.monotonic() - start:.2f}s", file=sys.stderr)
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in megabytes"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # macOS reports peak RSS in bytes, Linux in kilobytes
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+# Animation segments shared with every other worker (PARTIAL_CACHE_DIR, PARTIAL_CACHE_MAX_MB)
+PARTIAL_CACHE = SharedPartialCache()
+# Compiled MathTex/Tex shared with every other worker (TEX_CACHE_DIR, TEX_CACHE_MAX_MB)
+TEX_CACHE = SharedTexCache()
+
+
+def run_job(job: dict, timer: StageTimer, on_segment=None):
+    """
+    Render a single job, restoring the global Manim config afterwards
+
+    Generated code runs in a namespace of its own (see execute_generated_code),
+    but changes it makes to Manim's modules outlive the job; the pool replaces
+    a worker after any failed job and after RENDER_WORKER_MAX_JOBS jobs
+    """
+    with tempconfig({}):
+        if job.get('video_dir'):
+            # Deterministic movie path; partial movie files go beneath it too
+            config.video_dir = job['video_dir']
+        if job['kind'] == 'dynamic':
+            with open(job['code_file'], 'r') as f:
+                code = f.read()
+            execute_generated_code(code, job['output_file'], timer=timer,
+                                   render_config=job.get('render_config'), partial_cache=PARTIAL_CACHE,
+                                   on_segment=on_segment)
+        elif job['kind'] == 'problem':
+            config.media_dir = "./media"
+            generate_scene(job['problem_data'], job['output_file'], timer=timer, partial_cache=PARTIAL_CACHE,
+                           on_segment=on_segment)
+        else:
+            raise ValueError(f"Unknown job kind: {job['kind']}")
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python render_worker.py <result_fd> [--no-warmup]")
+        sys.exit(1)
+
+    results = os.fdopen(int(sys.argv[1]), 'w', buffering=1)
+
+    def send(message: dict):
+        results.write(json.dumps(message) + "\n")
+
+    TEX_CACHE.install()
+    if '--no-warmup' not in sys.argv:
+        warm_up()
+        prewarm_tex()
+    send({"type": "ready", "pid": os.getpid(), "manim_import": MANIM_IMPORT_SECONDS})
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        start = time.monotonic()
+        timer = StageTimer()
+        PARTIAL_CACHE.reset_job_stats()
+        TEX_CACHE.reset_job_stats()
+        on_segment = None
+        if job.get('live'):
+            def on_segment(path, job_id=job['id']):
+                send({"type": "segment", "id": job_id, "path": path})
+        try:
+            run_job(job, timer, on_segment)
+            message = {"type": "result", "id": job['id'], "ok": True}
+        except Exception as e:
+            traceback.print_exc()
+            message = {"type": "result", "id": job['id'], "ok": False, "error": str(e)}
+        message.update(duration=time.monotonic() - start, rss_mb=current_rss_mb(), timings=timer.as_dict(),
+                       partial_cache=PARTIAL_CACHE.job_stats(), tex_cache=TEX_CACHE.job_stats())
+
+        # Mark the end of this job's output on both streams before reporting
+        print(f"\n{JOB_END_MARKER} {job['id']}", file=sys.stdout, flush=True)
+        print(f"\n{JOB_END_MARKER} {job['id']}", file=sys.stderr, flush=True)
+        send(message)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Safe, vectorized evaluation of user-provided function expressions
+An expression such as "sin(x) / x" or "x^2 - 3*x" is parsed once into an AST,
+checked against a whitelist of operators, functions and constants, and compiled
+into a callable that evaluates a whole NumPy array of sample points at once
+"""
+import ast
+import copy
+from typing import List, Tuple
+
+import numpy as np
+
+MAX_EXPRESSION_LENGTH = 500
+
+# Single-argument functions, plus max/min which compare two values elementwise
+FUNCTIONS = {
+    'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
+    'asin': np.arcsin, 'acos': np.arccos, 'atan': np.arctan,
+    'arcsin': np.arcsin, 'arccos': np.arccos, 'arctan': np.arctan,
+    'sinh': np.sinh, 'cosh': np.cosh, 'tanh': np.tanh,
+    'exp': np.exp, 'log': np.log, 'ln': np.log, 'log10': np.log10, 'log2': np.log2,
+    'sqrt': np.sqrt, 'abs': np.abs, 'floor': np.floor, 'ceil': np.ceil, 'sign': np.sign,
+    'max': np.maximum, 'min': np.minimum,
+}
+BINARY_FUNCTIONS = {'max', 'min'}
+CONSTANTS = {'pi': np.pi, 'e': np.e, 'tau': 2 * np.pi}
+# Prefixes accepted in front of function and constant names, e.g. np.sin(x)
+MODULE_PREFIXES = {'np', 'numpy', 'math'}
+
+_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.FloorDiv)
+
+_TEX_FUNCTIONS = {'sin', 'cos', 'tan', 'sinh', 'cosh', 'tanh', 'ln', 'log', 'exp', 'max', 'min'}
+_TEX_INVERSE = {'asin': 'sin', 'acos': 'cos', 'atan': 'tan',
+                'arcsin': 'sin', 'arccos': 'cos', 'arctan': 'tan'}
+
+
+class ExpressionError(ValueError):
+    """Expression uses syntax, names or functions that are not allowed"""
+
+
+class _Whitelist(ast.NodeTransformer):
+    """Rejects anything but arithmetic on the variable, constants and known functions"""
+
+    def __init__(self, variable: str):
+        self.variable = variable
+
+    def generic_visit(self, node):
+        raise ExpressionError(f"'{type(node).__name__}' is not allowed in a function expression")
+
+    def visit_Expression(self, node):
+        node.body = self.visit(node.body)
+        return node
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ExpressionError(f"Unsupported constant {node.value!r}")
+        return node
+
+    def visit_Name(self, node):
+        if node.id != self.variable and node.id not in CONSTANTS:
+            raise ExpressionError(f"Unknown name '{node.id}'")
+        return node
+
+    def visit_Attribute(self, node):
+        if isinstance(node.value, ast.Name) and node.value.id in MODULE_PREFIXES and node.attr in CONSTANTS:
+            return ast.copy_location(ast.Name(node.attr, ast.Load()), node)
+        raise ExpressionError(f"Unknown name '{ast.unparse(node)}'")
+
+    def visit_UnaryOp(self, node):
+        if not isinstance(node.op, (ast.UAdd, ast.USub)):
+            raise ExpressionError(f"Operator '{type(node.op).__name__}' is not allowed")
+        node.operand = self.visit(node.operand)
+        return node
+
+    def visit_BinOp(self, node):
+        if not isinstance(node.op, _OPERATORS):
+            raise ExpressionError(f"Operator '{type(node.op).__name__}' is not allowed")
+        node.left = self.visit(node.left)
+        node.right = self.visit(node.right)
+        return node
+
+    def visit_Call(self, node):
+        func = node.func
+        if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) and func.value.id in MODULE_PREFIXES:
+            func = ast.copy_location(ast.Name(func.attr, ast.Load()), func)
+        if not isinstance(func, ast.Name) or func.id not in FUNCTIONS:
+            raise ExpressionError(f"Unknown function '{ast.unparse(node.func)}'")
+        if node.keywords:
+            raise ExpressionError(f"{func.id}() does not take keyword arguments")
+        expected = 2 if func.id in BINARY_FUNCTIONS else 1
+        if len(node.args) != expected:
+            raise ExpressionError(f"{func.id}() takes {expected} argument{'s' if expected > 1 else ''}")
+        node.func = func
+        node.args = [self.visit(arg) for arg in node.args]
+        return node
+
+
+class _NumpyConstants(ast.NodeTransformer):
+    """
+    Replace number literals with NumPy floats, so constant subexpressions
+    follow NumPy's rules too: 9**9**9 overflows to inf, 1/0 is inf and
+    (-8)**0.5 is nan, rather than raising or turning complex
+    """
+
+    def __init__(self):
+        self.values = {}
+
+    def visit_Constant(self, node):
+        name = f"_c{len(self.values)}"
+        self.values[name] = np.float64(node.value)
+        return ast.copy_location(ast.Name(name, ast.Load()), node)
+
+
+class CompiledExpression:
+    """A whitelisted expression in one variable, evaluated over arrays"""
+
+    def __init__(self, source: str, tree: ast.Expression, variable: str):
+        self.source = source
+        self.variable = variable
+        self.tree = tree
+        numbers = _NumpyConstants()
+        numeric_tree = ast.fix_missing_locations(numbers.visit(copy.deepcopy(tree)))
+        self._code = compile(numeric_tree, '<expression>', 'eval')
+        self._namespace = {'__builtins__': {}, **FUNCTIONS, **CONSTANTS, **numbers.values}
+
+    def __call__(self, values) -> np.ndarray:
+        """Evaluate at every point of values; undefined points come back as nan or inf"""
+        values = np.asarray(values, dtype=float)
+        with np.errstate(all='ignore'):
+            result = eval(self._code, self._namespace, {self.variable: values})
+        return np.broadcast_to(np.asarray(result, dtype=float), values.shape).copy()
+
+    @property
+    def tex(self) -> str:
+        """The expression as LaTeX, for labels"""
+        return _to_tex(self.tree.body, self.variable)
+
+
+def compile_expression(source: str, variable: str = 'x') -> CompiledExpression:
+    """
+    Parse and check an expression once
+
+    Raises:
+        ExpressionError: on a syntax error or anything outside the whitelist
+    """
+    if not isinstance(source, str) or not source.strip():
+        raise ExpressionError("Expression is empty")
+    if len(source) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"Expression is longer than {MAX_EXPRESSION_LENGTH} characters")
+    try:
+        # "x^2" means a power, as in the TeX people type
+        tree = ast.parse(source.strip().replace('^', '**'), mode='eval')
+    except SyntaxError as e:
+        raise ExpressionError(f"Invalid expression: {e.msg}") from None
+    tree = ast.fix_missing_locations(_Whitelist(variable).visit(tree))
+    return CompiledExpression(source, tree, variable)
+
+
+def sample_function(func, x_range, y_range, samples: int = 200, max_depth: int = 6) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Sample a function for plotting, refining where it changes quickly
+
+    Intervals whose change in y is large compared to the visible y range are
+    bisected (all of them in one vectorized call per pass) up to max_depth
+    times. The curve is split into separate pieces at points that are
+    undefined or far outside the y range, and at jumps that survive the
+    refinement, so asymptotes and steps are not drawn as vertical lines
+
+    Returns:
+        List of (xs, ys) arrays, one per continuous piece
+    """
+    x_min, x_max = float(x_range[0]), float(x_range[1])
+    y_min, y_max = float(y_range[0]), float(y_range[1])
+    span = y_max - y_min
+    steep_step = span * 0.02
+
+    def visible(ys):
+        return np.isfinite(ys) & (ys >= y_min - span) & (ys <= y_max + span)
+
+    def change(ys):
+        # inf - inf is nan, which counts as a change to refine or split at
+        with np.errstate(invalid='ignore'):
+            return np.abs(np.diff(ys))
+
+    def steep(ys):
+        dy = change(ys)
+        shown = visible(ys)
+        either_shown = shown[:-1] | shown[1:]
+        # A finite/undefined boundary (e.g. sqrt near 0) also needs refining
+        return either_shown & ((dy > steep_step) | (shown[:-1] != shown[1:]) | np.isnan(dy))
+
+    xs = np.linspace(x_min, x_max, samples)
+    ys = func(xs)
+    for _ in range(max_depth):
+        refine = steep(ys)
+        if not refine.any():
+            break
+        midpoints = (xs[:-1][refine] + xs[1:][refine]) / 2
+        xs = np.concatenate([xs, midpoints])
+        ys = np.concatenate([ys, func(midpoints)])
+        order = np.argsort(xs, kind='stable')
+        xs, ys = xs[order], ys[order]
+
+    # Still steep after full refinement: a discontinuity, not a steep slope
+    finest = (x_max - x_min) / (samples - 1) / 2 ** max_depth
+    jumps = (change(ys) > steep_step) & (np.diff(xs) <= finest * 1.01)
+    shown = visible(ys)
+
+    pieces = []
+    start = None
+    for i in range(len(xs)):
+        if not shown[i]:
+            if start is not None and i - start >= 2:
+                pieces.append((xs[start:i], ys[start:i]))
+            start = None
+            continue
+        if start is None:
+            start = i
+        if i < len(jumps) and jumps[i]:
+            if i + 1 - start >= 2:
+                pieces.append((xs[start:i + 1], ys[start:i + 1]))
+            start = None
+    if start is not None and len(xs) - start >= 2:
+        pieces.append((xs[start:], ys[start:]))
+    return pieces
+
+
+def _number_tex(value: float) -> str:
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return f"{value:g}"
+
+
+def _to_tex(node: ast.AST, variable: str) -> str:
+    def wrap(child, kinds):
+        text = _to_tex(child, variable)
+        if isinstance(child, ast.BinOp) and isinstance(child.op, kinds):
+            return rf"\left({text}\right)"
+        return text
+
+    if isinstance(node, ast.Constant):
+        return _number_tex(node.value)
+    if isinstance(node, ast.Name):
+        return {'pi': r'\pi', 'tau': r'\tau'}.get(node.id, node.id)
+    if isinstance(node, ast.UnaryOp):
+        sign = '-' if isinstance(node.op, ast.USub) else '+'
+        return sign + wrap(node.operand, (ast.Add, ast.Sub))
+    if isinstance(node, ast.BinOp):
+        left, right = node.left, node.right
+        if isinstance(node.op, ast.Add):
+            return f"{_to_tex(left, variable)} + {_to_tex(right, variable)}"
+        if isinstance(node.op, ast.Sub):
+            return f"{_to_tex(left, variable)} - {wrap(right, (ast.Add, ast.Sub))}"
+        if isinstance(node.op, ast.Mult):
+            return rf"{wrap(left, (ast.Add, ast.Sub))} \cdot {wrap(right, (ast.Add, ast.Sub))}"
+        if isinstance(node.op, ast.Div):
+            return rf"\frac{{{_to_tex(left, variable)}}}{{{_to_tex(right, variable)}}}"
+        if isinstance(node.op, ast.FloorDiv):
+            return rf"\left\lfloor \frac{{{_to_tex(left, variable)}}}{{{_to_tex(right, variable)}}} \right\rfloor"
+        if isinstance(node.op, ast.Mod):
+            return rf"{wrap(left, _OPERATORS)} \bmod {wrap(right, _OPERATORS)}"
+        base = _to_tex(left, variable)
+        if not isinstance(left, (ast.Name, ast.Constant)):
+            base = rf"\left({base}\right)"
+        return f"{base}^{{{_to_tex(right, variable)}}}"
+    if isinstance(node, ast.Call):
+        name = node.func.id
+        args = [_to_tex(arg, variable) for arg in node.args]
+        if name == 'sqrt':
+            return rf"\sqrt{{{args[0]}}}"
+        if name == 'abs':
+            return rf"\left|{args[0]}\right|"
+        if name == 'exp':
+            return f"e^{{{args[0]}}}"
+        if name == 'floor':
+            return rf"\left\lfloor {args[0]} \right\rfloor"
+        if name == 'ceil':
+            return rf"\left\lceil {args[0]} \right\rceil"
+        if name in ('log10', 'log2'):
+            return rf"\log_{{{name[3:]}}}\left({args[0]}\right)"
+        if name in _TEX_INVERSE:
+            return rf"\{_TEX_INVERSE[name]}^{{-1}}\left({args[0]}\right)"
+        command = rf"\{name}" if name in _TEX_FUNCTIONS else rf"\operatorname{{{name}}}"
+        return rf"{command}\left({', '.join(args)}\right)"
+    return ast.unparse(node)
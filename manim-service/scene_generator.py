@@ -7,6 +7,11 @@ import json
 import sys
 import os
 
+from live_stream import watch_segments
+from render_config import PROBLEM_RENDER_CONFIG
+from safe_expression import ExpressionError, compile_expression, sample_function
+from stage_timer import render_scene_timed
+
 
 class MathProblemScene(Scene):
     """Base class for mathematical problem visualizations"""
@@ -72,23 +77,22 @@ class MathProblemScene(Scene):
 
         # Get function from problem data
         func_expr = self.problem_data.get('function', 'x**2')
+        try:
+            function = compile_expression(func_expr)
+        except ExpressionError as e:
+            # Fallback to simple parabola
+            print(f"[WARNING] Can't plot {func_expr!r}: {e}")
+            function = compile_expression('x**2')
 
         # Create graph
-        try:
-            graph = axes.plot(lambda x: eval(func_expr.replace('x', str(x))), color=BLUE)
-            graph_label = axes.get_graph_label(graph, label=f'y = {func_expr}')
+        graph, label_point = self.plot_expression(axes, function, color=BLUE)
+        graph_label = MathTex(f"y = {function.tex}", color=BLUE).next_to(label_point, RIGHT)
 
-            # Animate
-            self.play(Create(axes))
-            self.wait(0.5)
-            self.play(Create(graph), Write(graph_label))
-            self.wait(2)
-        except:
-            # Fallback to simple parabola
-            graph = axes.plot(lambda x: x**2, color=BLUE)
-            graph_label = axes.get_graph_label(graph, label='y = x^2')
-            self.play(Create(axes), Create(graph), Write(graph_label))
-            self.wait(2)
+        # Animate
+        self.play(Create(axes))
+        self.wait(0.5)
+        self.play(Create(graph), Write(graph_label))
+        self.wait(2)
 
     def visualize_geometry(self):
         """Visualize geometric shapes and concepts"""
@@ -157,14 +161,64 @@ class MathProblemScene(Scene):
 
         labels = axes.get_axis_labels(x_label="x", y_label="y")
 
-        # Base function
-        func1 = axes.plot(lambda x: x**2, color=BLUE)
-        func1_label = MathTex("f(x) = x^2", color=BLUE).to_edge(UP)
+        # Base function, then each transformation of it in turn: a list of
+        # strings (a bare string is one function, anything else is ignored)
+        expressions = self.problem_data.get('functions')
+        if isinstance(expressions, str):
+            expressions = [expressions]
+        elif not isinstance(expressions, list):
+            expressions = []
+        expressions = ([expression for expression in expressions if isinstance(expression, str)]
+                       or [self.problem_data.get('function', 'x**2')])
+        functions = []
+        for expression in expressions:
+            try:
+                functions.append(compile_expression(expression))
+            except ExpressionError as e:
+                print(f"[WARNING] Can't plot {expression!r}: {e}")
+        if not functions:
+            functions = [compile_expression('x**2')]
+
+        func1, _ = self.plot_expression(axes, functions[0], color=BLUE)
+        func1_label = MathTex(f"f(x) = {functions[0].tex}", color=BLUE).to_edge(UP)
 
         self.play(Create(axes), Write(labels))
         self.play(Create(func1), Write(func1_label))
         self.wait(2)
 
+        for function in functions[1:]:
+            graph, _ = self.plot_expression(axes, function, color=YELLOW)
+            label = MathTex(f"g(x) = {function.tex}", color=YELLOW).to_edge(UP)
+            self.play(Transform(func1, graph), Transform(func1_label, label))
+            self.wait(2)
+
+    def plot_expression(self, axes, function, color=BLUE):
+        """
+        Plot a compiled expression on linear axes
+
+        The function is evaluated on whole arrays of adaptively chosen sample
+        points and drawn as one piece per continuous stretch, so asymptotes
+        and jumps are left open
+
+        Returns:
+            (graph, point of the rightmost sample inside the axes, for a label)
+        """
+        x_min, x_max = axes.x_range[:2]
+        y_min, y_max = axes.y_range[:2]
+        origin = np.array(axes.c2p(0, 0))
+        x_unit = np.array(axes.c2p(1, 0)) - origin
+        y_unit = np.array(axes.c2p(0, 1)) - origin
+
+        graph = VGroup()
+        label_point = axes.c2p(x_max, y_max)
+        for xs, ys in sample_function(function, (x_min, x_max), (y_min, y_max)):
+            points = origin + np.outer(xs, x_unit) + np.outer(ys, y_unit)
+            graph.add(VMobject(color=color).set_points_as_corners(points))
+            inside = np.flatnonzero((ys >= y_min) & (ys <= y_max))
+            if len(inside):
+                label_point = points[inside[-1]]
+        return graph, label_point
+
     def visualize_generic(self):
         """Generic visualization with text"""
         content = self.problem_data.get('content', 'Problem Visualization')
@@ -183,21 +237,28 @@ class MathProblemScene(Scene):
         self.wait(2)
 
 
-def generate_scene(problem_data, output_file):
+def generate_scene(problem_data, output_file, timer=None, partial_cache=None, on_segment=None):
     """
     Generate a Manim scene from problem data
 
     Args:
         problem_data: Dictionary containing problem information
         output_file: Output filename (without extension)
+        timer: Optional StageTimer receiving construct/render_frames/concat times
+        partial_cache: Optional SharedPartialCache of animation segments shared across jobs
+        on_segment: Optional callback receiving each finished partial movie file's path
     """
-    config.pixel_height = 720
-    config.pixel_width = 1280
-    config.frame_rate = 30
+    config.pixel_height = PROBLEM_RENDER_CONFIG['pixel_height']
+    config.pixel_width = PROBLEM_RENDER_CONFIG['pixel_width']
+    config.frame_rate = PROBLEM_RENDER_CONFIG['frame_rate']
     config.output_file = output_file
 
     scene = MathProblemScene(problem_data=problem_data)
-    scene.render()
+    if partial_cache:
+        partial_cache.attach(scene, PROBLEM_RENDER_CONFIG)
+    if on_segment:
+        watch_segments(scene, on_segment)
+    render_scene_timed(scene, timer)
 
 
 if __name__ == "__main__":
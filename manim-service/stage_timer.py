@@ -0,0 +1,84 @@
+"""
+Per-stage timing of a render job
+The API process and the render worker each time their own stages with a
+monotonic clock; the worker's stages travel back in its result message
+"""
+import json
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+
+class StageTimer:
+    """Accumulates seconds spent per named stage"""
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + max(0.0, seconds)
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(name, time.monotonic() - start)
+
+    def update(self, stages: Optional[dict]):
+        for name, seconds in (stages or {}).items():
+            self.add(name, seconds)
+
+    def as_dict(self) -> dict:
+        return {name: round(seconds, 4) for name, seconds in self.stages.items()}
+
+
+def render_scene_timed(scene, timer: Optional[StageTimer] = None):
+    """
+    Render a Manim scene, splitting its time into stages
+
+    Stages:
+        construct       Python time in setup()/construct() outside of play()
+        render_frames   Frame rendering and partial movie writing in play()
+        concat          Combining the partial movie files into the final video
+    """
+    if timer is None:
+        scene.render()
+        return
+
+    renderer = scene.renderer
+    file_writer = renderer.file_writer
+    original_play = renderer.play
+    original_finish = file_writer.finish
+    before = dict(timer.stages)
+
+    def play(*args, **kwargs):
+        with timer.stage('render_frames'):
+            return original_play(*args, **kwargs)
+
+    def finish(*args, **kwargs):
+        with timer.stage('concat'):
+            return original_finish(*args, **kwargs)
+
+    renderer.play = play
+    file_writer.finish = finish
+    start = time.monotonic()
+    try:
+        scene.render()
+    finally:
+        del renderer.play
+        del file_writer.finish
+        nested = sum(timer.stages.get(name, 0.0) - before.get(name, 0.0)
+                     for name in ('render_frames', 'concat'))
+        timer.add('construct', time.monotonic() - start - nested)
+
+
+def log_timings(job_id: str, kind: str, outcome: str, timings: dict):
+    """Write the structured per-job timing line (one JSON object, grep for [TIMINGS])"""
+    print("[TIMINGS] " + json.dumps({
+        "job_id": job_id,
+        "kind": kind,
+        "outcome": outcome,
+        "timings": timings,
+    }, sort_keys=True), flush=True)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test that waiting on render output and file locks yields under gevent
+(needs gevent, no Manim or server)
+"""
+from async_serving import is_cooperative, serving_mode
+from testing_utils import run_script
+
+# Run in a fresh interpreter: monkey-patching must happen before anything else is imported
+COOPERATIVE_SCRIPT = r'''
+from gevent import monkey
+monkey.patch_all()
+
+import fcntl, json, subprocess, sys, tempfile, time
+import gevent
+from async_serving import is_cooperative
+from disk_cache import DiskLRUCache
+from render_progress import PipeMultiplexer
+
+ticks = []
+
+def ticker():
+    while True:
+        ticks.append(time.monotonic())
+        time.sleep(0.01)
+
+gevent.spawn(ticker)
+result = {"cooperative": is_cooperative()}
+
+# A render worker that takes a while to say anything
+child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(0.5); print("done", flush=True)'],
+                         stdout=subprocess.PIPE)
+output = PipeMultiplexer()
+output.register(child.stdout, 'stdout')
+before = len(ticks)
+lines = []
+while output.open:
+    lines += output.read(5)
+child.wait()
+result["lines"] = lines
+result["ticks_while_reading"] = len(ticks) - before
+
+# A cache lock held by "another process" (a separate open file description)
+with tempfile.TemporaryDirectory() as tmp:
+    cache = DiskLRUCache(tmp, 1024, '.bin')
+    holder = open(f"{tmp}/.lock", 'w')
+    fcntl.flock(holder, fcntl.LOCK_EX)
+
+    def locked():
+        with cache._lock():
+            return time.monotonic()
+
+    waiter = gevent.spawn(locked)
+    before = len(ticks)
+    time.sleep(0.3)
+    fcntl.flock(holder, fcntl.LOCK_UN)
+    waiter.join(5)
+    result["lock_acquired"] = waiter.successful()
+    result["ticks_while_locked"] = len(ticks) - before
+print(json.dumps(result))
+'''
+
+
+def test_threaded_mode_without_gevent():
+    assert not is_cooperative()
+    assert serving_mode() == 'threaded'
+
+
+def test_pipes_and_locks_yield_under_gevent():
+    try:
+        import gevent  # noqa: F401
+    except ImportError:
+        print("⚠️  gevent not available, skipping")
+        return
+
+    result = run_script(COOPERATIVE_SCRIPT, timeout=60)
+    assert result['cooperative']
+    assert result['lines'] == [['stdout', 'done\n']]
+    # The ticker kept running (every 10 ms) while one greenlet waited
+    assert result['ticks_while_reading'] > 20
+    assert result['lock_acquired'] and result['ticks_while_locked'] > 10
+
+
+if __name__ == "__main__":
+    test_threaded_mode_without_gevent()
+    test_pipes_and_locks_yield_under_gevent()
+    print("✅ All async serving tests passed")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test that finished videos are published from the job's work directory with a
+rename (stand-in renders; needs ffmpeg for the end-to-end test, no Manim)
+"""
+import tempfile
+from pathlib import Path
+
+from load_test import make_clip
+from media_lifecycle import WORK_DIR
+from render_pipeline import publish_video
+from testing_utils import run_script
+from video_packaging import ffmpeg_path
+
+SCENE = Path(__file__).parent / 'benchmark_corpus' / 'scenes' / 'parabola_vertex.py'
+
+# Submits one dynamic job and prints its terminal event once the handler has returned
+PUBLISH_SCRIPT = r'''
+import json, sys, time
+import load_test
+
+app = load_test.standin_app()
+import api
+
+job_id = app.test_client().post('/jobs', json={"kind": "dynamic", "code": open(sys.argv[1]).read()}).get_json()['job_id']
+result = api.JOB_SCHEDULER.wait(job_id)
+# The handler cleans up after its "complete" event
+while api.JOB_SCHEDULER.stats()['running']:
+    time.sleep(0.05)
+print(json.dumps(result))
+'''
+
+
+def test_publish_moves_the_file_without_copying():
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "work" / "job" / "scene.mp4"
+        source.parent.mkdir(parents=True)
+        source.write_bytes(b'x' * 1000)
+        inode = source.stat().st_ino
+
+        public_file = Path(tmp) / "job.mp4"
+        assert publish_video(source, public_file) == 1000
+        assert not source.exists()
+        assert public_file.stat().st_ino == inode
+
+
+def test_job_leaves_only_its_published_video():
+    if not ffmpeg_path():
+        print("⚠️  ffmpeg not available, skipping")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = Path(tmp) / "clip.mp4"
+        make_clip(clip, 1)
+        result = run_script(PUBLISH_SCRIPT, SCENE.absolute(), cwd=tmp, timeout=300,
+                            env={'LOAD_TEST_CLIP': str(clip), 'LOAD_TEST_RENDER_SECONDS': '0.5'})
+
+        assert result['type'] == 'complete'
+        media_dir = Path(tmp) / "media"
+        public_file = media_dir / f"{result['video_id']}.mp4"
+        assert Path(tmp, result['file_path']) == public_file and public_file.stat().st_size > 0
+        # The work directory is gone; the render cache holds a link, not a copy
+        assert not (media_dir / WORK_DIR / result['video_id']).exists()
+        videos = [path for path in media_dir.rglob('*.mp4') if path.parent.name != 'render-cache']
+        assert videos == [public_file]
+        assert public_file.stat().st_nlink == 2
+
+
+if __name__ == "__main__":
+    test_publish_moves_the_file_without_copying()
+    test_job_leaves_only_its_published_video()
+    print("✅ All atomic publishing tests passed")
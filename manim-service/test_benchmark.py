@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test the benchmark harness: corpus, stand-in narration and regression checks
+(needs ffmpeg for the mux case, no Manim or network)
+"""
+import json
+import sys
+import tempfile
+import wave
+from pathlib import Path
+
+import benchmark
+from benchmark import compare_results, list_cases, run_isolated, summarize
+from code_validator import validate_scene_code
+from video_packaging import ffmpeg_path
+
+
+def test_corpus_scenes_pass_validation():
+    narration = json.loads((benchmark.CORPUS_DIR / 'narration.json').read_text())
+    assert set(list_cases('dynamic')) == set(narration)
+    for name in list_cases('dynamic'):
+        result = validate_scene_code((benchmark.CORPUS_DIR / 'scenes' / f'{name}.py').read_text())
+        assert result['ok'], (name, result['errors'])
+    # One problem per visualization type
+    assert set(list_cases('problem')) == {'equation', 'graph', 'geometry', 'number_line', 'function', 'generic'}
+
+
+def test_stub_tts_is_deterministic():
+    original = sys.modules.get('gtts')
+    with tempfile.TemporaryDirectory() as tmp:
+        benchmark.install_stub_tts(latency=0)
+        try:
+            from gtts import gTTS
+            paths = [Path(tmp) / f"{index}.wav" for index in range(2)]
+            for path in paths:
+                gTTS(text="one two three four five").save(str(path))
+        finally:
+            sys.modules.pop('gtts')
+            if original:
+                sys.modules['gtts'] = original
+        assert paths[0].read_bytes() == paths[1].read_bytes()
+        # 5 words at 2.5 words per second
+        with wave.open(str(paths[0])) as f:
+            assert f.getnframes() / f.getframerate() == 2.0
+
+
+def test_isolated_runs_report_stages_rss_and_bytes():
+    if not ffmpeg_path():
+        print("⚠️  ffmpeg not available, skipping")
+        return
+    case = summarize([run_isolated('mux', 'video_longer', tts_latency=0)])
+    assert case['ok'], case
+    assert set(case['stages']) == {'setup', 'mux'}
+    assert case['wall_seconds'] < case['stages']['setup'] + case['stages']['mux']
+    assert case['peak_rss_mb'] > 0 and case['output_bytes'] > 0
+
+
+def test_compare_flags_slowdowns_growth_and_failures():
+    def case(wall, rss, ok=True):
+        return {"ok": ok, "wall_seconds": wall, "peak_rss_mb": rss, "error": None if ok else "boom"}
+
+    baseline = {"cases": {"mux/a": case(2.0, 100), "mux/b": case(2.0, 100), "mux/c": case(0.01, 100),
+                          "mux/d": case(2.0, 100), "mux/e": case(2.0, 100, ok=False)}}
+    current = {"cases": {"mux/a": case(2.3, 105),   # within threshold
+                         "mux/b": case(3.0, 200),   # slower and bigger
+                         "mux/c": case(0.03, 100),  # 3x, but only 20 ms
+                         "mux/d": case(0, 0, ok=False),
+                         "mux/e": case(9.0, 900),   # no valid baseline
+                         "mux/f": case(9.0, 900)}}  # new case
+    regressions = compare_results(baseline, current, threshold=0.2)
+    assert len(regressions) == 3
+    assert regressions[0].startswith("mux/b: wall_seconds 2s -> 3s")
+    assert regressions[1].startswith("mux/b: peak_rss_mb")
+    assert regressions[2] == "mux/d: failed (boom)"
+
+
+if __name__ == "__main__":
+    test_corpus_scenes_pass_validation()
+    test_stub_tts_is_deterministic()
+    test_isolated_runs_report_stages_rss_and_bytes()
+    test_compare_flags_slowdowns_growth_and_failures()
+    print("✅ All benchmark tests passed")
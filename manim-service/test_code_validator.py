@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test pre-flight validation of generated scene code (no Manim required)
+"""
+from code_validator import strip_allowed_imports, validate_scene_code
+
+VALID = """from manim import *
+import numpy as np
+
+class GeneratedScene(Scene):
+    def construct(self):
+        title = Text("Hello")
+        self.play(Write(title), run_time=2)
+        for i in range(3):
+            self.play(FadeIn(Dot()))
+        self.wait(0.5)
+"""
+
+
+def test_valid_code_and_cost_estimate():
+    report = validate_scene_code(VALID)
+    assert report['ok'] and report['errors'] == []
+    cost = report['cost']
+    assert cost['animations'] == 4 and cost['waits'] == 1
+    assert cost['video_seconds'] == 5.5  # 2 + 3 * 1 + 0.5
+    assert cost['frames'] == 132  # at 24 fps
+    assert cost['loops'] == [{"line": 8, "iterations": 3}]
+
+
+def test_errors_carry_line_numbers():
+    report = validate_scene_code(VALID.replace("run_time=2)", "run_time=2"))
+    assert not report['ok'] and report['errors'][0]['message'].startswith('SyntaxError')
+
+    code = VALID.replace('title = Text("Hello")', 'title = Text(open("/etc/passwd").read())')
+    code += "import os\n"
+    report = validate_scene_code(code)
+    assert [(error['line'], error['message']) for error in report['errors']] == [
+        (6, "'open' is not available in generated scenes"),
+        (11, "Imports are not allowed; Manim and numpy (as np) are already available"),
+    ]
+
+    report = validate_scene_code(VALID.replace("GeneratedScene", "MyScene"))
+    assert report['errors'][0]['message'] == "Generated code must define a 'GeneratedScene' class"
+
+    # A locally defined name may shadow a removed builtin
+    assert validate_scene_code(VALID + "\ndef help():\n    return 1\n")['ok']
+
+
+def test_budgets_and_loop_bounds():
+    report = validate_scene_code(VALID.replace("range(3)", "range(5000)"))
+    assert {"line": 8, "message": "Loop runs 5000 times, more than the 1000 allowed"} in report['errors']
+    assert report['errors'][0] == {"line": 4, "message": "Scene plays about 5001 animations, more than the 300 allowed"}
+
+    report = validate_scene_code(VALID.replace("self.wait(0.5)", "self.wait(1000)"))
+    assert report['errors'] == [{"line": 4, "message": "Scene runs about 1005s, longer than the 300s allowed"}]
+
+    forever = VALID.replace("for i in range(3):", "while True:")
+    assert validate_scene_code(forever)['errors'][0]['message'] == "Infinite loop: 'while' never exits"
+    bounded = VALID.replace("for i in range(3):", "for point in points:")
+    report = validate_scene_code(bounded)
+    assert report['ok'] and report['warnings'][0]['line'] == 8
+
+
+def test_unknown_loop_bounds_only_warn():
+    # 3 x 3 x 4 = 36 animations, estimated at 10 x 10 x 4 = 400
+    code = VALID.replace("""        for i in range(3):
+            self.play(FadeIn(Dot()))
+""", """        pts = [1, 2, 3]
+        for p in pts:
+            for q in pts:
+                for _ in range(4):
+                    self.play(FadeIn(Dot()))
+""")
+    report = validate_scene_code(code)
+    assert report['ok'] and report['errors'] == []
+    assert report['cost']['animations'] == 401
+    messages = [warning['message'] for warning in report['warnings']]
+    assert "Scene may play about 401 animations (more than the 300 allowed) " \
+           "if its unknown loops run 10 times" in messages
+    assert sum('Loop bound unknown' in message for message in messages) == 2
+
+    # Known bounds inside an unknown loop still count
+    report = validate_scene_code(code.replace("range(4)", "range(400)"))
+    assert not report['ok']
+    assert report['errors'][0]['message'] == "Scene plays about 401 animations, more than the 300 allowed"
+
+
+def test_import_filtering_keeps_line_numbers():
+    stripped = strip_allowed_imports(VALID)
+    assert stripped.split('\n')[:2] == ['', '']
+    assert len(stripped.split('\n')) == len(VALID.split('\n'))
+
+
+if __name__ == "__main__":
+    test_valid_code_and_cost_estimate()
+    test_errors_carry_line_numbers()
+    test_budgets_and_loop_bounds()
+    test_unknown_loop_bounds_only_warn()
+    test_import_filtering_keeps_line_numbers()
+    print("✅ All code validator tests passed")
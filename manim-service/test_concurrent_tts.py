@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test that narration is synthesized while the scene renders, with its own
+"tts" events (stand-in renders and TTS; needs ffmpeg, no Manim or network)
+"""
+import tempfile
+from pathlib import Path
+
+from load_test import make_clip
+from testing_utils import run_script
+from video_packaging import ffmpeg_path
+
+SCENE = Path(__file__).parent / 'benchmark_corpus' / 'scenes' / 'quadratic_formula.py'
+
+# Prints the events of two /generate-dynamic streams, one with failing narration
+GENERATE_SCRIPT = r'''
+import json, sys, time
+import load_test
+
+app = load_test.standin_app()
+import render_pipeline
+
+code = open(sys.argv[1]).read()
+
+
+def generate(narration):
+    started = time.monotonic()
+    response = app.test_client().post('/generate-dynamic', json={"code": code, "narration": narration},
+                                      buffered=False)
+    events = []
+    for chunk in response.response:
+        for line in chunk.decode().splitlines():
+            if line.startswith('data:'):
+                events.append(dict(json.loads(line[5:]), at=time.monotonic() - started))
+    return events
+
+
+result = {"narrated": generate("Two plus three is five.")}
+# A synthesis that fails leaves the video silent
+render_pipeline.generate_tts = lambda text, path: False
+result["failed"] = generate("Three plus four is seven.")
+print(json.dumps(result))
+'''
+
+
+def test_narration_is_synthesized_during_the_render():
+    if not ffmpeg_path():
+        print("⚠️  ffmpeg not available, skipping")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = Path(tmp) / "clip.mp4"
+        make_clip(clip, 2)
+        result = run_script(GENERATE_SCRIPT, SCENE.absolute(), cwd=tmp, timeout=300,
+                            env={'LOAD_TEST_CLIP': str(clip), 'LOAD_TEST_RENDER_SECONDS': '3',
+                                 'LOAD_TEST_TTS_SECONDS': '0.5'})
+
+    events = result['narrated']
+    tts = [event for event in events if event['type'] == 'tts']
+    rendering = [event for event in events if event['type'] == 'progress' and 'percentage' in event]
+    assert [event['status'] for event in tts] == ['started', 'complete']
+    # Synthesis starts before the first frame and is done before the last one
+    assert tts[0]['at'] <= rendering[0]['at']
+    assert tts[1]['at'] < rendering[-1]['at']
+    assert events[-1]['type'] == 'complete' and events[-1]['has_audio']
+
+    events = result['failed']
+    assert [event['status'] for event in events if event['type'] == 'tts'] == ['started', 'failed']
+    assert events[-1]['type'] == 'complete' and not events[-1]['has_audio']
+
+
+if __name__ == "__main__":
+    test_narration_is_synthesized_during_the_render()
+    print("✅ All concurrent TTS tests passed")
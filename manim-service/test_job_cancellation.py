@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Test cancelling render jobs: queued and running jobs, preview jobs between
+passes, requests from other processes, abandoned streams, render workers and
+ffmpeg (needs ffmpeg for the ffmpeg test, no Manim or server)
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+import render_pool
+from jobs import PRIORITY_DRAFT, PRIORITY_FINAL, JobCancelled, JobScheduler, JobStore, QueueFullError
+from media_lifecycle import WORK_DIR
+from render_cache import RenderCache
+from render_pipeline import RenderPipeline
+from render_pool import RenderPool
+from video_packaging import FfmpegProcesses, ffmpeg_path, run_ffmpeg, track_ffmpeg
+
+
+def test_queued_job_is_cancelled_without_running():
+    with tempfile.TemporaryDirectory() as tmp:
+        release = threading.Event()
+        ran = []
+
+        def handler(job):
+            ran.append(job.id)
+            release.wait(5)
+            job.finish('complete')
+
+        scheduler = JobScheduler(handler, JobStore(Path(tmp)), concurrency=1)
+        busy = scheduler.submit('dynamic', {})
+        queued = scheduler.submit('dynamic', {})
+
+        status = scheduler.cancel(queued.id)
+        assert status['status'] == 'cancelled'
+        release.set()
+        assert scheduler.wait(busy.id)['type'] == 'complete'
+        time.sleep(0.3)
+        assert ran == [busy.id]
+        assert scheduler.wait(queued.id) == {"type": "error", "error": "Job was cancelled", "cancelled": True}
+        # A finished job can't be cancelled again
+        assert scheduler.cancel(busy.id)['status'] == 'complete'
+        assert scheduler.cancel('missing') is None
+
+
+def test_cancelled_jobs_free_their_queue_slots():
+    with tempfile.TemporaryDirectory() as tmp:
+        release = threading.Event()
+
+        def handler(job):
+            release.wait(5)
+            job.finish('complete')
+
+        scheduler = JobScheduler(handler, JobStore(Path(tmp)), concurrency=1, max_queue=2)
+        running = scheduler.submit('dynamic', {})
+        time.sleep(0.1)
+        queued = [scheduler.submit('dynamic', {}) for _ in range(2)]
+        try:
+            scheduler.submit('dynamic', {})
+            raise AssertionError("queue should be full")
+        except QueueFullError:
+            pass
+
+        # Still in the priority queue, but no longer waiting for a slot
+        for job in queued:
+            scheduler.cancel(job.id)
+        assert scheduler.stats()['queued'] == 0
+        later = scheduler.submit_many([('dynamic', {}, None, PRIORITY_FINAL)] * 2)
+        release.set()
+        for job in [running, *later]:
+            assert scheduler.wait(job.id)['type'] == 'complete'
+
+
+def test_running_job_stops_at_its_next_checkpoint():
+    with tempfile.TemporaryDirectory() as tmp:
+        started = threading.Event()
+        killed = threading.Event()
+        stopped = []
+
+        def handler(job):
+            job.on_cancel(killed.set)
+            job.emit('progress', percentage=10)
+            started.set()
+            try:
+                killed.wait(5)
+                job.raise_if_cancelled()
+                job.finish('complete')
+            except JobCancelled:
+                stopped.append(job.id)
+                raise
+
+        scheduler = JobScheduler(handler, JobStore(Path(tmp)), concurrency=1)
+        job = scheduler.submit('dynamic', {})
+        assert started.wait(5)
+
+        scheduler.cancel(job.id)
+        assert killed.is_set()
+        time.sleep(0.3)
+        assert stopped == [job.id]
+        types = [event['type'] for _, event in scheduler.follow(job.id)]
+        assert types == ['queued', 'progress', 'error']
+        assert scheduler.get(job.id)['status'] == 'cancelled'
+
+
+def test_other_processes_cancel_through_the_store():
+    with tempfile.TemporaryDirectory() as tmp:
+        pending = Future()
+
+        def handler(job):
+            job.wait_for(pending)
+
+        owner = JobScheduler(handler, JobStore(Path(tmp)), concurrency=1)
+        job = owner.submit('dynamic', {})
+        time.sleep(0.1)
+
+        # This one doesn't own the job: it can only ask its owner through the store
+        other = JobScheduler(handler, JobStore(Path(tmp)), concurrency=1)
+        assert other.cancel(job.id)['status'] == 'cancelling'
+        result = other.wait(job.id)
+        assert result['cancelled'] and owner.get(job.id)['status'] == 'cancelled'
+        assert not owner.store.cancel_requested(job.id)
+
+
+def test_abandoned_job_is_cancelled_unless_followed():
+    with tempfile.TemporaryDirectory() as tmp:
+        release = threading.Event()
+
+        def handler(job):
+            release.wait(5)
+            job.finish('complete')
+
+        scheduler = JobScheduler(handler, JobStore(Path(tmp)), concurrency=1)
+        job = scheduler.submit('dynamic', {})
+
+        # Another client is watching: leaving doesn't cancel the job
+        events = scheduler.follow(job.id)
+        next(events)
+        scheduler.abandon(job.id)
+        assert not job.done
+
+        events.close()
+        scheduler.abandon(job.id)
+        assert job.cancelled
+        release.set()
+
+
+def test_closed_batch_stops_following_before_it_abandons():
+    with tempfile.TemporaryDirectory() as tmp:
+        release = threading.Event()
+
+        def handler(job):
+            release.wait(5)
+            job.finish('complete')
+
+        scheduler = JobScheduler(handler, JobStore(Path(tmp)), concurrency=2)
+        jobs = [scheduler.submit('dynamic', {"n": n}) for n in range(2)]
+        events = scheduler.follow_many([job.id for job in jobs])
+        next(events)
+
+        # Closing returns once the batch's followers are detached, well before a keepalive
+        started = time.monotonic()
+        events.close()
+        assert time.monotonic() - started < 2
+        assert [job.followers for job in jobs] == [0, 0]
+        for job in jobs:
+            scheduler.abandon(job.id)
+        assert all(job.cancelled for job in jobs)
+        release.set()
+
+
+def test_cancelled_render_kills_the_worker():
+    clip = Path(__file__).parent / 'benchmark_corpus' / 'narration.json'  # copied only once finished
+    previous = render_pool.WORKER_SCRIPT
+    os.environ.update(LOAD_TEST_CLIP=str(clip), LOAD_TEST_RENDER_SECONDS='30')
+    render_pool.WORKER_SCRIPT = Path(__file__).parent / 'load_test_worker.py'
+    pool = RenderPool(sys.executable, size=1)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            code_file = Path(tmp) / "scene.py"
+            code_file.write_text("self.play(Write(title))\n")
+            handle = pool.render({"id": "cancel-test", "kind": "dynamic", "output_file": "scene",
+                                  "video_dir": tmp, "code_file": str(code_file)})
+            pid = handle.worker.pid
+            threading.Timer(0.5, handle.cancel).start()
+            started = time.monotonic()
+            result = handle.wait()
+
+        assert result['cancelled'] and not result['ok']
+        assert time.monotonic() - started < 10
+        assert pool.stats()['workers'][0]['pid'] != pid
+    finally:
+        pool.shutdown()
+        render_pool.WORKER_SCRIPT = previous
+        for name in ('LOAD_TEST_CLIP', 'LOAD_TEST_RENDER_SECONDS'):
+            os.environ.pop(name, None)
+
+
+def test_preview_cancelled_before_its_final_pass_cleans_up():
+    clip = Path(__file__).parent / 'benchmark_corpus' / 'narration.json'
+    previous = render_pool.WORKER_SCRIPT
+    os.environ.update(LOAD_TEST_CLIP=str(clip), LOAD_TEST_RENDER_SECONDS='0.2')
+    render_pool.WORKER_SCRIPT = Path(__file__).parent / 'load_test_worker.py'
+    pool = RenderPool(sys.executable, size=1)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            media_dir, temp_dir = Path(tmp) / "media", Path(tmp) / "temp"
+            media_dir.mkdir()
+            temp_dir.mkdir()
+            pipeline = RenderPipeline(pool, RenderCache(media_dir), media_dir, temp_dir)
+            release = threading.Event()
+
+            def handler(job):
+                if job.kind == 'block':
+                    release.wait(5)
+                    job.finish('complete')
+                else:
+                    pipeline.run(job)
+
+            scheduler = JobScheduler(handler, JobStore(Path(tmp) / "jobs"), concurrency=1)
+            params = {"code": "self.play(Write(title))\n", "narration": "", "preview": True}
+            job = scheduler.submit('dynamic', params, 'draft', PRIORITY_DRAFT)
+            # Holds the only slot once the draft is done, so the final pass stays queued
+            blocker = scheduler.submit('block', {}, None, PRIORITY_DRAFT)
+            events = (item[1]['type'] for item in scheduler.follow(job.id) if item)
+            assert 'preview' in events
+            events.close()
+            deadline = time.monotonic() + 5
+            while scheduler.get(job.id)['status'] != 'queued' and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert scheduler.get(job.id)['status'] == 'queued'
+            assert (media_dir / WORK_DIR / job.id).exists() and (temp_dir / f"{job.id}.py").exists()
+
+            scheduler.cancel(job.id)
+            assert not (media_dir / WORK_DIR / job.id).exists()
+            assert not (temp_dir / f"{job.id}.py").exists()
+            release.set()
+            assert scheduler.wait(blocker.id)['type'] == 'complete'
+    finally:
+        pool.shutdown()
+        render_pool.WORKER_SCRIPT = previous
+        for name in ('LOAD_TEST_CLIP', 'LOAD_TEST_RENDER_SECONDS'):
+            os.environ.pop(name, None)
+
+
+def test_killed_ffmpeg_fails_fast():
+    ffmpeg = ffmpeg_path()
+    if not ffmpeg:
+        print("⚠️  ffmpeg not available, skipping")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with track_ffmpeg(FfmpegProcesses()) as processes:
+            threading.Timer(0.5, processes.kill).start()
+            started = time.monotonic()
+            try:
+                # An endless encode
+                run_ffmpeg(ffmpeg, '-f', 'lavfi', '-i', 'testsrc=size=320x240:rate=24', '-f', 'null', '-')
+                raise AssertionError("ffmpeg was not killed")
+            except subprocess.CalledProcessError:
+                pass
+            assert time.monotonic() - started < 10
+
+            # Processes started after the kill don't get to run
+            try:
+                run_ffmpeg(ffmpeg, '-f', 'lavfi', '-i', 'testsrc', '-t', '1', str(Path(tmp) / "late.mp4"))
+                raise AssertionError("ffmpeg was not killed")
+            except subprocess.CalledProcessError:
+                pass
+
+
+if __name__ == "__main__":
+    test_queued_job_is_cancelled_without_running()
+    test_cancelled_jobs_free_their_queue_slots()
+    test_running_job_stops_at_its_next_checkpoint()
+    test_other_processes_cancel_through_the_store()
+    test_abandoned_job_is_cancelled_unless_followed()
+    test_closed_batch_stops_following_before_it_abandons()
+    test_cancelled_render_kills_the_worker()
+    test_preview_cancelled_before_its_final_pass_cleans_up()
+    test_killed_ffmpeg_fails_fast()
+    print("✅ All job cancellation tests passed")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test that identical in-flight render requests share one job, within and
+across API processes (no server or Manim required)
+"""
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from jobs import JobScheduler, JobStore, PRIORITY_FINAL
+from testing_utils import run_script
+
+# Runs the app with stand-in renders in a fresh interpreter and working directory
+SHARED_JOB_SCRIPT = r'''
+import json, sys, threading, time
+from pathlib import Path
+import load_test
+
+app = load_test.standin_app()
+import api
+
+jobs_dir = Path('temp') / 'jobs'
+result = {}
+
+
+def sse_until_queued(response):
+    for chunk in response.response:
+        for line in chunk.decode().splitlines():
+            if line.startswith('data:') and json.loads(line[5:])['type'] == 'queued':
+                return json.loads(line[5:])['job_id']
+
+
+# A POST /jobs client polls for its job: a stream sharing it leaves without cancelling it
+body = {"kind": "problem", "problem_data": {"type": "equation", "equation": "x = 1"}}
+job_id = app.test_client().post('/jobs', json=body).get_json()['job_id']
+stream = app.test_client().post('/generate-batch', json={"items": [body]}, buffered=False)
+result['joined'] = sse_until_queued(stream) == job_id
+stream.close()
+time.sleep(0.5)
+result['posted_status'] = api.JOB_SCHEDULER.get(job_id)['status']
+result['posted_result'] = api.JOB_SCHEDULER.wait(job_id)['type']
+
+# A blocking /generate shared with a stream: the job survives the stream
+problem = {"type": "equation", "equation": "x = 2"}
+generate = {}
+thread = threading.Thread(target=lambda: generate.update(
+    response=app.test_client().post('/generate', json=problem)))
+thread.start()
+time.sleep(0.5)
+stream = app.test_client().post('/generate-batch', json={"items": [{"problem_data": problem}]},
+                                buffered=False)
+shared_id = sse_until_queued(stream)
+stream.close()
+thread.join(30)
+result['generate_status'] = generate['response'].status_code
+result['generate_video'] = generate['response'].get_json().get('video_id') == shared_id
+result['markers_left'] = [path.name for pattern in ('*.waiter', '*.pinned') for path in jobs_dir.glob(pattern)]
+print(json.dumps(result))
+'''
+
+
+def test_identical_requests_join_the_job_in_flight():
+    with tempfile.TemporaryDirectory() as tmp:
+        release = threading.Event()
+        runs = []
+
+        def handler(job):
+            runs.append(job.id)
+            job.emit('progress', percentage=50)
+            release.wait(5)
+            job.finish('complete', video_id=job.id)
+
+        owner = JobScheduler(handler, JobStore(Path(tmp)), concurrency=2)
+        # Shares nothing but the job directory with the owner, like a second API process
+        other = JobScheduler(handler, JobStore(Path(tmp)), concurrency=2)
+        request = ('dynamic', {"code": "..."}, None, PRIORITY_FINAL)
+
+        [(job_id, _)] = owner.submit_coalesced([('key-a', *request)])
+        [(joined_id, _)] = other.submit_coalesced([('key-a', *request)])
+        [(distinct_id, _)] = other.submit_coalesced([('key-b', *request)])
+        assert joined_id == job_id and distinct_id != job_id
+
+        time.sleep(0.2)
+        release.set()
+        owner_events = [event for _, event in owner.follow(job_id)]
+        other_events = [event for _, event in other.follow(job_id)]
+        assert owner_events == other_events
+        assert [event['type'] for event in other_events] == ['queued', 'progress', 'complete']
+        assert other_events[-1]['video_id'] == job_id
+        assert other.wait(distinct_id)['type'] == 'complete'
+        assert sorted(runs) == sorted([job_id, distinct_id])
+
+        # Once finished, the same request starts a job of its own
+        [(later_id, _)] = other.submit_coalesced([('key-a', *request)])
+        assert later_id != job_id
+        assert other.wait(later_id)['type'] == 'complete'
+
+
+def test_batch_renders_duplicates_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        scheduler = JobScheduler(lambda job: job.finish('complete'), JobStore(Path(tmp)),
+                                 concurrency=1, max_queue=2)
+        request = ('problem', {"problem_data": {}}, None, PRIORITY_FINAL)
+        submitted = scheduler.submit_coalesced([('same', *request), ('other', *request), ('same', *request)])
+        job_ids = [job_id for job_id, _ in submitted]
+        # Two renders fit in a queue of two
+        assert job_ids[0] == job_ids[2] and job_ids[1] != job_ids[0]
+        assert len({waiter for _, waiter in submitted}) == 3
+        assert all(scheduler.wait(job_id)['type'] == 'complete' for job_id in job_ids)
+
+
+def test_job_is_abandoned_by_its_last_waiter():
+    with tempfile.TemporaryDirectory() as tmp:
+        release = threading.Event()
+
+        def handler(job):
+            release.wait(5)
+            job.finish('complete')
+
+        owner = JobScheduler(handler, JobStore(Path(tmp)), concurrency=1)
+        other = JobScheduler(handler, JobStore(Path(tmp)), concurrency=1)
+        request = ('dynamic', {"code": "..."}, None, PRIORITY_FINAL)
+        [(job_id, first)] = owner.submit_coalesced([('key', *request)])
+        [(_, second)] = other.submit_coalesced([('key', *request)])
+
+        # The client that started the render leaves; the other one still waits
+        owner.abandon(job_id, first)
+        time.sleep(0.5)
+        assert owner.get(job_id)['status'] != 'cancelled'
+
+        # The last waiter leaves from another process: its owner cancels the job
+        other.abandon(job_id, second)
+        result = other.wait(job_id)
+        assert result['cancelled'] and owner.get(job_id)['status'] == 'cancelled'
+        # Nobody can join a cancelled job
+        [(new_id, _)] = other.submit_coalesced([('key', *request)])
+        assert new_id != job_id
+        release.set()
+        assert other.wait(new_id)['type'] == 'complete'
+
+
+def test_shared_job_outlives_a_departing_stream():
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = Path(tmp) / "clip.mp4"
+        clip.write_bytes(b'stand-in video')
+        result = run_script(SHARED_JOB_SCRIPT, cwd=tmp,
+                            env={'LOAD_TEST_CLIP': str(clip), 'LOAD_TEST_RENDER_SECONDS': '2'})
+
+    assert result['joined'] and result['posted_status'] != 'cancelled'
+    assert result['posted_result'] == 'complete'
+    assert result['generate_status'] == 200 and result['generate_video']
+    assert result['markers_left'] == []
+
+
+if __name__ == "__main__":
+    test_identical_requests_join_the_job_in_flight()
+    test_batch_renders_duplicates_once()
+    test_job_is_abandoned_by_its_last_waiter()
+    test_shared_job_outlives_a_departing_stream()
+    print("✅ All job coalescing tests passed")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test the job scheduler and event log (no server or Manim required)
+"""
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from jobs import PRIORITY_DRAFT, PRIORITY_FINAL, JobScheduler, JobStore, QueueFullError
+
+
+def test_job_events_are_replayed_and_followed():
+    with tempfile.TemporaryDirectory() as tmp:
+        def handler(job):
+            job.emit('progress', percentage=50)
+            job.finish('complete', video_id=job.id)
+
+        scheduler = JobScheduler(handler, JobStore(Path(tmp)), concurrency=1)
+        job = scheduler.submit('dynamic', {"code": "..."})
+
+        result = scheduler.wait(job.id)
+        assert result['type'] == 'complete' and result['video_id'] == job.id
+        assert 'total' in result['timings']
+        assert scheduler.get(job.id)['status'] == 'complete'
+
+        # A late subscriber replays everything, and can resume mid-stream
+        types = [event['type'] for _, event in scheduler.follow(job.id)]
+        assert types == ['queued', 'progress', 'complete']
+        assert [index for index, _ in scheduler.follow(job.id, start=1)] == [1, 2]
+
+
+def test_other_processes_follow_through_the_event_log():
+    with tempfile.TemporaryDirectory() as tmp:
+        release = threading.Event()
+
+        def handler(job):
+            job.emit('progress', percentage=10)
+            release.wait(5)
+            job.finish('error', error='boom')
+
+        owner = JobScheduler(handler, JobStore(Path(tmp)), concurrency=1)
+        job = owner.submit('dynamic', {"code": "..."})
+
+        # A scheduler in "another worker" only sees the files on disk
+        other = JobScheduler(handler, JobStore(Path(tmp)), concurrency=1)
+        assert other.get(job.id)['job_id'] == job.id
+        threading.Timer(0.3, release.set).start()
+        events = [item[1]['type'] for item in other.follow(job.id) if item]
+        assert events == ['queued', 'progress', 'error']
+
+
+def test_full_queue_is_rejected():
+    with tempfile.TemporaryDirectory() as tmp:
+        release = threading.Event()
+        scheduler = JobScheduler(lambda job: release.wait(5), JobStore(Path(tmp)),
+                                 concurrency=1, max_queue=1)
+        accepted = [scheduler.submit('dynamic', {})]
+        try:
+            for _ in range(3):
+                accepted.append(scheduler.submit('dynamic', {}))
+            assert False, "queue should have filled up"
+        except QueueFullError as e:
+            assert e.retry_after >= 1
+        finally:
+            release.set()
+        # One running job plus one queued job
+        assert len(accepted) <= 2
+        for job in accepted:
+            scheduler.wait(job.id)
+
+
+def test_drafts_run_ahead_of_final_renders():
+    with tempfile.TemporaryDirectory() as tmp:
+        release = threading.Event()
+        order = []
+
+        def handler(job):
+            release.wait(5)
+            order.append((job.params['name'], job.phase))
+            if job.phase == 'draft':
+                job.emit('preview', video_id=f"{job.id}-draft")
+                job.defer('final')
+            else:
+                job.finish('complete', video_id=job.id)
+
+        scheduler = JobScheduler(handler, JobStore(Path(tmp)), concurrency=1)
+        blocker = scheduler.submit('dynamic', {"name": "blocker"})
+        time.sleep(0.1)  # let the runner pick it up
+        first = scheduler.submit('dynamic', {"name": "first"})
+        preview = scheduler.submit('dynamic', {"name": "preview"}, phase='draft', priority=PRIORITY_DRAFT)
+        release.set()
+        for job in (blocker, first, preview):
+            scheduler.wait(job.id)
+
+        # The draft overtakes the queued final render; its own final pass
+        # follows the final renders submitted before it
+        assert order == [("blocker", None), ("preview", "draft"), ("first", None), ("preview", "final")]
+        types = [event['type'] for _, event in scheduler.follow(preview.id)]
+        assert types == ['queued', 'preview', 'complete']
+
+
+def test_batches_are_admitted_whole_and_followed_together():
+    with tempfile.TemporaryDirectory() as tmp:
+        release = threading.Event()
+
+        def handler(job):
+            release.wait(5)
+            if job.params['ok']:
+                job.finish('complete', video_id=job.id)
+            else:
+                job.finish('error', error='boom')
+
+        scheduler = JobScheduler(handler, JobStore(Path(tmp)), concurrency=2, max_queue=3)
+        try:
+            scheduler.submit_many([('dynamic', {"ok": True}, None, PRIORITY_FINAL)] * 4)
+            assert False, "a batch larger than the queue should be rejected"
+        except QueueFullError:
+            pass
+        assert scheduler.stats()['queued'] == 0
+
+        jobs = scheduler.submit_many([('dynamic', {"ok": ok}, None, PRIORITY_FINAL) for ok in (True, False, True)])
+        release.set()
+        terminal = {}
+        for position, event in filter(None, scheduler.follow_many([job.id for job in jobs])):
+            if event['type'] in ('complete', 'error'):
+                terminal[position] = event['type']
+        # One failing job does not stop the others
+        assert terminal == {0: 'complete', 1: 'error', 2: 'complete'}
+
+
+if __name__ == "__main__":
+    test_job_events_are_replayed_and_followed()
+    test_other_processes_follow_through_the_event_log()
+    test_full_queue_is_rejected()
+    test_drafts_run_ahead_of_final_renders()
+    test_batches_are_admitted_whole_and_followed_together()
+    print("✅ All job tests passed")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test live segment playlists of renders in progress (needs ffmpeg for the
+playlist test, no Manim or server)
+"""
+import subprocess
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+from live_stream import LivePlaylist, watch_segments
+from video_packaging import ffmpeg_path
+
+
+def test_segments_announced_when_manim_closes_them():
+    with tempfile.TemporaryDirectory() as tmp:
+        closed = []
+        file_writer = SimpleNamespace(partial_movie_files=[],
+                                      end_animation=lambda allow_write=False: closed.append(allow_write))
+        scene = SimpleNamespace(renderer=SimpleNamespace(file_writer=file_writer))
+        announced = []
+        watch_segments(scene, announced.append)
+
+        for index in range(2):
+            path = Path(tmp) / f"{index}.mp4"
+            path.write_bytes(b'movie')
+            file_writer.partial_movie_files.append(str(path))
+            file_writer.end_animation(allow_write=True)
+        # Skipped animations have no file
+        file_writer.partial_movie_files.append(None)
+        file_writer.end_animation()
+
+        assert closed == [True, True, False]
+        assert announced == [str(Path(tmp) / "0.mp4"), str(Path(tmp) / "1.mp4")]
+
+
+def test_playlist_grows_one_segment_per_animation():
+    ffmpeg = ffmpeg_path()
+    if not ffmpeg:
+        print("⚠️  ffmpeg not available, skipping")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        partials = []
+        for index, seconds in enumerate((1, 2.5)):
+            path = tmp / f"partial_{index}.mp4"
+            subprocess.run([ffmpeg, '-loglevel', 'error', '-y', '-f', 'lavfi', '-i', 'testsrc=size=320x240:rate=24',
+                            '-t', str(seconds), '-c:v', 'libx264', '-pix_fmt', 'yuv420p', str(path)], check=True)
+            partials.append(path)
+
+        live = LivePlaylist(tmp / "live", ffmpeg)
+        playlist = tmp / "live" / "index.m3u8"
+        assert '#EXT-X-PLAYLIST-TYPE:EVENT' in playlist.read_text()
+
+        for path in partials:
+            live.add(str(path))
+        live.add(str(tmp / "missing.mp4"))  # unreadable files are skipped
+        live.finish()
+
+        lines = playlist.read_text().splitlines()
+        assert [line for line in lines if line.endswith('.ts')] == ['segment_000.ts', 'segment_001.ts']
+        assert '#EXTINF:1.000,' in lines and '#EXTINF:2.500,' in lines
+        assert '#EXT-X-TARGETDURATION:3' in lines and lines[-1] == '#EXT-X-ENDLIST'
+        assert all((tmp / "live" / name).stat().st_size > 0 for name in ('segment_000.ts', 'segment_001.ts'))
+
+
+if __name__ == "__main__":
+    test_segments_announced_when_manim_closes_them()
+    test_playlist_grows_one_segment_per_animation()
+    print("✅ All live stream tests passed")
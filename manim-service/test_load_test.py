@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test the load-test harness against the app with stand-in renders
+(needs ffmpeg for the end-to-end run, no Manim or network)
+"""
+import io
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from load_test import percentiles, read_sse
+from video_packaging import ffmpeg_path
+
+
+def test_percentiles_use_nearest_rank():
+    stats = percentiles([float(n) for n in range(1, 101)])
+    assert (stats['p50'], stats['p95'], stats['p99'], stats['max'], stats['count']) == (50, 95, 99, 100, 100)
+    assert percentiles([2.0])['p99'] == 2.0
+    assert percentiles([]) is None
+
+
+def test_sse_payloads_are_parsed():
+    stream = io.BytesIO(b'data: {"type": "progress"}\n\n: keepalive\n\nid: 3\ndata: {"type": "complete"}\n\n')
+    assert [event['type'] for event in read_sse(stream)] == ['progress', 'complete']
+
+
+def test_load_run_reports_latencies_and_outcomes():
+    if not ffmpeg_path():
+        print("⚠️  ffmpeg not available, skipping")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / "report.json"
+        subprocess.run([sys.executable, 'load_test.py', '--clients', '2', '--requests', '3', '--downloads', '2',
+                        '--render-seconds', '0.2', '--video-seconds', '1', '--no-narration', '--output', str(output)],
+                       cwd=Path(__file__).parent, capture_output=True, text=True, timeout=300, check=True)
+        report = json.loads(output.read_text())
+
+    assert report['outcomes'] == {'complete': 3} and report['error_rate'] == 0
+    assert report['download_outcomes'] == {'ok': 6}
+    assert report['time_to_first_progress']['count'] == 3
+    assert report['time_to_first_progress']['p50'] <= report['time_to_complete']['p50']
+    assert report['throughput']['jobs_per_second'] > 0
+
+
+if __name__ == "__main__":
+    test_percentiles_use_nearest_rank()
+    test_sse_payloads_are_parsed()
+    test_load_run_reports_latencies_and_outcomes()
+    print("✅ All load test tests passed")
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Test media lifecycle sweeps against per-tier budgets (no Manim required)
+"""
+import fcntl
+import os
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from media_lifecycle import MediaLifecycle, touch_access
+
+HOUR = 3600
+
+
+def _file(path: Path, size: int, age: float = 0, accessed: float = None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'\0' * size)
+    now = time.time()
+    os.utime(path, (now - (age if accessed is None else accessed), now - age))
+    return path
+
+
+def _lifecycle(root: Path, active=()):
+    tiers = {'public': (1000, 24 * HOUR), 'intermediate': (1000, HOUR), 'scratch': (1000, 24 * HOUR)}
+    return MediaLifecycle(root / 'media', root / 'temp', lambda job_id: job_id in active,
+                          limits=tiers, orphan_grace=60)
+
+
+def test_expired_and_least_recently_accessed_files_go_first():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        media = root / 'media'
+        expired = _file(media / 'expired.mp4', 100, age=48 * HOUR)
+        oldest = _file(media / 'oldest.mp4', 400, age=3 * HOUR)
+        # Written long ago but watched recently
+        watched = _file(media / 'watched.mp4', 400, age=5 * HOUR, accessed=60)
+        newest = _file(media / 'newest.mp4', 400, age=HOUR)
+
+        stats = _lifecycle(root).sweep()['tiers']['public']
+        assert not expired.exists() and not oldest.exists()
+        assert watched.exists() and newest.exists()
+        assert stats['removed'] == {"expired": 1, "orphaned": 0, "over_budget": 1}
+        assert stats['bytes'] == 800 and stats['files'] == 2 and stats['removed_bytes'] == 500
+
+
+def test_videos_linked_from_the_render_cache_are_left_to_it():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        media = root / 'media'
+        cached = _file(media / 'render-cache' / 'key.mp4', 900, age=48 * HOUR)
+        linked = media / 'linked.mp4'
+        os.link(cached, linked)
+        alone = _file(media / 'alone.mp4', 400, age=HOUR)
+
+        # Removing the link would free nothing, so it neither expires nor counts
+        stats = _lifecycle(root).sweep()['tiers']['public']
+        assert linked.exists() and cached.exists() and alone.exists()
+        assert stats['bytes'] == 400 and stats['files'] == 1 and stats['removed_bytes'] == 0
+
+        # Evicted from the cache, it is an ordinary public video again
+        cached.unlink()
+        stats = _lifecycle(root).sweep()['tiers']['public']
+        assert not linked.exists() and stats['removed'] == {"expired": 1, "orphaned": 0, "over_budget": 0}
+
+
+def test_running_jobs_are_kept_and_finished_ones_cleaned_up():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        running, finished = str(uuid.uuid4()), str(uuid.uuid4())
+        partial = 'videos/scene_{}/480p15/partial_movie_files/GeneratedScene/0.mp4'
+        kept = [
+            _file(root / 'media' / partial.format(running), 5000, age=2 * HOUR),
+            _file(root / 'temp' / f'scene_{running}.py', 10, age=HOUR),
+            _file(root / 'media' / partial.format(finished), 10, age=30),  # within the grace period
+            _file(root / 'temp' / 'jobs' / f'{finished}.json', 10, age=HOUR),  # status stays readable
+        ]
+        orphans = [
+            _file(root / 'media' / partial.format(finished).replace('0.mp4', '1.mp4'), 10, age=120),
+            _file(root / 'temp' / finished / 'narration.mp3', 10, age=120),
+            _file(root / 'media' / 'videos' / f'.{uuid.uuid4().hex}.tmp', 10, age=120),
+        ]
+
+        stats = _lifecycle(root, active={running}).sweep()
+        assert all(path.exists() for path in kept)
+        assert not any(path.exists() for path in orphans)
+        assert stats['tiers']['intermediate']['removed']['orphaned'] == 2
+        # Emptied job directories are pruned once untouched for the grace period,
+        # the job log directory never is
+        job_dir = root / 'temp' / finished
+        assert job_dir.is_dir()
+        os.utime(job_dir, (time.time() - 120, time.time() - 120))
+        _lifecycle(root, active={running}).sweep()
+        assert not job_dir.exists()
+        assert (root / 'temp' / 'jobs').is_dir()
+
+
+def test_locks_and_live_job_state_survive_the_scratch_sweep():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        jobs = root / 'temp' / 'jobs'
+        running, finished = str(uuid.uuid4()), str(uuid.uuid4())
+        kept = [
+            # Older than the TTL and over budget, but held with flock by the API processes
+            _file(jobs / '.inflight.lock', 0, age=48 * HOUR),
+            _file(jobs / f'{running}.json', 600, age=48 * HOUR),
+            _file(jobs / f'{running}.events', 600, age=48 * HOUR),
+            _file(jobs / f'{running}.{os.getpid()}.0123abcd.waiter', 0, age=48 * HOUR),
+        ]
+        # In-flight entries are named after a request, and hold the id of its job
+        inflight, stale = jobs / 'key-a.inflight', jobs / 'key-b.inflight'
+        for path, job_id in ((inflight, running), (stale, finished)):
+            path.write_text(job_id)
+            os.utime(path, (time.time() - 48 * HOUR,) * 2)
+
+        _lifecycle(root, active={running}).sweep()
+        assert all(path.exists() for path in kept) and inflight.exists()
+        assert not stale.exists()
+
+
+def test_hls_renditions_go_with_their_video():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        kept, orphaned = str(uuid.uuid4()), str(uuid.uuid4())
+        _file(root / 'media' / f'{kept}.mp4', 100)
+        _file(root / 'media' / 'hls' / kept / 'index.m3u8', 10)
+        _file(root / 'media' / 'hls' / orphaned / 'segment_000.m4s', 30)
+        rendition = root / 'media' / 'hls' / orphaned
+        os.utime(rendition, (time.time() - 120, time.time() - 120))
+
+        stats = _lifecycle(root).sweep()['tiers']['public']
+        assert (root / 'media' / 'hls' / kept).is_dir() and not rendition.exists()
+        assert stats['removed']['orphaned'] == 1 and stats['removed_bytes'] == 30
+
+
+def test_one_sweep_at_a_time_and_stats_are_shared():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        lifecycle = _lifecycle(root)
+        assert lifecycle.stats()['finished'] is None
+
+        (root / 'media').mkdir()
+        with open(root / 'media' / '.lifecycle.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            assert lifecycle.sweep() is None
+
+        lifecycle.sweep()
+        # Another process sees the latest sweep
+        stats = _lifecycle(root).stats()
+        assert stats['finished'] and set(stats['tiers']) == {'public', 'intermediate', 'scratch'}
+
+
+def test_touch_access_keeps_modification_time():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _file(Path(tmp) / 'video.mp4', 10, age=HOUR)
+        mtime = path.stat().st_mtime
+        touch_access(path)
+        assert path.stat().st_mtime == mtime and time.time() - path.stat().st_atime < 5
+
+
+if __name__ == "__main__":
+    test_expired_and_least_recently_accessed_files_go_first()
+    test_videos_linked_from_the_render_cache_are_left_to_it()
+    test_running_jobs_are_kept_and_finished_ones_cleaned_up()
+    test_locks_and_live_job_state_survive_the_scratch_sweep()
+    test_hls_renditions_go_with_their_video()
+    test_one_sweep_at_a_time_and_stats_are_shared()
+    test_touch_access_keeps_modification_time()
+    print("✅ All media lifecycle tests passed")
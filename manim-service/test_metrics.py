@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Test that instrumented code paths show up in /metrics output (no server required)
+"""
+import tempfile
+from pathlib import Path
+
+import metrics
+from jobs import JobScheduler, JobStore
+from metrics import FALLBACKS, render_metrics
+
+
+def sample(body: bytes, name: str) -> float:
+    for line in body.decode().splitlines():
+        if line.startswith(name + ' ') or line.startswith(name + '{'):
+            return float(line.rsplit(' ', 1)[1])
+    return 0.0
+
+
+def test_metrics_are_exported():
+    if not metrics.METRICS_AVAILABLE:
+        print("⚠️  prometheus_client not available, skipping")
+        return
+
+    before = sample(render_metrics()[0], 'qed_fallbacks_total{fallback="moviepy"}')
+    FALLBACKS.labels('moviepy').inc()
+    body, content_type = render_metrics()
+    assert content_type.startswith('text/plain')
+    assert sample(body, 'qed_fallbacks_total{fallback="moviepy"}') == before + 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scheduler = JobScheduler(lambda job: job.finish('complete'), JobStore(Path(tmp)), concurrency=1)
+        scheduler.wait(scheduler.submit('dynamic', {}).id)
+    body, _ = render_metrics()
+    assert sample(body, 'qed_jobs_queued') == 0
+    assert 'qed_jobs_running' in body.decode()
+
+
+if __name__ == "__main__":
+    test_metrics_are_exported()
+    print("✅ All metrics tests passed")
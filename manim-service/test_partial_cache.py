@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test sharing Manim partial movie files across jobs (no Manim required)
+"""
+import tempfile
+from pathlib import Path
+
+from partial_cache import SharedPartialCache
+
+CONFIG = {"pixel_height": 480, "pixel_width": 854, "frame_rate": 24}
+
+
+class FakeFileWriter:
+    """The parts of Manim's SceneFileWriter the cache relies on"""
+
+    def __init__(self, job_dir: Path):
+        self.partial_movie_directory = job_dir / 'partial_movie_files'
+        self.partial_movie_directory.mkdir(parents=True)
+        self.movie_file_path = job_dir / 'scene.mp4'
+        self.partial_movie_files = []
+        self.rendered = []
+
+    def is_already_cached(self, animation_hash):
+        return (self.partial_movie_directory / f"{animation_hash}.mp4").exists()
+
+    def combine_to_movie(self):
+        self.movie_file_path.write_bytes(b''.join(Path(p).read_bytes() for p in self.partial_movie_files))
+
+
+class FakeScene:
+    def __init__(self, job_dir: Path):
+        self.renderer = type('Renderer', (), {})()
+        self.renderer.file_writer = FakeFileWriter(job_dir)
+
+    def render(self, animation_hashes):
+        file_writer = self.renderer.file_writer
+        for animation_hash in animation_hashes:
+            path = file_writer.partial_movie_directory / f"{animation_hash}.mp4"
+            if not file_writer.is_already_cached(animation_hash):
+                path.write_bytes(animation_hash.encode() * 100)
+                file_writer.rendered.append(animation_hash)
+            file_writer.partial_movie_files.append(str(path))
+        file_writer.combine_to_movie()
+        return file_writer
+
+
+def render_job(cache, job_dir, animation_hashes, config=CONFIG):
+    cache.reset_job_stats()
+    scene = FakeScene(job_dir)
+    cache.attach(scene, config)
+    return scene.render(animation_hashes), cache.job_stats()
+
+
+def test_segments_are_shared_across_jobs():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        cache = SharedPartialCache(tmp / 'cache', max_bytes=10 * 1024 * 1024)
+
+        first, stats = render_job(cache, tmp / 'job1', ['title', 'axes', 'uncached_00002'])
+        assert first.rendered == ['title', 'axes', 'uncached_00002']
+        assert stats == {"hits": 0, "misses": 2, "hit_rate": 0.0}
+        assert cache.store.stats()['entries'] == 2  # the unhashable segment is never shared
+
+        # A second worker process renders another job with the same intro
+        other_worker = SharedPartialCache(tmp / 'cache', max_bytes=10 * 1024 * 1024)
+        second, stats = render_job(other_worker, tmp / 'job2', ['title', 'axes', 'graph'])
+        assert second.rendered == ['graph']
+        assert stats == {"hits": 2, "misses": 1, "hit_rate": 0.667}
+        assert second.movie_file_path.read_bytes().startswith(b'title' * 100 + b'axes' * 100)
+
+        # Segments rendered at another resolution are not interchangeable
+        draft, _ = render_job(cache, tmp / 'job3', ['title'], config={**CONFIG, "pixel_height": 240})
+        assert draft.rendered == ['title']
+
+
+def test_least_recently_used_segments_are_evicted():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        # Room for two 500-byte segments
+        cache = SharedPartialCache(tmp / 'cache', max_bytes=1000)
+        render_job(cache, tmp / 'job1', ['aaaaa', 'bbbbb'])
+        render_job(cache, tmp / 'job2', ['aaaaa', 'ccccc'])
+
+        # "aaaaa" was reused, so "bbbbb" is the one that went
+        job, stats = render_job(cache, tmp / 'job3', ['aaaaa', 'ccccc', 'bbbbb'])
+        assert job.rendered == ['bbbbb']
+        assert stats['hits'] == 2
+
+
+if __name__ == "__main__":
+    test_segments_are_shared_across_jobs()
+    test_least_recently_used_segments_are_evicted()
+    print("✅ All partial cache tests passed")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test the content-addressed render cache (no server or Manim required)
+"""
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from disk_cache import DiskLRUCache
+from render_cache import RenderCache, normalize_code, render_cache_key
+from render_config import DYNAMIC_RENDER_CONFIG, PROBLEM_RENDER_CONFIG
+from testing_utils import run_script
+
+
+def test_cache_key_ignores_cosmetic_changes():
+    code = "class GeneratedScene(Scene):\n    def construct(self):\n        pass\n"
+    noisy = code.replace('\n', '   \r\n') + "\n\n"
+    assert render_cache_key('dynamic', normalize_code(code), DYNAMIC_RENDER_CONFIG) == \
+        render_cache_key('dynamic', normalize_code(noisy), DYNAMIC_RENDER_CONFIG)
+
+
+def test_cache_key_depends_on_config_and_extra():
+    code = normalize_code("class GeneratedScene(Scene): pass")
+    base = render_cache_key('dynamic', code, DYNAMIC_RENDER_CONFIG)
+    assert base != render_cache_key('dynamic', code, PROBLEM_RENDER_CONFIG)
+    assert base != render_cache_key('dynamic', code, DYNAMIC_RENDER_CONFIG, narration="hello")
+    assert render_cache_key('problem', {"a": 1, "b": 2}, PROBLEM_RENDER_CONFIG) == \
+        render_cache_key('problem', {"b": 2, "a": 1}, PROBLEM_RENDER_CONFIG)
+
+
+def test_lru_eviction_by_bytes():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        cache = DiskLRUCache(tmp / 'cache', max_bytes=250, suffix='.bin')
+        for age, name in enumerate(('a', 'b', 'c')):
+            source = tmp / f"{name}.src"
+            source.write_bytes(b'x' * 100)
+            cache.put(name, source)
+            # Keep recency strictly ordered on coarse filesystems
+            stamp = time.time() - 100 + age
+            os.utime(cache._used_path(name), (stamp, stamp))
+
+        # Three 100-byte entries don't fit in 250 bytes: 'a' is the oldest
+        cache.evict()
+        assert cache.get('a') is None
+        assert cache.get('b') is not None
+        assert cache.get('c') is not None
+        assert cache.stats()['bytes'] <= 250
+
+
+def test_render_cache_restores_public_video():
+    with tempfile.TemporaryDirectory() as tmp:
+        media_dir = Path(tmp)
+        public_file = media_dir / "video-1.mp4"
+        public_file.write_bytes(b'video')
+
+        cache = RenderCache(media_dir, max_bytes=1024)
+        before = cache.stats()
+        cache.store_video('k1', 'video-1', public_file, has_audio=True)
+        assert cache.lookup('missing') is None
+
+        # Simulate /cleanup removing the public copy
+        public_file.unlink()
+        meta = cache.lookup('k1')
+        assert meta == {"video_id": "video-1", "has_audio": True}
+        assert public_file.read_bytes() == b'video'
+
+        stats = cache.stats()
+        assert stats['hits'] - before['hits'] == 1 and stats['misses'] - before['misses'] == 1
+
+
+def test_lookups_leave_the_public_video_untouched():
+    with tempfile.TemporaryDirectory() as tmp:
+        media_dir = Path(tmp)
+        public_file = media_dir / "video-1.mp4"
+        public_file.write_bytes(b'video')
+        stamp = time.time() - 3600
+        os.utime(public_file, (stamp, stamp))
+
+        # The cached entry is a hard link of the public video: /video's Last-Modified must not move
+        cache = RenderCache(media_dir, max_bytes=1024)
+        cache.store_video('k1', 'video-1', public_file)
+        assert cache.lookup('k1') == {"video_id": "video-1"}
+        assert public_file.stat().st_mtime == stamp
+
+
+def test_stats_count_every_process():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (tmp / 'metrics').mkdir()
+        script = ("import json, sys; from disk_cache import DiskLRUCache; "
+                  "cache = DiskLRUCache(sys.argv[1], 1024, '.bin', name='shared'); "
+                  "cache.get('missing'); print(json.dumps(cache.stats()))")
+        # Two "workers" miss once each; each reports both misses
+        for _ in range(2):
+            stats = run_script(script, tmp / 'cache', env={'PROMETHEUS_MULTIPROC_DIR': str(tmp / 'metrics')},
+                               timeout=60)
+        assert stats['misses'] == 2 and stats['hits'] == 0
+
+
+if __name__ == "__main__":
+    test_cache_key_ignores_cosmetic_changes()
+    test_cache_key_depends_on_config_and_extra()
+    test_lru_eviction_by_bytes()
+    test_render_cache_restores_public_video()
+    test_lookups_leave_the_public_video_untouched()
+    test_stats_count_every_process()
+    print("✅ All render cache tests passed")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test the pre-warmed render worker pool with stand-in workers
+(load_test_worker.py speaks the worker protocol; no Manim required)
+"""
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import render_pool
+from render_pool import RenderPool
+
+
+@contextmanager
+def standin_pool(**options):
+    """A pool of stand-in workers, and a function running one job on it"""
+    previous = render_pool.WORKER_SCRIPT
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        clip = tmp / "clip.mp4"
+        clip.write_bytes(b'stand-in video')
+        code_file = tmp / "scene.py"
+        code_file.write_text("self.play(Write(title))\n")
+        os.environ.update(LOAD_TEST_CLIP=str(clip), LOAD_TEST_RENDER_SECONDS='0.2')
+        render_pool.WORKER_SCRIPT = Path(__file__).parent / 'load_test_worker.py'
+        pool = RenderPool(sys.executable, **options)
+
+        def render(job_id: str, kind: str = 'dynamic'):
+            return pool.render({"id": job_id, "kind": kind, "output_file": f"scene_{job_id}",
+                                "video_dir": str(tmp), "code_file": str(code_file)})
+
+        try:
+            yield pool, render
+        finally:
+            pool.shutdown()
+            render_pool.WORKER_SCRIPT = previous
+            for name in ('LOAD_TEST_CLIP', 'LOAD_TEST_RENDER_SECONDS'):
+                os.environ.pop(name, None)
+
+
+def _pids(pool: RenderPool) -> set:
+    return {worker['pid'] for worker in pool.stats()['workers']}
+
+
+def test_pool_spawns_its_workers_up_front():
+    with standin_pool(size=2) as (pool, render):
+        pool.start()
+        stats = pool.stats()
+        assert stats['size'] == 2 and stats['idle'] == 2 and stats['busy'] == 0
+        assert len(_pids(pool)) == 2
+
+
+def test_jobs_run_on_separate_workers():
+    with standin_pool(size=2) as (pool, render):
+        pool.start()
+        handles = [render('a'), render('b')]
+        assert pool.stats()['busy'] == 2
+        results = [handle.wait() for handle in handles]
+
+        assert all(result['ok'] for result in results)
+        assert handles[0].worker.pid != handles[1].worker.pid
+        assert pool.stats()['idle'] == 2
+
+        # Once warm, a worker takes jobs without waiting for a process to start
+        again = render('c')
+        assert again.wait()['ok'] and again.worker.pid in _pids(pool)
+        assert 'spawn' not in again.timings and 'render_frames' in again.timings
+
+
+def test_worker_is_recycled_after_max_jobs():
+    with standin_pool(size=1, max_jobs=2) as (pool, render):
+        first = render('a')
+        first.wait()
+        second = render('b')
+        second.wait()
+        assert first.worker is second.worker
+
+        third = render('c')
+        assert third.wait()['ok']
+        assert third.worker is not first.worker
+        first.worker.process.wait(timeout=10)
+        assert _pids(pool) == {third.worker.pid}
+
+
+def test_worker_is_recycled_after_a_failed_job():
+    with standin_pool(size=1) as (pool, render):
+        failed = render('a', kind='unknown')
+        result = failed.wait()
+        assert not result['ok'] and 'Unknown job kind' in result['error']
+
+        handle = render('b')
+        assert handle.wait()['ok']
+        assert handle.worker is not failed.worker
+
+
+def test_dead_workers_are_replaced():
+    with standin_pool(size=1) as (pool, render):
+        pool.start()
+        [idle_pid] = _pids(pool)
+        os.kill(idle_pid, signal.SIGKILL)
+        time.sleep(0.2)
+        handle = render('a')
+        assert handle.wait()['ok'] and handle.worker.pid != idle_pid
+
+        # Dying mid-job fails that job only
+        busy = render('b')
+        threading.Timer(0.1, os.kill, (busy.worker.pid, signal.SIGKILL)).start()
+        result = busy.wait()
+        assert not result['ok'] and 'exited' in result['error']
+        assert render('c').wait()['ok']
+        assert busy.worker.pid not in _pids(pool)
+
+
+if __name__ == "__main__":
+    test_pool_spawns_its_workers_up_front()
+    test_jobs_run_on_separate_workers()
+    test_worker_is_recycled_after_max_jobs()
+    test_worker_is_recycled_after_a_failed_job()
+    test_dead_workers_are_replaced()
+    print("✅ All render pool tests passed")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test render output multiplexing and progress parsing (no Manim required)
+"""
+import subprocess
+import sys
+
+from render_progress import PipeMultiplexer, RenderProgress, count_animations, parse_tqdm
+
+BAR = "Animation 2: Create(Square):  50%|#####     | 15/30 [00:00<00:00, 60.12frames/s]"
+
+
+def test_parse_tqdm():
+    assert parse_tqdm(BAR) == {"animation": 2, "percentage": 50, "frame": 15, "frames": 30}
+    assert parse_tqdm(" 80%|########  | 8/10 [00:01<00:00,  6.53it/s]")['animation'] is None
+    assert parse_tqdm("Manim Community v0.18.0") is None
+    assert parse_tqdm("Progress: 50% done") is None
+
+
+def test_count_animations():
+    code = "self.play(Write(t))\nself.wait(1)\nself.play(FadeOut(t))\n"
+    assert count_animations(code) == 3
+    assert count_animations("x = 1") is None
+
+
+def test_progress_is_coalesced():
+    now = [0.0]
+    progress = RenderProgress(total_animations=4, max_hz=2, clock=lambda: now[0])
+
+    first = progress.update(parse_tqdm(BAR))
+    assert first['percentage'] == 62  # (2 + 15/30) / 4
+    assert first['total_animations'] == 4
+
+    # Updates inside the interval are held back; only the latest survives
+    now[0] = 0.1
+    assert progress.update(parse_tqdm(BAR.replace("15/30", "20/30"))) is None
+    assert progress.update(parse_tqdm(BAR.replace("15/30", "24/30"))) is None
+    now[0] = 0.6
+    assert progress.update(parse_tqdm(BAR.replace("15/30", "27/30")))['percentage'] == 72
+    assert progress.flush() is None
+
+    # More animations than estimated raise the total instead of passing 100%
+    update = progress.update(parse_tqdm(BAR.replace("Animation 2", "Animation 5")))
+    assert update is None and progress.flush()['total_animations'] == 6
+
+
+def test_both_pipes_drain_without_blocking():
+    # Far more stdout than a pipe buffer holds, while stderr redraws a progress bar
+    script = (
+        "import sys\n"
+        "sys.stdout.write(('y' * 99 + '\\n') * 5000)\n"
+        "for i in range(5):\n"
+        "    sys.stderr.write(f'\\r{i * 25}%|##| {i}/4 [00:00<00:00]')\n"
+        "    sys.stderr.flush()\n"
+    )
+    process = subprocess.Popen([sys.executable, '-c', script],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    mux = PipeMultiplexer()
+    mux.register(process.stdout, 'stdout')
+    mux.register(process.stderr, 'stderr')
+
+    lines = {'stdout': [], 'stderr': []}
+    while mux.open:
+        for name, line in mux.read(timeout=10):
+            lines[name].append(line)
+    assert process.wait(timeout=10) == 0
+
+    assert len(lines['stdout']) == 5000
+    bars = [parse_tqdm(line) for line in lines['stderr']]
+    assert [bar['percentage'] for bar in bars if bar] == [0, 25, 50, 75, 100]
+
+
+if __name__ == "__main__":
+    test_parse_tqdm()
+    test_count_animations()
+    test_progress_is_coalesced()
+    test_both_pipes_drain_without_blocking()
+    print("✅ All render progress tests passed")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test the per-stage render timing (uses a stand-in scene, no Manim required)
+"""
+import time
+
+from stage_timer import StageTimer, render_scene_timed
+
+
+class FakeFileWriter:
+    def finish(self):
+        time.sleep(0.02)
+
+
+class FakeRenderer:
+    def __init__(self):
+        self.file_writer = FakeFileWriter()
+
+    def play(self, scene, *animations):
+        time.sleep(0.03)
+
+
+class FakeScene:
+    """Mirrors how Manim's Scene.render drives its renderer"""
+
+    def __init__(self):
+        self.renderer = FakeRenderer()
+
+    def render(self):
+        time.sleep(0.01)  # construct() work outside of play()
+        self.renderer.play(self)
+        self.renderer.play(self)
+        self.renderer.file_writer.finish()
+
+
+def test_render_is_split_into_stages():
+    timer = StageTimer()
+    scene = FakeScene()
+    render_scene_timed(scene, timer)
+
+    timings = timer.as_dict()
+    assert timings['render_frames'] >= 0.06
+    assert timings['concat'] >= 0.02
+    assert 0.01 <= timings['construct'] < 0.03
+    # The renderer is restored afterwards
+    assert 'play' not in vars(scene.renderer)
+
+
+def test_stages_accumulate():
+    timer = StageTimer()
+    timer.update({"spawn": 0.5})
+    timer.add('spawn', 0.25)
+    timer.add('copy', -1)
+    assert timer.as_dict() == {"spawn": 0.75, "copy": 0.0}
+
+
+if __name__ == "__main__":
+    test_render_is_split_into_stages()
+    test_stages_accumulate()
+    print("✅ All stage timer tests passed")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test stream-copy muxing in combine_video_audio (needs ffmpeg, no server)
+"""
+import subprocess
+import tempfile
+from pathlib import Path
+
+from tts_generator import _ffmpeg_path, combine_video_audio, probe_media
+from video_packaging import h264_profile_level
+
+
+def make_assets(ffmpeg: str, work_dir: Path, video_seconds: float, audio_seconds: float, *encode_args: str):
+    video_path = work_dir / "video.mp4"
+    audio_path = work_dir / "audio.wav"
+    subprocess.run([ffmpeg, '-loglevel', 'error', '-y', '-f', 'lavfi',
+                    '-i', 'testsrc=size=854x480:rate=24', '-t', str(video_seconds),
+                    '-c:v', 'libx264', '-pix_fmt', 'yuv420p', *encode_args, str(video_path)], check=True)
+    subprocess.run([ffmpeg, '-loglevel', 'error', '-y', '-f', 'lavfi',
+                    '-i', f'sine=frequency=440:duration={audio_seconds}', str(audio_path)], check=True)
+    return video_path, audio_path
+
+
+def test_mux_extends_video_to_audio_length():
+    ffmpeg = _ffmpeg_path()
+    if not ffmpeg:
+        print("⚠️  ffmpeg not available, skipping")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video_path, audio_path = make_assets(ffmpeg, tmp, 2.0, 3.5)
+        output_path = tmp / "combined.mp4"
+        scratch = tmp / "job"
+
+        assert combine_video_audio(video_path, audio_path, output_path, work_dir=scratch)
+        info = probe_media(ffmpeg, output_path)
+        assert abs(info['duration'] - 3.5) < 0.2
+        assert info['fps'] == 24
+        # Intermediates stay inside the job's scratch directory
+        assert (scratch / 'tail.mp4').exists()
+
+
+def test_mux_keeps_longer_video():
+    ffmpeg = _ffmpeg_path()
+    if not ffmpeg:
+        print("⚠️  ffmpeg not available, skipping")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video_path, audio_path = make_assets(ffmpeg, tmp, 3.0, 1.0)
+        output_path = tmp / "combined.mp4"
+
+        assert combine_video_audio(video_path, audio_path, output_path)
+        assert abs(probe_media(ffmpeg, output_path)['duration'] - 3.0) < 0.2
+
+
+def test_tail_keeps_the_render_profile_and_level():
+    ffmpeg = _ffmpeg_path()
+    if not ffmpeg:
+        print("⚠️  ffmpeg not available, skipping")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video_path, audio_path = make_assets(ffmpeg, tmp, 1.0, 2.0, '-profile:v', 'main', '-level:v', '3.1')
+        assert h264_profile_level(video_path) == ('main', '3.1')
+        output_path = tmp / "combined.mp4"
+        scratch = tmp / "job"
+
+        assert combine_video_audio(video_path, audio_path, output_path, work_dir=scratch)
+        assert h264_profile_level(scratch / 'tail.mp4') == ('main', '3.1')
+        assert h264_profile_level(output_path) == ('main', '3.1')
+        assert h264_profile_level(audio_path) is None
+
+
+if __name__ == "__main__":
+    test_mux_extends_video_to_audio_length()
+    test_mux_keeps_longer_video()
+    test_tail_keeps_the_render_profile_and_level()
+    print("✅ All stream mux tests passed")
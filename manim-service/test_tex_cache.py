@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test the shared TeX cache (no Manim or LaTeX required)
+"""
+import tempfile
+import time
+from pathlib import Path
+
+from tex_cache import SharedTexCache, load_prewarm_expressions
+
+SOURCE = "\\documentclass{standalone}\\begin{document}\\begin{align*}x^2\\end{align*}\\end{document}"
+
+
+def test_compiled_svgs_are_shared():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        compiled = []
+
+        def compile_svg():
+            time.sleep(0.05)
+            svg = tmp / f"compiled{len(compiled)}.svg"
+            svg.write_text("<svg/>")
+            compiled.append(svg)
+            return svg
+
+        cache = SharedTexCache(tmp / 'cache', max_bytes=1024 * 1024)
+        key = cache.key(SOURCE, 'latex', '.dvi')
+        first = cache.svg_file(key, compile_svg)
+        assert first.read_text() == "<svg/>" and first.parent == tmp / 'cache'
+        stats = cache.job_stats()
+        assert stats['misses'] == 1 and stats['compile_seconds'] >= 0.05
+
+        # Another worker reuses the SVG and is credited with the compile time
+        other_worker = SharedTexCache(tmp / 'cache', max_bytes=1024 * 1024)
+        assert other_worker.svg_file(key, compile_svg) == first
+        stats = other_worker.job_stats()
+        assert stats['hits'] == 1 and stats['compile_seconds'] == 0
+        assert stats['seconds_saved'] >= 0.05
+        assert len(compiled) == 1
+
+        # The template and compiler are part of the key
+        assert cache.key(SOURCE.replace('align*', 'gather*'), 'latex', '.dvi') != key
+        assert cache.key(SOURCE, 'xelatex', '.xdv') != key
+
+
+def test_prewarm_list_skips_comments_and_blank_lines():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'prewarm.txt'
+        path.write_text("# digits\n0\n\n  x^2  \n\\frac{1}{2}\n")
+        assert load_prewarm_expressions(path) == ['0', 'x^2', '\\frac{1}{2}']
+        assert load_prewarm_expressions(Path(tmp) / 'missing.txt') == []
+
+
+if __name__ == "__main__":
+    test_compiled_svgs_are_shared()
+    test_prewarm_list_skips_comments_and_blank_lines()
+    print("✅ All TeX cache tests passed")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test that repeated narrations are served from the TTS cache (no network required)
+"""
+import os
+import tempfile
+from pathlib import Path
+
+import tts_generator
+from disk_cache import DiskLRUCache
+from tts_generator import generate_tts, strip_markdown, tts_cache_key
+
+
+def test_cache_key_separates_voice_rate_and_provider():
+    text = strip_markdown("**Two** plus three")
+    base = tts_cache_key(text, "longxiaochun", 0, 'qwen')
+    assert base == tts_cache_key(strip_markdown("Two plus three"), "longxiaochun", 0, 'qwen')
+    assert base != tts_cache_key(text, "longwan", 0, 'qwen')
+    assert base != tts_cache_key(text, "longxiaochun", 100, 'qwen')
+    assert base != tts_cache_key(text, "longxiaochun", 0, 'gtts')
+
+
+def test_repeat_narration_is_served_from_cache():
+    os.environ.pop('QWEN_API_KEY', None)
+    narration = "# Step 1\nAdd **two** and three."
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        original_cache = tts_generator.TTS_CACHE
+        tts_generator.TTS_CACHE = DiskLRUCache(tmp / 'tts-cache', 1024 * 1024, '.audio')
+        try:
+            seeded = tmp / "seed.mp3"
+            seeded.write_bytes(b'cached audio')
+            key = tts_cache_key(strip_markdown(narration), "longxiaochun", 0, 'gtts')
+            tts_generator.TTS_CACHE.put(key, seeded)
+
+            # A hit must not reach gTTS, so this works without network access
+            output_path = tmp / "out.wav"
+            assert generate_tts(narration, output_path)
+            assert output_path.read_bytes() == b'cached audio'
+            assert tts_generator.TTS_CACHE.stats()['hits'] == 1
+        finally:
+            tts_generator.TTS_CACHE = original_cache
+
+
+def test_entry_evicted_during_lookup_is_a_miss():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        original_cache = tts_generator.TTS_CACHE
+        cache = tts_generator.TTS_CACHE = DiskLRUCache(tmp / 'tts-cache', 1024 * 1024, '.audio')
+        try:
+            seeded = tmp / "seed.mp3"
+            seeded.write_bytes(b'cached audio')
+            cache.put('key', seeded)
+
+            # Another worker evicts the entry between get() and the link
+            lookup = cache.get
+            def get_then_evict(key):
+                path = lookup(key)
+                path.unlink()
+                return path
+            cache.get = get_then_evict
+
+            output_path = tmp / "out.wav"
+            assert not tts_generator._load_cached_audio('key', output_path)
+            assert not output_path.exists()
+        finally:
+            tts_generator.TTS_CACHE = original_cache
+
+
+if __name__ == "__main__":
+    test_cache_key_separates_voice_rate_and_provider()
+    test_repeat_narration_is_served_from_cache()
+    test_entry_evicted_during_lookup_is_a_miss()
+    print("✅ All TTS cache tests passed")
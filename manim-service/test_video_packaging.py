@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test fast-start remuxing and HLS packaging (needs ffmpeg, no server)
+"""
+import subprocess
+import tempfile
+from pathlib import Path
+
+from video_packaging import (ffmpeg_path, is_fast_start, make_fast_start, package_hls, probe_media,
+                             top_level_atoms)
+
+
+def make_video(ffmpeg: str, path: Path, seconds: float):
+    # ffmpeg's MP4 muxer writes the moov atom last unless asked otherwise
+    subprocess.run([ffmpeg, '-loglevel', 'error', '-y', '-f', 'lavfi',
+                    '-i', 'testsrc=size=320x240:rate=24', '-f', 'lavfi', '-i', f'sine=duration={seconds}',
+                    '-t', str(seconds), '-c:v', 'libx264', '-g', '24', '-pix_fmt', 'yuv420p', '-c:a', 'aac',
+                    str(path)], check=True)
+
+
+def test_fast_start_moves_moov_in_place():
+    ffmpeg = ffmpeg_path()
+    if not ffmpeg:
+        print("⚠️  ffmpeg not available, skipping")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video = Path(tmp) / "video.mp4"
+        make_video(ffmpeg, video, 2)
+        atoms = top_level_atoms(video)
+        assert atoms.index('mdat') < atoms.index('moov') and not is_fast_start(video)
+
+        assert make_fast_start(video, ffmpeg)
+        assert is_fast_start(video)
+        assert abs(probe_media(ffmpeg, video)['duration'] - 2) < 0.1
+        # Already fast-start: left untouched, and no temporary files remain
+        assert not make_fast_start(video, ffmpeg)
+        assert [path.name for path in Path(tmp).iterdir()] == ["video.mp4"]
+
+
+def test_hls_segments_without_reencoding():
+    ffmpeg = ffmpeg_path()
+    if not ffmpeg:
+        print("⚠️  ffmpeg not available, skipping")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video = Path(tmp) / "video.mp4"
+        make_video(ffmpeg, video, 6)
+        playlist = package_hls(video, Path(tmp) / "hls", segment_seconds=2, ffmpeg=ffmpeg)
+
+        lines = playlist.read_text().splitlines()
+        assert '#EXT-X-PLAYLIST-TYPE:VOD' in lines and '#EXT-X-ENDLIST' in lines
+        assert '#EXT-X-MAP:URI="init.mp4"' in lines
+        segments = [line for line in lines if line.endswith('.m4s')]
+        assert segments == ['segment_000.m4s', 'segment_001.m4s', 'segment_002.m4s']
+        assert all((playlist.parent / name).exists() for name in segments + ['init.mp4'])
+
+
+if __name__ == "__main__":
+    test_fast_start_moves_moov_in_place()
+    test_hls_segments_without_reencoding()
+    print("✅ All video packaging tests passed")
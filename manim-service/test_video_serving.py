@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test range, conditional and proxy-offloaded video responses (no Manim required)
+"""
+import tempfile
+from pathlib import Path
+
+from flask import Flask
+
+from video_serving import send_video, video_etag
+
+VIDEO_ID = "0b6f7c2e-4a8d-4b9e-9f3a-2c1d5e6f7a8b"
+DATA = bytes(range(256)) * 64
+
+
+def _client(media_dir: Path, mode: str = ''):
+    app = Flask(__name__)
+
+    @app.route('/video/<video_id>')
+    def get_video(video_id):
+        return send_video(media_dir / f"{video_id}.mp4", video_id, mode=mode)
+
+    return app.test_client()
+
+
+def test_full_and_range_responses():
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / f"{VIDEO_ID}.mp4").write_bytes(DATA)
+        client = _client(Path(tmp))
+
+        response = client.get(f'/video/{VIDEO_ID}')
+        assert response.status_code == 200 and response.data == DATA
+        assert response.headers['ETag'] == f'"{video_etag(VIDEO_ID, len(DATA))}"'
+        assert response.headers['Accept-Ranges'] == 'bytes'
+        cache_control = response.headers['Cache-Control']
+        assert 'public' in cache_control and 'immutable' in cache_control and 'max-age=31536000' in cache_control
+        assert 'no-cache' not in cache_control
+
+        response = client.get(f'/video/{VIDEO_ID}', headers={'Range': 'bytes=100-199'})
+        assert response.status_code == 206 and response.data == DATA[100:200]
+        assert response.headers['Content-Range'] == f'bytes 100-199/{len(DATA)}'
+
+
+def test_conditional_requests():
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / f"{VIDEO_ID}.mp4").write_bytes(DATA)
+        client = _client(Path(tmp))
+        first = client.get(f'/video/{VIDEO_ID}')
+
+        response = client.get(f'/video/{VIDEO_ID}', headers={'If-None-Match': first.headers['ETag']})
+        assert response.status_code == 304 and response.data == b''
+        response = client.get(f'/video/{VIDEO_ID}', headers={'If-Modified-Since': first.headers['Last-Modified']})
+        assert response.status_code == 304
+        response = client.get(f'/video/{VIDEO_ID}', headers={'If-None-Match': '"other"'})
+        assert response.status_code == 200
+
+
+def test_proxy_modes_send_no_body():
+    with tempfile.TemporaryDirectory() as tmp:
+        video = Path(tmp) / f"{VIDEO_ID}.mp4"
+        video.write_bytes(DATA)
+
+        client = _client(Path(tmp), mode='x-accel')
+        response = client.get(f'/video/{VIDEO_ID}', headers={'Range': 'bytes=0-9'})
+        assert response.status_code == 200 and response.data == b''
+        assert response.headers['X-Accel-Redirect'] == f'/protected-media/{VIDEO_ID}.mp4'
+        assert 'immutable' in response.headers['Cache-Control']
+        response = client.get(f'/video/{VIDEO_ID}', headers={'If-None-Match': response.headers['ETag']})
+        assert response.status_code == 304
+
+        response = _client(Path(tmp), mode='x-sendfile').get(f'/video/{VIDEO_ID}')
+        assert response.headers['X-Sendfile'] == str(video.absolute()) and response.data == b''
+
+
+if __name__ == "__main__":
+    test_full_and_range_responses()
+    test_conditional_requests()
+    test_proxy_modes_send_no_body()
+    print("✅ All video serving tests passed")
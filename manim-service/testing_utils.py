@@ -0,0 +1,29 @@
+"""
+Helpers shared by the test scripts (no Manim required)
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Optional
+
+SERVICE_DIR = Path(__file__).parent.absolute()
+
+
+def run_script(source: str, *args: str, cwd: Optional[Path] = None, env: Optional[dict] = None,
+               timeout: float = 120):
+    """
+    Run a Python program in a fresh interpreter that can import the service's
+    modules, and return the JSON it prints on its last line
+
+    Args:
+        args: The program's sys.argv[1:]
+        cwd: Its working directory (media/ and temp/ are created there)
+        env: Variables to set on top of this process's environment
+    """
+    output = subprocess.run([sys.executable, '-c', source, *map(str, args)], cwd=cwd,
+                            env={**os.environ, 'PYTHONPATH': str(SERVICE_DIR), **(env or {})},
+                            capture_output=True, text=True, timeout=timeout)
+    assert output.returncode == 0, output.stderr
+    return json.loads(output.stdout.strip().splitlines()[-1])
@@ -0,0 +1,121 @@
+"""
+Shared cache of compiled TeX
+Every MathTex/Tex shells out to latex and dvisvgm, and Manim keeps the result
+in the job's own media tree. This cache stores the SVGs in one place used by
+all render workers, keyed on the full TeX source (expression, environment and
+template), and records how long each one took to compile so hits can be
+reported as compile time saved
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from disk_cache import DiskLRUCache
+from render_config import manim_version
+
+TEX_CACHE_DIR = Path(os.getenv('TEX_CACHE_DIR', './media/tex-cache'))
+TEX_CACHE_MAX_MB = int(os.getenv('TEX_CACHE_MAX_MB', '256'))
+# One expression per line, compiled when a render worker starts
+TEX_PREWARM_FILE = Path(os.getenv('TEX_PREWARM_FILE', Path(__file__).parent / 'tex_prewarm.txt'))
+
+
+def load_prewarm_expressions(path: Path = TEX_PREWARM_FILE) -> List[str]:
+    """Expressions to compile ahead of time, skipping blank lines and # comments"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = [line.strip() for line in f]
+    except FileNotFoundError:
+        return []
+    return [line for line in lines if line and not line.startswith('#')]
+
+
+class SharedTexCache:
+    """Size-bounded LRU store of compiled TeX SVGs"""
+
+    def __init__(self, root: Path = TEX_CACHE_DIR, max_bytes: int = TEX_CACHE_MAX_MB * 1024 * 1024):
+        self.store = DiskLRUCache(root, max_bytes, '.svg', name='tex')
+        # latex and dvisvgm run in a directory private to this process, since
+        # Manim deletes every non-SVG file in its tex_dir after a compile
+        self.scratch_dir = Path(tempfile.gettempdir()) / f"qed-tex-{os.getpid()}"
+        self.reset_job_stats()
+
+    def reset_job_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.compile_seconds = 0.0
+        self.seconds_saved = 0.0
+
+    def job_stats(self) -> dict:
+        """Lookups and compile time since the last reset_job_stats()"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "compile_seconds": round(self.compile_seconds, 4),
+            "seconds_saved": round(self.seconds_saved, 4),
+        }
+
+    def key(self, tex_source: str, tex_compiler: str, output_format: str) -> str:
+        payload = {
+            "tex": tex_source,
+            "compiler": tex_compiler,
+            "format": output_format,
+            "manim": manim_version(),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def svg_file(self, key: str, compile_svg) -> Path:
+        """
+        Path to the cached SVG for key, compiling and storing it on a miss
+
+        Args:
+            key: Cache key from key()
+            compile_svg: Callable returning the path of a freshly compiled SVG
+        """
+        cached = self.store.get(key)
+        if cached is not None:
+            self.hits += 1
+            self.seconds_saved += self.store.get_meta(key).get('compile_seconds', 0.0)
+            return cached
+
+        self.misses += 1
+        start = time.monotonic()
+        compiled = Path(compile_svg())
+        seconds = time.monotonic() - start
+        self.compile_seconds += seconds
+        try:
+            return self.store.put(key, compiled, meta={"compile_seconds": round(seconds, 4)})
+        except OSError as e:
+            # Sharing is an optimization; the compiled file is still usable
+            print(f"[CACHE] Failed to share TeX output {compiled.name}: {e}")
+            return compiled
+
+    def install(self):
+        """Route Manim's MathTex/Tex compilation through this cache"""
+        from manim import config, tempconfig
+        from manim.mobject.text import tex_mobject
+        from manim.utils import tex_file_writing
+
+        original = tex_file_writing.tex_to_svg_file
+
+        def tex_to_svg_file(expression, environment=None, tex_template=None):
+            if tex_template is None:
+                tex_template = config.tex_template
+            if environment is not None:
+                tex_source = tex_template.get_texcode_for_expression_in_env(expression, environment)
+            else:
+                tex_source = tex_template.get_texcode_for_expression(expression)
+
+            def compile_svg():
+                self.scratch_dir.mkdir(parents=True, exist_ok=True)
+                with tempconfig({"tex_dir": str(self.scratch_dir)}):
+                    return original(expression, environment=environment, tex_template=tex_template)
+
+            key = self.key(tex_source, tex_template.tex_compiler, tex_template.output_format)
+            return self.svg_file(key, compile_svg)
+
+        tex_file_writing.tex_to_svg_file = tex_to_svg_file
+        tex_mobject.tex_to_svg_file = tex_to_svg_file
@@ -1,14 +1,30 @@
 """
 Text-to-Speech generation using QWEN TTS API
 """
+import hashlib
+import json
 import os
+import shutil
+import subprocess
+import tempfile
+import time
 from pathlib import Path
+from typing import Optional
 import dashscope
 from dashscope.audio.tts_v2 import SpeechSynthesizer
 
+from disk_cache import DiskLRUCache
+from metrics import FALLBACKS, MUX_SECONDS, TTS_SECONDS
+from video_packaging import (ffmpeg_killed, ffmpeg_path as _ffmpeg_path, h264_profile_level, probe_media,
+                             run_ffmpeg as _run_ffmpeg)
 
 import re
 
+# Synthesized audio is cached on disk, shared by all API worker processes
+TTS_CACHE_DIR = Path(os.getenv('TTS_CACHE_DIR', './media/tts-cache'))
+TTS_CACHE_MAX_MB = int(os.getenv('TTS_CACHE_MAX_MB', '256'))
+TTS_CACHE = DiskLRUCache(TTS_CACHE_DIR, TTS_CACHE_MAX_MB * 1024 * 1024, '.audio', name='tts')
+
 def strip_markdown(text: str) -> str:
     """
     Remove Markdown formatting from text for TTS
@@ -34,6 +50,38 @@ def strip_markdown(text: str) -> str:
     return text.strip()
 
 
+def tts_cache_key(clean_text: str, voice: str, speech_rate: int, provider: str) -> str:
+    """Hash of everything that determines the synthesized audio"""
+    payload = {"text": clean_text, "voice": voice, "speech_rate": speech_rate, "provider": provider}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _load_cached_audio(key: str, output_path: Path) -> bool:
+    """Copy a cached narration to output_path, returning False on a miss"""
+    cached_path = TTS_CACHE.get(key)
+    if cached_path is None:
+        return False
+    try:
+        os.link(cached_path, output_path)
+    except FileNotFoundError:
+        # Evicted by another worker between lookup and link
+        return False
+    except OSError:
+        try:
+            shutil.copy(cached_path, output_path)
+        except FileNotFoundError:
+            return False
+    print(f"[TTS] Cache hit, audio copied to {output_path}")
+    return True
+
+
+def _store_cached_audio(key: str, output_path: Path):
+    try:
+        TTS_CACHE.put(key, output_path)
+    except OSError as e:
+        print(f"[TTS] Failed to cache audio: {e}")
+
+
 def generate_tts(text: str, output_path: Path, voice: str = "longxiaochun", speech_rate: int = 0) -> bool:
     """
     Generate TTS audio using QWEN's DashScope API
@@ -66,6 +114,11 @@ def generate_tts(text: str, output_path: Path, voice: str = "longxiaochun", spee
         
         # Try Qwen TTS if API key is present
         if api_key:
+            qwen_key = tts_cache_key(clean_text, voice, speech_rate, 'qwen')
+            start = time.monotonic()
+            if _load_cached_audio(qwen_key, output_path):
+                TTS_SECONDS.labels('qwen', 'cache_hit').observe(time.monotonic() - start)
+                return True
             try:
                 print(f"[TTS] Attempting Qwen TTS for text: {clean_text[:50]}...")
                 dashscope.api_key = api_key
@@ -74,23 +127,36 @@ def generate_tts(text: str, output_path: Path, voice: str = "longxiaochun", spee
                 if audio_data:
                     with open(output_path, 'wb') as f:
                         f.write(audio_data)
+                    TTS_SECONDS.labels('qwen', 'ok').observe(time.monotonic() - start)
                     print(f"[TTS] Qwen TTS success. Audio saved to {output_path}")
+                    _store_cached_audio(qwen_key, output_path)
                     return True
+                TTS_SECONDS.labels('qwen', 'error').observe(time.monotonic() - start)
             except Exception as e:
+                TTS_SECONDS.labels('qwen', 'error').observe(time.monotonic() - start)
                 print(f"[TTS] Qwen TTS failed: {str(e)}")
                 print("[TTS] Falling back to gTTS...")
+            FALLBACKS.labels('gtts').inc()
         else:
             print("[TTS] QWEN_API_KEY not found. Using gTTS fallback...")
 
         # Fallback to gTTS
+        gtts_key = tts_cache_key(clean_text, voice, speech_rate, 'gtts')
+        start = time.monotonic()
+        if _load_cached_audio(gtts_key, output_path):
+            TTS_SECONDS.labels('gtts', 'cache_hit').observe(time.monotonic() - start)
+            return True
         try:
             from gtts import gTTS
             print(f"[TTS] Generating audio with gTTS for text: {clean_text[:50]}...")
             tts = gTTS(text=clean_text, lang='en', slow=False)
             tts.save(str(output_path))
+            TTS_SECONDS.labels('gtts', 'ok').observe(time.monotonic() - start)
             print(f"[TTS] gTTS success. Audio saved to {output_path}")
+            _store_cached_audio(gtts_key, output_path)
             return True
         except Exception as e:
+            TTS_SECONDS.labels('gtts', 'error').observe(time.monotonic() - start)
             print(f"[TTS] gTTS failed: {str(e)}")
             return False
 
@@ -101,14 +167,110 @@ def generate_tts(text: str, output_path: Path, voice: str = "longxiaochun", spee
         return False
 
 
-def combine_video_audio(video_path: Path, audio_path: Path, output_path: Path) -> bool:
+def _mux_stream_copy(ffmpeg: str, video_path: Path, audio_path: Path, output_path: Path, work_dir: Path):
     """
-    Combine video and audio using moviepy, ensuring proper sync
+    Mux audio into the video without re-encoding the video stream
+
+    When the narration outlasts the video, only a short freeze-frame tail is
+    encoded (from the last frame) and appended with the concat demuxer
+    """
+    video = probe_media(ffmpeg, video_path)
+    audio = probe_media(ffmpeg, audio_path)
+    print(f"[TTS] Video duration: {video['duration']:.2f}s, Audio duration: {audio['duration']:.2f}s")
+
+    video_input = ['-i', str(video_path)]
+    extra_time = audio['duration'] - video['duration']
+    if extra_time > 0.05:
+        print(f"[TTS] Audio is {extra_time:.2f}s longer than video. Appending frozen last frame...")
+        fps = video.get('fps', 24)
+        last_frame = work_dir / 'last_frame.png'
+        tail_path = work_dir / 'tail.mp4'
+
+        # Only the final second is decoded to grab the last frame
+        _run_ffmpeg(ffmpeg, '-sseof', '-1', '-i', str(video_path), '-update', '1', str(last_frame))
+        # A still image compresses well even at the fastest presets
+        tail_args = ['-loop', '1', '-framerate', f'{fps:g}', '-i', str(last_frame),
+                     '-t', f'{extra_time:.3f}', '-c:v', 'libx264', '-preset', 'veryfast', '-tune', 'stillimage',
+                     '-pix_fmt', 'yuv420p']
+        profile_level = h264_profile_level(video_path)
+        if profile_level:
+            # The concat demuxer copies both parts into one stream: keep the render's profile and level
+            tail_args += ['-profile:v', profile_level[0], '-level:v', profile_level[1]]
+        if video.get('tbn'):
+            tail_args += ['-video_track_timescale', str(video['tbn'])]
+        _run_ffmpeg(ffmpeg, *tail_args, str(tail_path))
+
+        concat_list = work_dir / 'concat.txt'
+        concat_list.write_text(f"file '{video_path.absolute()}'\nfile '{tail_path.absolute()}'\n")
+        video_input = ['-f', 'concat', '-safe', '0', '-i', str(concat_list)]
+    elif video['duration'] > audio['duration'] + 1:
+        # Video is significantly longer - this is OK, video will be silent at end
+        print(f"[TTS] Video is {video['duration'] - audio['duration']:.2f}s longer than audio")
+
+    print(f"[TTS] Writing combined video to {output_path} (video stream copied)...")
+    _run_ffmpeg(ffmpeg, *video_input, '-i', str(audio_path),
+                '-map', '0:v:0', '-map', '1:a:0',
+                '-c:v', 'copy', '-c:a', 'aac', '-b:a', '192k',
+                '-movflags', '+faststart', str(output_path))
+
+
+def combine_video_audio(video_path: Path, audio_path: Path, output_path: Path,
+                        work_dir: Optional[Path] = None) -> bool:
+    """
+    Combine video and audio, ensuring proper sync
+
+    The video stream is copied untouched with ffmpeg; moviepy (full re-encode)
+    is only used if that fails
 
     Args:
         video_path: Path to the video file
         audio_path: Path to the audio file
         output_path: Path where combined video will be saved
+        work_dir: Per-job scratch directory for intermediate files
+                  (a temporary one is created and removed if omitted)
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    owns_work_dir = work_dir is None
+    work_dir = Path(tempfile.mkdtemp(prefix='mux-')) if owns_work_dir else Path(work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        ffmpeg = _ffmpeg_path()
+        if ffmpeg:
+            start = time.monotonic()
+            try:
+                print(f"[TTS] Combining video {video_path} with audio {audio_path} (stream copy)...")
+                _mux_stream_copy(ffmpeg, Path(video_path), Path(audio_path), Path(output_path), work_dir)
+                MUX_SECONDS.labels('stream_copy', 'ok').observe(time.monotonic() - start)
+                print(f"[TTS] Combined video saved to {output_path}")
+                return True
+            except (subprocess.CalledProcessError, ValueError, OSError) as e:
+                if ffmpeg_killed():
+                    # The job was cancelled; don't start a re-encode nobody will watch
+                    MUX_SECONDS.labels('stream_copy', 'cancelled').observe(time.monotonic() - start)
+                    print("[TTS] Mux cancelled")
+                    return False
+                MUX_SECONDS.labels('stream_copy', 'error').observe(time.monotonic() - start)
+                details = getattr(e, 'stderr', '') or str(e)
+                print(f"[TTS] Stream-copy mux failed: {details.strip()}")
+                print("[TTS] Falling back to moviepy re-encode...")
+        else:
+            print("[TTS] ffmpeg not found, using moviepy re-encode...")
+
+        FALLBACKS.labels('moviepy').inc()
+        start = time.monotonic()
+        combined = _combine_with_moviepy(video_path, audio_path, output_path, work_dir)
+        MUX_SECONDS.labels('moviepy', 'ok' if combined else 'error').observe(time.monotonic() - start)
+        return combined
+    finally:
+        if owns_work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _combine_with_moviepy(video_path: Path, audio_path: Path, output_path: Path, work_dir: Path) -> bool:
+    """
+    Combine video and audio using moviepy (decodes and re-encodes the whole clip)
 
     Returns:
         bool: True if successful, False otherwise
@@ -151,12 +313,13 @@ def combine_video_audio(video_path: Path, audio_path: Path, output_path: Path) -
             str(output_path),
             codec='libx264',
             audio_codec='aac',
-            temp_audiofile='temp-audio.m4a',
+            temp_audiofile=str(work_dir / 'temp-audio.m4a'),
             remove_temp=True,
             fps=video.fps,
             preset='medium',
             bitrate='5000k',  # Higher quality video
             audio_bitrate='192k',  # Good quality audio
+            ffmpeg_params=['-movflags', '+faststart'],  # Playable before fully downloaded
             logger=None  # Suppress moviepy logging
         )
         
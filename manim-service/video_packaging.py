@@ -0,0 +1,235 @@
+"""
+Packaging of finished videos for playback while downloading
+Published MP4s are made fast-start (moov atom ahead of the media data), and
+longer videos can also be split into an HLS playlist. Both only remux with
+ffmpeg; the video stream is never re-encoded
+"""
+import os
+import re
+import shutil
+import struct
+import subprocess
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+# Also package videos at least HLS_MIN_SECONDS long as HLS (media/hls/<video_id>/index.m3u8)
+HLS_ENABLED = os.getenv('HLS_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+HLS_MIN_SECONDS = float(os.getenv('HLS_MIN_SECONDS', '30'))
+HLS_SEGMENT_SECONDS = float(os.getenv('HLS_SEGMENT_SECONDS', '4'))
+
+HLS_DIR = 'hls'
+HLS_PLAYLIST = 'index.m3u8'
+
+# The FfmpegProcesses that run_ffmpeg calls on this thread belong to
+_tracking = threading.local()
+
+
+class FfmpegProcesses:
+    """The ffmpeg processes run on behalf of one job, so cancelling it can kill them"""
+
+    def __init__(self):
+        self.killed = False
+        self._running = set()
+        self._lock = threading.Lock()
+
+    def _started(self, process: subprocess.Popen):
+        with self._lock:
+            self._running.add(process)
+            if not self.killed:
+                return
+        process.kill()
+
+    def _finished(self, process: subprocess.Popen):
+        with self._lock:
+            self._running.discard(process)
+
+    def kill(self):
+        """Kill the running processes; later ones are killed as soon as they start"""
+        with self._lock:
+            self.killed = True
+            running = list(self._running)
+        for process in running:
+            process.kill()
+
+
+@contextmanager
+def track_ffmpeg(processes: FfmpegProcesses):
+    """Record every run_ffmpeg call made on this thread in processes"""
+    previous = getattr(_tracking, 'processes', None)
+    _tracking.processes = processes
+    try:
+        yield processes
+    finally:
+        _tracking.processes = previous
+
+
+def ffmpeg_killed() -> bool:
+    """Whether this thread's ffmpeg processes were killed (its job was cancelled)"""
+    processes = getattr(_tracking, 'processes', None)
+    return bool(processes and processes.killed)
+
+
+def ffmpeg_path() -> Optional[str]:
+    """ffmpeg from PATH, or the binary bundled with imageio-ffmpeg (a moviepy dependency)"""
+    path = shutil.which('ffmpeg')
+    if path:
+        return path
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+def run_ffmpeg(ffmpeg: str, *args: str):
+    """
+    Run ffmpeg to completion
+
+    Raises:
+        subprocess.CalledProcessError: if it fails (or was killed, see track_ffmpeg)
+    """
+    command = [ffmpeg, '-hide_banner', '-loglevel', 'error', '-y', *args]
+    processes = getattr(_tracking, 'processes', None)
+    with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True) as process:
+        if processes:
+            processes._started(process)
+        try:
+            stdout, stderr = process.communicate()
+        finally:
+            if processes:
+                processes._finished(process)
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, command, stdout, stderr)
+
+
+def probe_media(ffmpeg: str, path: Path) -> dict:
+    """
+    Read duration, frame rate and time base from `ffmpeg -i` output
+
+    Returns:
+        dict with "duration" (seconds) and, for videos, "fps" and "tbn"
+    """
+    result = subprocess.run([ffmpeg, '-hide_banner', '-i', str(path)], capture_output=True, text=True)
+    info = {}
+    duration = re.search(r'Duration: (\d+):(\d+):(\d+(?:\.\d+)?)', result.stderr)
+    if not duration:
+        raise ValueError(f"Could not read duration of {path}")
+    hours, minutes, seconds = duration.groups()
+    info['duration'] = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    video_stream = re.search(r'Stream #.*Video: .*', result.stderr)
+    if video_stream:
+        fps = re.search(r'(\d+(?:\.\d+)?) fps', video_stream.group(0))
+        tbn = re.search(r'(\d+(?:\.\d+)?)(k?) tbn', video_stream.group(0))
+        if fps:
+            info['fps'] = float(fps.group(1))
+        if tbn:
+            info['tbn'] = int(float(tbn.group(1)) * (1000 if tbn.group(2) else 1))
+    return info
+
+
+# AVCProfileIndication of an avcC box: libx264's -profile:v name
+H264_PROFILES = {66: 'baseline', 77: 'main', 100: 'high', 110: 'high10', 122: 'high422', 244: 'high444'}
+
+
+def _top_level_boxes(path: Path) -> Iterator[Tuple[str, int, int]]:
+    """(type, offset, size) of an MP4's top-level boxes in file order"""
+    size = path.stat().st_size
+    with open(path, 'rb') as f:
+        offset = 0
+        while offset + 8 <= size:
+            f.seek(offset)
+            box_size, box_type = struct.unpack('>I4s', f.read(8))
+            if box_size == 1:
+                box_size, = struct.unpack('>Q', f.read(8))  # 64-bit size follows the type
+            elif box_size == 0:
+                box_size = size - offset  # box extends to the end of the file
+            if box_size < 8:
+                break
+            yield box_type.decode('latin-1'), offset, box_size
+            offset += box_size
+
+
+def top_level_atoms(path: Path) -> List[str]:
+    """Types of an MP4's top-level boxes in file order, e.g. ['ftyp', 'moov', 'mdat']"""
+    return [box_type for box_type, _, _ in _top_level_boxes(path)]
+
+
+def h264_profile_level(path: Path) -> Optional[Tuple[str, str]]:
+    """
+    Profile and level of an MP4's H.264 stream, read from its avcC box
+
+    Returns:
+        libx264's -profile:v and -level:v values, e.g. ('high', '3.0'), or
+        None if the video is not H.264 (or its profile is not one libx264 encodes)
+    """
+    for box_type, offset, size in _top_level_boxes(path):
+        if box_type != 'moov':
+            continue
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            moov = f.read(size)
+        config = moov.find(b'avcC')
+        # configurationVersion, AVCProfileIndication, profile_compatibility, AVCLevelIndication
+        if config < 0 or len(moov) < config + 8:
+            return None
+        profile, level = moov[config + 5], moov[config + 7]
+        if profile not in H264_PROFILES:
+            return None
+        return H264_PROFILES[profile], f"{level // 10}.{level % 10}"
+    return None
+
+
+def is_fast_start(path: Path) -> bool:
+    """Whether a player can start before downloading the whole file"""
+    atoms = top_level_atoms(path)
+    if 'moov' not in atoms:
+        return False
+    return 'mdat' not in atoms or atoms.index('moov') < atoms.index('mdat')
+
+
+def make_fast_start(path: Path, ffmpeg: Optional[str] = None) -> bool:
+    """
+    Move the moov atom to the front of path in place (stream copy)
+
+    Returns:
+        True if the file was rewritten, False if it already was fast-start
+    """
+    if is_fast_start(path):
+        return False
+    ffmpeg = ffmpeg or ffmpeg_path()
+    if not ffmpeg:
+        raise FileNotFoundError("ffmpeg not found")
+    tmp = path.with_name(f".{path.stem}.faststart.tmp.mp4")
+    try:
+        run_ffmpeg(ffmpeg, '-i', str(path), '-map', '0', '-c', 'copy', '-movflags', '+faststart', str(tmp))
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return True
+
+
+def package_hls(video_path: Path, output_dir: Path, segment_seconds: float = HLS_SEGMENT_SECONDS,
+                ffmpeg: Optional[str] = None) -> Path:
+    """
+    Split a video into an HLS VOD playlist of fragmented MP4 segments (stream copy)
+
+    Segments can only start on keyframes, so their length is at least segment_seconds
+    rounded up to the video's keyframe interval
+
+    Returns:
+        Path of the playlist in output_dir
+    """
+    ffmpeg = ffmpeg or ffmpeg_path()
+    if not ffmpeg:
+        raise FileNotFoundError("ffmpeg not found")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    playlist = output_dir / HLS_PLAYLIST
+    run_ffmpeg(ffmpeg, '-i', str(video_path), '-map', '0', '-c', 'copy',
+               '-f', 'hls', '-hls_time', f'{segment_seconds:g}', '-hls_playlist_type', 'vod',
+               '-hls_segment_type', 'fmp4', '-hls_fmp4_init_filename', 'init.mp4',
+               '-hls_segment_filename', str(output_dir / 'segment_%03d.m4s'),
+               str(playlist))
+    return playlist
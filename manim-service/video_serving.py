@@ -0,0 +1,88 @@
+"""
+Serving published videos
+Video ids are UUIDs and a published video never changes, so responses carry a
+strong ETag and may be cached forever. Range and conditional requests are
+answered here, or the transfer is handed to a reverse proxy (VIDEO_SENDFILE_MODE)
+"""
+import os
+from pathlib import Path
+
+from flask import Response, current_app, request
+from werkzeug.utils import send_file, send_from_directory
+
+# '' streams the file from the worker (gunicorn uses sendfile(2) for whole files),
+# 'x-accel' hands it to nginx, 'x-sendfile' to Apache/lighttpd
+VIDEO_SENDFILE_MODE = os.getenv('VIDEO_SENDFILE_MODE', '').lower()
+# nginx `internal` location aliased to the media directory
+VIDEO_ACCEL_PREFIX = os.getenv('VIDEO_ACCEL_PREFIX', '/protected-media/')
+VIDEO_MAX_AGE = 365 * 24 * 3600
+
+SENDFILE_MODES = ('', 'x-accel', 'x-sendfile')
+
+HLS_MIMETYPES = {
+    '.m3u8': 'application/vnd.apple.mpegurl',
+    '.m4s': 'video/iso.segment',
+    '.ts': 'video/mp2t',
+    '.mp4': 'video/mp4',
+}
+
+
+def video_etag(video_id: str, size: int) -> str:
+    """Strong ETag: a video id always refers to the same bytes"""
+    return f"{video_id}-{size:x}"
+
+
+def send_video(video_path: Path, video_id: str, mode: str = VIDEO_SENDFILE_MODE) -> Response:
+    """
+    Response for GET /video/<video_id>, honouring Range, If-None-Match and
+    If-Modified-Since
+
+    Raises:
+        FileNotFoundError: if the video does not exist
+    """
+    if mode not in SENDFILE_MODES:
+        raise ValueError(f"Unknown VIDEO_SENDFILE_MODE {mode!r}, expected one of {SENDFILE_MODES}")
+    stat = video_path.stat()
+    etag = video_etag(video_id, stat.st_size)
+
+    if mode:
+        # The proxy serves the bytes, including ranges; 304s are answered without it
+        response = current_app.response_class(mimetype='video/mp4')
+        if mode == 'x-accel':
+            response.headers['X-Accel-Redirect'] = f"{VIDEO_ACCEL_PREFIX.rstrip('/')}/{video_path.name}"
+        else:
+            response.headers['X-Sendfile'] = str(video_path.absolute())
+        response.set_etag(etag)
+        response.last_modified = stat.st_mtime
+        response = response.make_conditional(request)
+    else:
+        response = send_file(video_path, request.environ, mimetype='video/mp4',
+                             response_class=current_app.response_class,
+                             etag=etag, last_modified=stat.st_mtime, max_age=VIDEO_MAX_AGE, conditional=True)
+
+    response.cache_control.public = True
+    response.cache_control.max_age = VIDEO_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+
+def send_hls_file(hls_dir: Path, filename: str, live: bool = False) -> Response:
+    """
+    Response for a playlist, init segment or media segment of a packaged video,
+    or of a live render when live is set (its playlist keeps changing)
+
+    Raises:
+        werkzeug.exceptions.NotFound: for unknown files, or names outside hls_dir
+    """
+    mimetype = HLS_MIMETYPES.get(Path(filename).suffix, 'application/octet-stream')
+    if live and filename.endswith('.m3u8'):
+        # max_age=None: revalidate on every poll
+        return send_from_directory(hls_dir, filename, request.environ, mimetype=mimetype,
+                                   response_class=current_app.response_class, conditional=True)
+    response = send_from_directory(hls_dir, filename, request.environ, mimetype=mimetype,
+                                   response_class=current_app.response_class, max_age=VIDEO_MAX_AGE,
+                                   conditional=True)
+    response.cache_control.public = True
+    response.cache_control.max_age = VIDEO_MAX_AGE
+    response.cache_control.immutable = True
+    return response
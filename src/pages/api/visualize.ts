@@ -121,6 +121,10 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
           if (!manimResponse.ok) {
             const errorData = await manimResponse.json();
             log(`ERROR from Manim service: ${JSON.stringify(errorData)}`);
+            if (manimResponse.status === 422) {
+              // Rejected before rendering; retry with the line-numbered validation errors
+              throw new Error(`Manim generation failed: ${errorData.error}\n${errorData.details}`);
+            }
             throw new Error(errorData.error || `Manim service error ${manimResponse.status}`);
           }
 